@@ -2,7 +2,7 @@
 카드 관리 API
 """
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -268,6 +268,7 @@ async def create_card_pattern(
 ):
     """카드별 사용용도 패턴 추가"""
     from app.repositories.pattern_repo import PatternRepository
+    from app.services.matching import MatchingService
 
     card_repo = CardRepository(db)
     card = card_repo.get_by_id(card_id)
@@ -282,8 +283,12 @@ async def create_card_pattern(
         match_type="exact",
     )
 
+    # 미매칭 거래에 바로 적용
+    applied = MatchingService(db).apply_pattern(pattern)
+
     return {
         "success": True,
+        "applied_count": applied,
         "pattern": {
             "id": pattern.id,
             "merchant_name": pattern.merchant_name,
@@ -304,6 +309,7 @@ async def match_card_transaction(
     """카드 거래내역 수동 매칭 (해당 카드의 패턴 DB에 저장)"""
     from app.models.transaction import Transaction
     from app.repositories.pattern_repo import PatternRepository
+    from app.services.matching import MatchingService
 
     card_repo = CardRepository(db)
     card = card_repo.get_by_id(card_id)
@@ -336,6 +342,11 @@ async def match_card_transaction(
 
     db.commit()
 
+    # 같은 가맹점의 다른 미매칭 거래에 적용
+    applied = 0
+    if pattern:
+        applied = MatchingService(db).apply_pattern(pattern)
+
     return {
         "success": True,
         "transaction": {
@@ -345,24 +356,36 @@ async def match_card_transaction(
             "match_status": transaction.match_status,
         },
         "pattern_saved": pattern is not None,
+        "applied_count": applied,
     }
 
 
 @router.post("/{card_id}/rematch")
 async def rematch_card_transactions(
     card_id: int,
+    chunk_size: int = Query(500, ge=1, le=5000, description="청크당 처리 건수"),
+    stream: bool = False,
     db: Session = Depends(get_db),
 ):
-    """카드 미매칭 거래 일괄 재매칭"""
+    """
+    카드 미매칭 거래 일괄 재매칭
+
+    - chunk_size: 청크당 처리 건수 (청크마다 커밋)
+    - stream: True면 청크별 진행 상황을 NDJSON으로 스트리밍
+    """
     from app.services.matching import MatchingService
+    from app.api.transactions import stream_rematch_progress
 
     card_repo = CardRepository(db)
     card = card_repo.get_by_id(card_id)
     if not card:
         raise HTTPException(status_code=404, detail="카드를 찾을 수 없습니다")
 
+    if stream:
+        return stream_rematch_progress(card_id, chunk_size)
+
     matching_service = MatchingService(db)
-    stats = matching_service.batch_rematch(card_id)
+    stats = matching_service.batch_rematch(card_id, chunk_size)
 
     return {
         "success": True,
@@ -404,6 +427,7 @@ async def delete_card_pattern(
 ):
     """카드 패턴 삭제"""
     from app.models.pattern import Pattern
+    from app.repositories.pattern_repo import PatternRepository
 
     card_repo = CardRepository(db)
     card = card_repo.get_by_id(card_id)
@@ -419,7 +443,6 @@ async def delete_card_pattern(
     if not pattern:
         raise HTTPException(status_code=404, detail="패턴을 찾을 수 없습니다")
 
-    db.delete(pattern)
-    db.commit()
+    PatternRepository(db).delete(pattern.id)
 
     return {"success": True, "message": "패턴이 삭제되었습니다"}
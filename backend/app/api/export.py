@@ -1,9 +1,10 @@
 """
 Excel 내보내기 API
-Supabase Storage 연동
+Supabase Storage 연동 (outbox를 거쳐 백그라운드 업로드)
 """
 import logging
 from io import BytesIO
+from typing import Optional
 from urllib.parse import quote
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -13,11 +14,30 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.services.excel_export import ExcelExportService
 from app.services.supabase_storage import get_storage_service
+from app.services.storage_outbox import StorageUploader, get_storage_uploader
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def queue_export(db: Session, excel_bytes: bytes, filename: str) -> Optional[dict]:
+    """내보내기 파일을 Storage 업로드 outbox에 등록하고 참조 반환 (실패 시 None)"""
+    try:
+        item = get_storage_uploader().enqueue_excel_export(db, excel_bytes, filename)
+        return StorageUploader.reference(item)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to queue storage upload: {e}")
+        return None
+
+
+def set_storage_headers(response: StreamingResponse, storage_ref: dict) -> None:
+    """업로드 대기 참조를 응답 헤더에 기록 (상태는 status_url로 조회)"""
+    response.headers["X-Storage-Outbox-Id"] = str(storage_ref["outbox_id"])
+    response.headers["X-Storage-Status"] = storage_ref["status"]
+    response.headers["X-Storage-Status-URL"] = storage_ref["status_url"]
+
+
 @router.get("/months")
 async def get_available_months(db: Session = Depends(get_db)):
     """거래가 있는 월 목록 조회"""
@@ -43,15 +63,8 @@ async def export_monthly(
 
     filename = f"칠칠기업_법인카드_{year}_{month:02d}.xlsx"
 
-    # Storage에 저장 (옵션)
-    storage_info = None
-    if save_to_storage:
-        try:
-            storage = get_storage_service()
-            storage_info = storage.upload_excel_export(excel_bytes, filename)
-            logger.info(f"Exported file saved to storage: {storage_info['path']}")
-        except Exception as e:
-            logger.error(f"Failed to save to storage: {e}")
+    # Storage에 저장 (옵션, 백그라운드 업로드)
+    storage_ref = queue_export(db, excel_bytes, filename) if save_to_storage else None
 
     encoded_filename = quote(filename)
 
@@ -63,9 +76,9 @@ async def export_monthly(
         }
     )
 
-    # Storage URL을 헤더에 포함 (저장된 경우)
-    if storage_info:
-        response.headers["X-Storage-URL"] = storage_info["url"]
+    # Storage 업로드 참조를 헤더에 포함 (저장 요청한 경우)
+    if storage_ref:
+        set_storage_headers(response, storage_ref)
 
     return response
 
@@ -81,15 +94,8 @@ async def export_all(
 
     filename = "칠칠기업_법인카드.xlsx"
 
-    # Storage에 저장 (옵션)
-    storage_info = None
-    if save_to_storage:
-        try:
-            storage = get_storage_service()
-            storage_info = storage.upload_excel_export(excel_bytes, filename)
-            logger.info(f"Exported file saved to storage: {storage_info['path']}")
-        except Exception as e:
-            logger.error(f"Failed to save to storage: {e}")
+    # Storage에 저장 (옵션, 백그라운드 업로드)
+    storage_ref = queue_export(db, excel_bytes, filename) if save_to_storage else None
 
     encoded_filename = quote(filename)
 
@@ -101,8 +107,8 @@ async def export_all(
         }
     )
 
-    if storage_info:
-        response.headers["X-Storage-URL"] = storage_info["url"]
+    if storage_ref:
+        set_storage_headers(response, storage_ref)
 
     return response
 
@@ -210,14 +216,8 @@ async def export_by_card(
     else:
         filename = f"카드_{card_number}_전체.xlsx"
 
-    # Storage 저장 (옵션)
-    storage_info = None
-    if save_to_storage:
-        try:
-            storage = get_storage_service()
-            storage_info = storage.upload_excel_export(excel_bytes, filename)
-        except Exception as e:
-            logger.error(f"Failed to save to storage: {e}")
+    # Storage 저장 (옵션, 백그라운드 업로드)
+    storage_ref = queue_export(db, excel_bytes, filename) if save_to_storage else None
 
     encoded_filename = quote(filename)
 
@@ -229,8 +229,8 @@ async def export_by_card(
         }
     )
 
-    if storage_info:
-        response.headers["X-Storage-URL"] = storage_info["url"]
+    if storage_ref:
+        set_storage_headers(response, storage_ref)
 
     return response
 
@@ -2,7 +2,7 @@
 패턴 관리 API
 """
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -67,11 +67,12 @@ async def list_patterns(
 
 @router.get("/stats")
 async def get_pattern_stats(
+    top_n: int = Query(20, ge=1, le=200, description="미매칭 가맹점 상위 개수"),
     db: Session = Depends(get_db),
 ):
-    """패턴 통계 조회"""
+    """패턴 통계 조회 (단계별 매칭 횟수/지연 시간, 미매칭 상위 가맹점 포함)"""
     matching_service = MatchingService(db)
-    return matching_service.get_match_stats()
+    return matching_service.get_match_stats(top_n=top_n)
 
 
 @router.get("/{pattern_id}")
@@ -120,13 +121,20 @@ async def create_pattern(
     if existing:
         raise HTTPException(status_code=400, detail="이미 등록된 패턴입니다")
 
-    pattern = pattern_repo.create(
-        merchant_name=request.merchant_name,
-        usage_description=request.usage_description,
-        card_id=request.card_id,
-        match_type=request.match_type,
-        priority=request.priority,
-    )
+    # 정규식이 컴파일되지 않으면 저장소에서 ValueError
+    try:
+        pattern = pattern_repo.create(
+            merchant_name=request.merchant_name,
+            usage_description=request.usage_description,
+            card_id=request.card_id,
+            match_type=request.match_type,
+            priority=request.priority,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 미매칭 거래에 바로 적용
+    applied = MatchingService(db).apply_pattern(pattern)
 
     return {
         "success": True,
@@ -135,6 +143,7 @@ async def create_pattern(
             "merchant_name": pattern.merchant_name,
             "usage_description": pattern.usage_description,
         },
+        "applied_count": applied,
     }
 
 
@@ -160,12 +169,20 @@ async def update_pattern(
                 detail=f"유효하지 않은 match_type입니다. 가능한 값: {valid_types}"
             )
 
-    pattern = pattern_repo.update(pattern_id, **update_data)
+    # 수정 후 정규식이 컴파일되지 않으면 저장소에서 ValueError
+    try:
+        pattern = pattern_repo.update(pattern_id, **update_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not pattern:
         raise HTTPException(status_code=404, detail="패턴을 찾을 수 없습니다")
 
+    # 변경된 패턴을 미매칭 거래에 바로 적용
+    applied = MatchingService(db).apply_pattern(pattern)
+
     return {
         "success": True,
+        "applied_count": applied,
         "pattern": {
             "id": pattern.id,
             "merchant_name": pattern.merchant_name,
@@ -200,6 +217,8 @@ async def test_match(
     """패턴 매칭 테스트"""
     matching_service = MatchingService(db)
     usage, pattern_id = matching_service.find_match(merchant_name, card_id)
+    matching_service.flush_use_counts()
+    db.commit()
 
     if usage:
         pattern_repo = PatternRepository(db)
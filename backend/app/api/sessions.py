@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.services.upload import UploadService
+from app.services.upload_jobs import get_upload_jobs
 from app.repositories.session_repo import SessionRepository
 
 router = APIRouter()
@@ -36,6 +37,35 @@ async def get_session(
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@router.get("/{session_id}/progress")
+async def get_session_progress(
+    session_id: int,
+    db: Session = Depends(get_db),
+):
+    """
+    업로드 처리 진행 상황 조회
+
+    - status: processing / completed / failed
+    - progress: 파싱·저장·매칭 건수 (이 서버 프로세스에서 실행 중이거나 최근 끝난 작업만)
+    """
+    session_repo = SessionRepository(db)
+    session = session_repo.get_by_id(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다")
+
+    progress = get_upload_jobs().get_progress(session_id)
+    return {
+        "session_id": session.id,
+        "filename": session.filename,
+        "status": session.status,
+        "error_message": session.error_message,
+        "total_transactions": session.total_transactions,
+        "matched_count": session.matched_count,
+        "pending_count": session.pending_count,
+        "progress": progress.to_dict() if progress else None,
+    }
+
+
 @router.delete("/{session_id}")
 async def delete_session(
     session_id: int,
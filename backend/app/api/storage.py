@@ -0,0 +1,69 @@
+"""
+Storage 업로드 outbox API
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.storage_outbox import StorageOutbox
+from app.services.storage_outbox import StorageUploader, get_storage_uploader
+
+router = APIRouter()
+
+
+@router.get("/outbox")
+async def get_outbox_stats(
+    limit: int = 20,
+    db: Session = Depends(get_db),
+):
+    """업로드 대기열 현황 (상태별 건수, 서킷 브레이커, 최근 항목)"""
+    uploader = get_storage_uploader()
+    recent = (
+        db.query(StorageOutbox)
+        .order_by(StorageOutbox.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return {
+        **uploader.stats(db),
+        "recent": [
+            {
+                **StorageUploader.reference(item),
+                "filename": item.filename,
+                "attempts": item.attempts,
+                "last_error": item.last_error,
+            }
+            for item in recent
+        ],
+    }
+
+
+@router.get("/outbox/{outbox_id}")
+async def get_outbox_item(
+    outbox_id: int,
+    db: Session = Depends(get_db),
+):
+    """업로드 상태 조회 (완료되면 path/url 포함)"""
+    item = db.get(StorageOutbox, outbox_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="업로드 항목을 찾을 수 없습니다")
+
+    return {
+        **StorageUploader.reference(item),
+        "filename": item.filename,
+        "attempts": item.attempts,
+        "next_attempt_at": item.next_attempt_at.isoformat() if item.next_attempt_at else None,
+        "last_error": item.last_error,
+    }
+
+
+@router.post("/outbox/{outbox_id}/retry")
+async def retry_outbox_item(
+    outbox_id: int,
+    db: Session = Depends(get_db),
+):
+    """최종 실패한 업로드 재시도"""
+    item = get_storage_uploader().retry(db, outbox_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="업로드 항목을 찾을 수 없습니다")
+    return {"success": True, **StorageUploader.reference(item)}
@@ -1,13 +1,16 @@
 """
 거래 내역 API
 """
+import json
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.services.transaction import TransactionService
+from app.services.matching import MatchingService
 from app.repositories.transaction_repo import TransactionRepository
 from app.models.transaction import MatchStatus
 
@@ -76,6 +79,50 @@ async def list_transactions(
     }
 
 
+def stream_rematch_progress(card_id: Optional[int], chunk_size: int) -> StreamingResponse:
+    """
+    재매칭 진행 상황 스트리밍 (NDJSON)
+
+    청크가 커밋될 때마다 누적 통계를 한 줄씩 전송한다.
+    응답이 끝날 때까지 세션을 유지해야 하므로 별도 DB 세션을 사용한다.
+    """
+    def generate():
+        db = SessionLocal()
+        try:
+            stats = {}
+            for stats in MatchingService(db).iter_rematch(card_id, chunk_size):
+                yield json.dumps({"done": False, "stats": stats}) + "\n"
+            yield json.dumps({"done": True, "stats": stats}) + "\n"
+        except Exception as e:
+            yield json.dumps({"done": True, "error": str(e)}, ensure_ascii=False) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.post("/rematch")
+async def rematch_transactions(
+    card_id: Optional[int] = None,
+    chunk_size: int = Query(500, ge=1, le=5000, description="청크당 처리 건수"),
+    stream: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    미매칭 거래 전체 재매칭
+
+    - card_id: 특정 카드만 재매칭
+    - chunk_size: 청크당 처리 건수 (청크마다 커밋)
+    - stream: True면 청크별 진행 상황을 NDJSON으로 스트리밍
+    """
+    if stream:
+        return stream_rematch_progress(card_id, chunk_size)
+
+    matching_service = MatchingService(db)
+    stats = matching_service.batch_rematch(card_id, chunk_size)
+    return {"success": True, "stats": stats}
+
+
 @router.get("/pending")
 async def get_pending_transactions(
     session_id: Optional[int] = None,
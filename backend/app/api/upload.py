@@ -1,76 +1,254 @@
 """
 파일 업로드 API
-Supabase Storage 연동
+백그라운드 작업으로 처리 + Supabase Storage 연동
 """
 import logging
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.services.upload import UploadService
-from app.services.supabase_storage import get_storage_service
+from app.services.upload_jobs import UploadProgress, get_upload_jobs
+from app.services.upload_spool import (
+    MAX_BATCH_FILES,
+    UploadSpool,
+    UploadTooLargeError,
+    batch_sha256,
+    spool_request,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# 카드사 명세서 다운로드 형식 (".xls"로 받아도 실제로는 HTML 표나 탭 구분 텍스트인 경우 있음)
+ALLOWED_EXTENSIONS = (".xls", ".xlsx", ".htm", ".html", ".tsv", ".txt", ".csv")
+
+
+def _multipart_body(field: str, multiple: bool = False) -> dict:
+    """OpenAPI 요청 본문 (핸들러가 본문을 직접 스트리밍으로 읽으므로 File 파라미터 대신 문서용으로만 선언)"""
+    binary = {"type": "string", "format": "binary"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": [field],
+                        "properties": {field: {"type": "array", "items": binary} if multiple else binary},
+                    }
+                }
+            },
+        }
+    }
 
-@router.post("")
+
+@router.post("", openapi_extra=_multipart_body("file"))
 async def upload_file(
-    file: UploadFile = File(...),
+    request: Request,
+    wait: bool = Query(False, description="True면 처리 완료까지 기다렸다가 통계 반환"),
+    force: bool = Query(False, description="True면 이미 올린 파일이어도 다시 처리"),
     db: Session = Depends(get_db),
 ):
     """
     카드사 청구명세서 업로드
 
-    - .xls 또는 .xlsx 파일 업로드
-    - 자동으로 거래 파싱 및 패턴 매칭 수행
+    - .xls / .xlsx / HTML 표 / 탭·쉼표 구분 텍스트 업로드 (최대 MAX_UPLOAD_BYTES, 기본 20MB)
+    - 형식은 확장자가 아니라 파일 앞부분 바이트로 판별
+    - 세션을 PROCESSING 상태로 만들고 즉시 응답 (파싱·매칭은 백그라운드 작업)
+    - 진행 상황: GET /api/sessions/{session_id}/progress
+    - 같은 파일(SHA-256 동일)을 다시 올리면 처리 없이 기존 세션 결과 반환 (force=true로 재처리)
     - Supabase Storage에 원본 파일 저장
     """
-    # 파일 확장자 검사
-    if not file.filename.endswith((".xls", ".xlsx")):
-        raise HTTPException(
-            status_code=400,
-            detail="지원하지 않는 파일 형식입니다. .xls 또는 .xlsx 파일만 가능합니다.",
-        )
+    # 파일 받기 (받는 도중 크기 제한을 확인하며 메모리/임시 파일에 스풀)
+    spool = (await _receive(request, "file"))[0]
+    filename = spool.filename
+    upload_service = UploadService(db)
 
-    try:
-        # 파일 읽기
-        file_bytes = await file.read()
+    # 같은 파일 재업로드: 기존 세션 결과 반환
+    if not force:
+        previous = upload_service.find_previous_upload(spool.sha256)
+        if previous:
+            spool.close()
+            return _reused_response(previous)
 
-        # Supabase Storage에 원본 파일 저장
-        storage_info = None
+    if wait:
+        # 요청 안에서 바로 처리 (기존 동작)
+        session = upload_service.create_session(filename=filename, content_hash=spool.sha256)
+        progress = UploadProgress(session_id=session.id, filename=filename)
         try:
-            storage = get_storage_service()
-            storage_info = storage.upload_billing_statement(file_bytes, file.filename)
-            logger.info(f"Uploaded file saved to storage: {storage_info['path']}")
+            stats = upload_service.run_upload(session.id, spool, progress=progress)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
-            logger.warning(f"Failed to save to storage (continuing): {e}")
-
-        # 업로드 처리
-        upload_service = UploadService(db)
-        session, stats = upload_service.process_upload(
-            file_bytes=file_bytes,
-            filename=file.filename,
-        )
+            raise HTTPException(status_code=500, detail=f"업로드 처리 오류: {str(e)}")
+        finally:
+            spool.close()
+        db.refresh(session)
 
         response = {
             "success": True,
             "session_id": session.id,
             "filename": session.filename,
+            "status": session.status,
             "stats": stats,
+            "timings": stats.pop("timings", None),
             "message": f"{stats['created']}건 처리, {stats['matched']}건 자동 매칭",
         }
 
         # Storage 정보 추가
-        if storage_info:
-            response["storage"] = {
-                "path": storage_info["path"],
-                "url": storage_info["url"],
-            }
+        if "storage" in progress.extra:
+            response["storage"] = progress.extra["storage"]
 
         return response
 
+    # 세션만 만들고 처리는 백그라운드 워커에 맡김 (스풀은 작업이 닫음)
+    session = upload_service.create_session(filename=filename, content_hash=spool.sha256)
+    get_upload_jobs().submit(session.id, spool)
+
+    return {
+        "success": True,
+        "session_id": session.id,
+        "filename": session.filename,
+        "status": session.status,
+        "progress_url": f"/api/sessions/{session.id}/progress",
+        "message": "업로드가 접수되었습니다. 진행 상황은 progress_url에서 확인하세요.",
+    }
+
+
+@router.post("/preview", openapi_extra=_multipart_body("file"))
+async def preview_upload(
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    업로드 미리보기 (dry-run)
+
+    - 파싱 → 중복 확인 → 매칭까지 실행하되 세션·거래는 만들지 않음
+    - 행별 예상 상태(new / duplicate / unknown_card), 매칭될 사용내역과 매칭 단계
+    - 집계: 신규/중복/미등록 카드/매칭 건수, 매칭 단계별 건수
+    - 파싱에서 제외된 행과 사유 (rejected: 카드번호 / 날짜 / 가맹점명 / 금액)
+    """
+    spool = (await _receive(request, "file"))[0]
+
+    try:
+        return UploadService(db).preview_upload(spool)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"업로드 처리 오류: {str(e)}")
+    finally:
+        spool.close()
+
+
+@router.post("/batch", openapi_extra=_multipart_body("files", multiple=True))
+async def upload_files(
+    request: Request,
+    wait: bool = Query(False, description="True면 처리 완료까지 기다렸다가 통계 반환"),
+    force: bool = Query(False, description="True면 이미 올린 파일 묶음이어도 다시 처리"),
+    db: Session = Depends(get_db),
+):
+    """
+    여러 카드사 청구명세서를 한 번에 업로드
+
+    - 파일별 파싱은 병렬로 실행하고, 합친 거래를 한 세션에 한 번의 일괄 저장으로 처리
+    - 기간이 겹치는 명세서 사이의 같은 거래는 한 번만 저장 (중복으로 집계)
+    - 응답/진행 상황에 파일별 통계와 오류 포함 (일부 파일 실패 시 나머지는 저장)
+    - 같은 파일 묶음(파일별 SHA-256과 순서 동일)을 다시 올리면 기존 세션 결과 반환
+    """
+    spools = await _receive(request, "files", max_files=MAX_BATCH_FILES)
+    filenames = [spool.filename for spool in spools]
+
+    upload_service = UploadService(db)
+    content_hash = batch_sha256(spools)
+
+    if not force:
+        previous = upload_service.find_previous_upload(content_hash)
+        if previous:
+            for spool in spools:
+                spool.close()
+            return _reused_response(previous)
+
+    filename = filenames[0] if len(filenames) == 1 else f"{filenames[0]} 외 {len(filenames) - 1}건"
+    session = upload_service.create_session(filename=filename[:255], content_hash=content_hash)
+
+    if wait:
+        progress = UploadProgress(session_id=session.id, filename=session.filename)
+        try:
+            stats = upload_service.run_batch_upload(session.id, spools, progress=progress)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"업로드 처리 오류: {str(e)}")
+        finally:
+            for spool in spools:
+                spool.close()
+        db.refresh(session)
+
+        failed = sum(1 for f in stats["files"] if f["error"])
+        return {
+            "success": True,
+            "session_id": session.id,
+            "filename": session.filename,
+            "status": session.status,
+            "stats": stats,
+            "timings": stats.pop("timings", None),
+            "message": (
+                f"{len(filenames)}개 파일 {stats['created']}건 처리, {stats['matched']}건 자동 매칭"
+                + (f", {failed}개 파일 실패" if failed else "")
+            ),
+        }
+
+    get_upload_jobs().submit_batch(session.id, spools, session.filename)
+
+    return {
+        "success": True,
+        "session_id": session.id,
+        "filename": session.filename,
+        "status": session.status,
+        "files": filenames,
+        "progress_url": f"/api/sessions/{session.id}/progress",
+        "message": f"{len(filenames)}개 파일 업로드가 접수되었습니다. 진행 상황은 progress_url에서 확인하세요.",
+    }
+
+
+async def _receive(request: Request, field: str, max_files: int = 1) -> List[UploadSpool]:
+    """요청 본문의 파일 필드를 스풀로 받기 (크기 초과 413, 형식·개수 오류 400)"""
+    try:
+        spools = await spool_request(request, field, max_files=max_files, validate=_check_extension)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not spools:
+        raise HTTPException(status_code=400, detail="업로드할 파일이 없습니다.")
+    return spools
+
+
+def _check_extension(filename: str) -> None:
+    """파일 확장자 검사 (실제 형식은 파서가 파일 내용으로 판별)"""
+    if not filename.lower().endswith(ALLOWED_EXTENSIONS):
+        raise HTTPException(
+            status_code=400,
+            detail="지원하지 않는 파일 형식입니다. .xls, .xlsx, .html, .tsv, .csv 파일만 가능합니다.",
+        )
+
+
+def _reused_response(previous) -> dict:
+    """같은 내용 재업로드: 기존 세션 결과 (세션에 저장된 집계만, 처리 중이면 그 시점까지의 값)"""
+    return {
+        "success": True,
+        "session_id": previous.id,
+        "filename": previous.filename,
+        "status": previous.status,
+        "reused": True,
+        "stats": {
+            "created": previous.total_transactions or 0,
+            "matched": previous.matched_count or 0,
+            "pending": previous.pending_count or 0,
+        },
+        "timings": previous.timings,
+        "progress_url": f"/api/sessions/{previous.id}/progress",
+        "message": f"이미 업로드된 파일입니다 (세션 {previous.id}). 다시 처리하려면 force=true로 요청하세요.",
+    }
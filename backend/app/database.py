@@ -50,5 +50,5 @@ def get_db():
 
 def init_db():
     """데이터베이스 초기화 (테이블 생성)"""
-    from app.models import card, pattern, transaction, session, user  # noqa
+    from app.models import card, pattern, transaction, session, user, storage_outbox  # noqa
     Base.metadata.create_all(bind=engine)
@@ -0,0 +1,65 @@
+"""
+거래 중복 판정 키
+같은 명세서를 다시 올리거나 기간이 겹치는 명세서를 동시에 올려도
+DB 유니크 인덱스(transactions.dedup_key)가 중복 저장을 막도록 결정적인 키를 만든다.
+"""
+import hashlib
+from datetime import date
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+DedupFields = Tuple[int, date, str, int]  # (card_id, 거래일, 가맹점명, 금액)
+
+
+def make_dedup_key(
+    card_id: int,
+    transaction_date: date,
+    merchant_name: str,
+    amount: int,
+    occurrence: int = 0,
+) -> str:
+    """
+    거래 중복 판정 키 (SHA-256 hex, 64자)
+
+    Args:
+        card_id: 카드 ID
+        transaction_date: 거래일
+        merchant_name: 가맹점명
+        amount: 금액
+        occurrence: 같은 날 같은 가맹점·금액 거래의 순번 (0부터)
+
+    Returns:
+        중복 판정 키
+    """
+    raw = f"{card_id}|{transaction_date.isoformat()}|{merchant_name}|{amount}|{occurrence}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def assign_dedup_keys(
+    rows: Iterable[DedupFields],
+    sources: Optional[Sequence[Hashable]] = None,
+    occurrences: Optional[Dict[Tuple[Hashable, DedupFields], int]] = None,
+) -> List[str]:
+    """
+    명세서 순서대로 중복 판정 키 부여
+
+    같은 날 같은 가맹점에서 같은 금액을 두 번 결제한 경우처럼
+    정상적으로 반복되는 거래는 순번(occurrence)을 달리해 서로 다른 키를 받는다.
+    같은 명세서를 다시 올리면 같은 순번이 다시 나오므로 중복으로 걸러진다.
+
+    Args:
+        rows: [(card_id, 거래일, 가맹점명, 금액), ...]
+        sources: 행별 출처 명세서 (여러 파일을 합친 배치용). 순번은 명세서별로 매긴다.
+        occurrences: 앞 배치까지 센 순번 (한 명세서를 여러 배치로 나눠 저장할 때 같은 dict를
+            넘기면 이어서 센다. 이 함수가 갱신함)
+
+    Returns:
+        입력 순서와 같은 키 리스트
+    """
+    seen = occurrences if occurrences is not None else {}
+    keys = []
+    for i, fields in enumerate(rows):
+        counter_key = (sources[i] if sources is not None else None, fields)
+        occurrence = seen.get(counter_key, 0)
+        seen[counter_key] = occurrence + 1
+        keys.append(make_dedup_key(*fields, occurrence=occurrence))
+    return keys
@@ -12,7 +12,7 @@ load_dotenv(env_path)
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import upload, sessions, transactions, cards, patterns, users, export
+from app.api import upload, sessions, transactions, cards, patterns, users, export, storage
 from app.database import engine, Base
 
 # 테이블 생성 (SQLite 사용 시)
@@ -48,6 +48,25 @@ app.include_router(cards.router, prefix="/api/cards", tags=["Cards"])
 app.include_router(patterns.router, prefix="/api/patterns", tags=["Patterns"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(export.router, prefix="/api/export", tags=["Export"])
+app.include_router(storage.router, prefix="/api/storage", tags=["Storage"])
+
+
+@app.on_event("startup")
+async def start_storage_uploader():
+    """이전 실행에서 남은 Storage 업로드 대기 항목 처리 시작"""
+    from app.services.storage_outbox import get_storage_uploader
+    get_storage_uploader().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_upload_jobs():
+    """진행 중인 업로드 작업이 끝날 때까지 대기 후 종료"""
+    from app.services.upload_jobs import get_upload_jobs
+    from app.services.parse_pool import get_parse_pool
+    from app.services.storage_outbox import get_storage_uploader
+    get_upload_jobs().shutdown(wait=True)
+    get_parse_pool().shutdown()
+    get_storage_uploader().stop()
 
 
 @app.get("/")
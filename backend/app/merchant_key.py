@@ -0,0 +1,88 @@
+"""
+가맹점명 정규화
+카드사마다 다르게 표기되는 가맹점명을 비교용 키(merchant_key)로 변환
+
+예) "쿠팡(주)-쿠팡(주)", "㈜쿠팡", "쿠팡 주식회사" → "쿠팡"
+"""
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List, Optional
+
+# 법인 형태 표기 (NFKC 이후 기준, ㈜ → (주))
+CORPORATE_FORMS = [
+    r"\(\s*주\s*\)",
+    r"\(\s*유\s*\)",
+    r"\(\s*재\s*\)",
+    r"\(\s*사\s*\)",
+    r"주식회사",
+    r"유한회사",
+    r"유한책임회사",
+    r"재단법인",
+    r"사단법인",
+    r"\bco\.?,?\s*ltd\.?",
+    r"\binc\.?$",
+    r"\bcorp\.?$",
+]
+
+# 기본 지점/채널 접미어 규칙 (MERCHANT_SUFFIX_RULES 환경변수로 교체 가능)
+DEFAULT_SUFFIX_RULES = [
+    r"/(인터넷|온라인|모바일)$",  # "서울보증보험(주)안산지점/인터넷"
+    r"\s*\([^()]*점\)$",     # "맘스터치 (고잔신도시점)"
+    r"\s+[^\s]*점$",         # "써브웨이 안산고잔점"
+    r"\s*\d+호점$",          # "OO식당 2호점"
+]
+
+_CORPORATE_RE = re.compile("|".join(CORPORATE_FORMS))
+_FOLD_RE = re.compile(r"[\W_]+")
+
+
+def _load_suffix_rules() -> List["re.Pattern"]:
+    raw = os.getenv("MERCHANT_SUFFIX_RULES")
+    rules = json.loads(raw) if raw else DEFAULT_SUFFIX_RULES
+    return [re.compile(rule) for rule in rules]
+
+
+_suffix_rules = _load_suffix_rules()
+
+
+def configure_suffix_rules(rules: Optional[List[str]] = None) -> None:
+    """접미어 규칙 교체 (None이면 기본 규칙). 기존 키는 백필로 다시 계산해야 함"""
+    global _suffix_rules
+    _suffix_rules = [re.compile(rule) for rule in (rules if rules is not None else DEFAULT_SUFFIX_RULES)]
+    normalize_merchant.cache_clear()
+
+
+@lru_cache(maxsize=65536)
+def normalize_merchant(name: Optional[str]) -> str:
+    """
+    가맹점명 → 비교용 키
+
+    1. NFKC 정규화 (전각/반각 통일, 한글 조합형 정리) + 소문자화
+    2. 지점/채널 접미어 제거
+    3. 법인 형태 표기 제거
+    4. 공백·구두점 제거
+    5. "쿠팡쿠팡"처럼 같은 이름이 두 번 이어지면 하나로
+
+    Args:
+        name: 원본 가맹점명
+
+    Returns:
+        정규화된 키 (정규화 결과가 비면 공백만 정리한 원본)
+    """
+    if not name:
+        return ""
+
+    text = unicodedata.normalize("NFKC", name).casefold().strip()
+    for rule in _suffix_rules:
+        text = rule.sub("", text)
+    text = _CORPORATE_RE.sub(" ", text)
+    key = _FOLD_RE.sub("", text)
+
+    half = len(key) // 2
+    if len(key) % 2 == 0 and half >= 2 and key[:half] == key[half:]:
+        key = key[:half]
+
+    return key or name.strip()
@@ -6,5 +6,6 @@ from app.models.card import Card
 from app.models.pattern import Pattern
 from app.models.transaction import Transaction
 from app.models.session import UploadSession
+from app.models.storage_outbox import StorageOutbox
 
-__all__ = ["User", "Card", "Pattern", "Transaction", "UploadSession"]
+__all__ = ["User", "Card", "Pattern", "Transaction", "UploadSession", "StorageOutbox"]
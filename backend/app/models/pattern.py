@@ -22,6 +22,7 @@ class Pattern(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     merchant_name = Column(String(200), nullable=False, index=True)  # 가맹점명
+    merchant_key = Column(String(200), index=True)  # 정규화된 가맹점명 (app.merchant_key)
     usage_description = Column(String(200), nullable=False)  # 사용내역
     card_id = Column(Integer, ForeignKey("cards.id"), nullable=True)  # NULL이면 공통 패턴
     match_type = Column(String(20), default=MatchType.EXACT.value)
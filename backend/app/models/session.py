@@ -1,7 +1,7 @@
 """
 업로드 세션 모델
 """
-from sqlalchemy import Column, Integer, String, DateTime, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -14,6 +14,7 @@ class SessionStatus(str, enum.Enum):
     PENDING = "pending"        # 업로드됨, 미처리
     PROCESSING = "processing"  # 처리 중
     COMPLETED = "completed"    # 완료
+    FAILED = "failed"          # 처리 실패
     SYNCED = "synced"          # 시트 동기화됨
 
 
@@ -29,6 +30,10 @@ class UploadSession(Base):
     pending_count = Column(Integer, default=0)
     status = Column(String(20), default=SessionStatus.PENDING.value)
     created_by = Column(String(100))
+    error_message = Column(String(500))  # 처리 실패 사유
+    content_hash = Column(String(64), index=True)  # 업로드 파일 SHA-256 (재업로드 판별)
+    duration_ms = Column(Integer)  # 업로드 처리 전체 소요 시간
+    timings = Column(JSON)  # 단계별 소요 시간 {stages_ms, total_ms, rows, rows_per_sec}
 
     # 관계
     transactions = relationship("Transaction", back_populates="session")
@@ -0,0 +1,39 @@
+"""
+Storage 업로드 대기열 모델 (outbox)
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+import enum
+
+from app.database import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    """업로드 상태"""
+    PENDING = "pending"      # 대기 (재시도 대기 포함)
+    UPLOADING = "uploading"  # 업로드 중
+    DONE = "done"            # 완료
+    FAILED = "failed"        # 최대 재시도 초과
+
+
+class StorageOutbox(Base):
+    """Storage 업로드 대기 항목 (파일 내용은 로컬 디스크에 보관)"""
+    __tablename__ = "storage_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    filename = Column(String(255), nullable=False)  # 원본 파일명
+    folder = Column(String(50), nullable=False)  # Storage 폴더 (uploads / exports)
+    content_type = Column(String(100), nullable=False)
+    local_path = Column(String(500), nullable=False)  # 업로드할 파일 내용 (로컬 경로)
+    status = Column(String(20), default=OutboxStatus.PENDING.value, index=True)
+    claimed_at = Column(DateTime)  # uploading으로 선점한 시각 (lease 만료 판단용)
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_error = Column(String(500))
+    storage_path = Column(String(500))  # 업로드 완료 후 Storage 경로
+    storage_url = Column(String(1000))  # 업로드 완료 후 URL
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<StorageOutbox {self.id}: {self.folder}/{self.filename} ({self.status})>"
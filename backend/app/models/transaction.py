@@ -25,7 +25,9 @@ class Transaction(Base):
     card_id = Column(Integer, ForeignKey("cards.id"), nullable=False, index=True)
     transaction_date = Column(Date, nullable=False)
     merchant_name = Column(String(200), nullable=False, index=True)
+    merchant_key = Column(String(200), index=True)  # 정규화된 가맹점명 (app.merchant_key)
     amount = Column(Integer, nullable=False)
+    dedup_key = Column(String(64), unique=True, index=True)  # 중복 판정 키 (app.dedup_key)
     industry = Column(String(100))  # 업종
     usage_description = Column(String(200))  # 매칭된 사용내역
     match_status = Column(String(20), default=MatchStatus.PENDING.value, index=True)
@@ -1,7 +1,7 @@
 """
 카드 Repository
 """
-from typing import Optional, List
+from typing import Optional, List, Iterable, Dict
 from sqlalchemy.orm import Session
 
 from app.models.card import Card
@@ -28,6 +28,14 @@ class CardRepository:
         """카드번호(끝 4자리)로 조회"""
         return self.db.query(Card).filter(Card.card_number == card_number).first()
 
+    def get_id_map(self, card_numbers: Iterable[str]) -> Dict[str, int]:
+        """카드번호 목록 → 카드 ID 매핑 (쿼리 1회, 미등록 카드는 제외)"""
+        numbers = set(card_numbers)
+        if not numbers:
+            return {}
+        rows = self.db.query(Card.card_number, Card.id).filter(Card.card_number.in_(numbers))
+        return {number: card_id for number, card_id in rows}
+
     def create(self, card_number: str, card_name: str, sheet_name: Optional[str] = None) -> Card:
         """새 카드 생성"""
         card = Card(
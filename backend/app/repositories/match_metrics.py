@@ -0,0 +1,133 @@
+"""
+매칭 계측
+단계별(카드 정확 → 공통 정확 → 포함 → 정규식) 적중 횟수와 소요 시간을 프로세스 메모리에 집계
+"""
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+# 매칭이 결정된 단계
+TIERS = ["card_exact", "card_key", "common_exact", "common_key", "contains", "regex", "none"]
+
+# 시간을 재는 구간
+STAGES = ["exact", "contains", "regex"]
+
+# 히스토그램 구간 상한 (밀리초)
+LATENCY_BUCKETS_MS = [0.01, 0.05, 0.1, 0.5, 1, 5, 10]
+
+
+class LatencyHistogram:
+    """고정 구간 지연 시간 히스토그램"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self) -> dict:
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 4) if self.count else 0,
+            "max_ms": round(self.max_ms, 4),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class MatchMetrics:
+    """
+    매칭 통계 집계기
+
+    - 인덱스 판정 단위: 판정 횟수, 구간별 지연 시간 (캐시 적중 행은 판정하지 않음)
+    - 행 단위 (캐시 적중 포함): 결정 단계별 횟수, 매칭/미매칭 합계, 자주 미매칭되는 가맹점
+    """
+
+    def __init__(self, max_unmatched: int = 5000):
+        self.max_unmatched = max_unmatched
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """전체 초기화"""
+        with self._lock:
+            self.tiers: Dict[str, int] = {tier: 0 for tier in TIERS}
+            self.evaluations = 0
+            self.latency: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+            self.hits = 0
+            self.misses = 0
+            self.unmatched: Counter = Counter()
+
+    def record_lookup(self, stage_ms: Dict[str, float]) -> None:
+        """
+        인덱스 판정 1건 기록
+
+        Args:
+            stage_ms: 실행된 구간별 소요 시간 (밀리초)
+        """
+        with self._lock:
+            self.evaluations += 1
+            for stage, ms in stage_ms.items():
+                self.latency[stage].observe(ms)
+
+    def record_results(self, tiers: Iterable[str], unmatched_names: Iterable[str]) -> None:
+        """
+        매칭 결과 기록 (캐시 적중 포함, 행 단위)
+
+        Args:
+            tiers: 행마다 매칭이 결정된 단계 (미매칭은 "none")
+            unmatched_names: 미매칭 행의 가맹점명
+        """
+        counts = Counter(tiers)
+        names = list(unmatched_names)
+        with self._lock:
+            for tier, count in counts.items():
+                self.tiers[tier] += count
+            self.misses += counts["none"]
+            self.hits += sum(counts.values()) - counts["none"]
+            self.unmatched.update(names)
+            if len(self.unmatched) > self.max_unmatched:
+                # 빈도 낮은 가맹점부터 버려 메모리 사용량 제한
+                self.unmatched = Counter(dict(self.unmatched.most_common(self.max_unmatched // 2)))
+
+    def stats(self, top_n: int = 20) -> dict:
+        """집계 결과"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "lookups": lookups,
+                "tiers": dict(self.tiers),
+                "index_evaluations": self.evaluations,
+                "latency": {stage: h.to_dict() for stage, h in self.latency.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0,
+                "top_unmatched": [
+                    {"merchant_name": name, "count": count}
+                    for name, count in self.unmatched.most_common(top_n)
+                ],
+            }
+
+
+# 싱글톤 인스턴스
+_match_metrics: Optional[MatchMetrics] = None
+
+
+def get_match_metrics() -> MatchMetrics:
+    """매칭 계측 인스턴스 반환"""
+    global _match_metrics
+    if _match_metrics is None:
+        _match_metrics = MatchMetrics()
+    return _match_metrics
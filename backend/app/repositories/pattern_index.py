@@ -0,0 +1,438 @@
+"""
+컴파일된 패턴 인덱스
+패턴 테이블을 프로세스 메모리에 올려 가맹점 매칭 시 행마다 SQL을 날리지 않도록 함
+"""
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.pattern import Pattern, MatchType
+from app.merchant_key import normalize_merchant
+from app.repositories.match_metrics import get_match_metrics
+
+logger = logging.getLogger(__name__)
+
+# 다른 워커(프로세스)의 패턴 변경을 DB에서 확인하는 최소 간격 (초)
+VERSION_CHECK_SECONDS = float(os.getenv("PATTERN_INDEX_CHECK_SECONDS", "5"))
+
+
+@dataclass(frozen=True)
+class CompiledPattern:
+    """인덱스에 적재된 패턴 스냅샷 (DB 세션과 무관)"""
+    id: int
+    merchant_name: str
+    merchant_key: str
+    usage_description: str
+    card_id: Optional[int]
+    match_type: str
+    priority: int
+
+    @classmethod
+    def from_model(cls, pattern: Pattern) -> "CompiledPattern":
+        return cls(
+            id=pattern.id,
+            merchant_name=pattern.merchant_name,
+            merchant_key=pattern.merchant_key or normalize_merchant(pattern.merchant_name),
+            usage_description=pattern.usage_description,
+            card_id=pattern.card_id,
+            match_type=pattern.match_type or MatchType.EXACT.value,
+            priority=pattern.priority or 0,
+        )
+
+    @property
+    def rank(self) -> Tuple[int, int]:
+        """정렬 키: 우선순위 높은 것 → ID 작은 것 순"""
+        return (-self.priority, self.id)
+
+
+class AhoCorasick:
+    """다중 부분 문자열 검색 오토마톤 (CONTAINS 패턴용)"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[CompiledPattern]] = [[]]
+
+    def add(self, word: str, value: CompiledPattern) -> None:
+        """단어 등록 (build 전에만 호출)"""
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(value)
+
+    def build(self) -> None:
+        """실패 링크 계산 (BFS)"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._fail[nxt]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[CompiledPattern]:
+        """text에 부분 문자열로 포함된 모든 등록 값"""
+        yield from self._out[0]  # 빈 문자열 패턴
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if node:
+                yield from self._out[node]
+
+
+def validate_pattern(merchant_name: str, match_type: str) -> None:
+    """
+    패턴 저장 전 유효성 검사
+
+    Raises:
+        ValueError: 정규식 패턴이 컴파일되지 않는 경우
+    """
+    if match_type == MatchType.REGEX.value:
+        try:
+            re.compile(merchant_name)
+        except re.error as e:
+            raise ValueError(f"유효하지 않은 정규식입니다: {e}")
+
+
+def required_literal(regex: "re.Pattern") -> str:
+    """
+    정규식이 매칭되려면 반드시 포함해야 하는 가장 긴 리터럴 문자열
+
+    대소문자 무시 등 리터럴을 보장할 수 없는 경우 빈 문자열 반환
+    """
+    if regex.flags & re.IGNORECASE:
+        return ""
+
+    best = ""
+    run: List[str] = []
+
+    def walk(items) -> None:
+        nonlocal best
+        for op, arg in items:
+            if op == sre_parse.LITERAL:
+                run.append(chr(arg))
+                continue
+            if op == sre_parse.SUBPATTERN and not (arg[1] & re.IGNORECASE):
+                # 그룹 내부도 전체가 필수 요소
+                walk(arg[-1])
+                continue
+            if len(run) > len(best):
+                best = "".join(run)
+            run.clear()
+
+    walk(sre_parse.parse(regex.pattern, regex.flags))
+    if len(run) > len(best):
+        best = "".join(run)
+    return best
+
+
+class _RegexSet:
+    """
+    정규식 패턴 집합
+
+    각 정규식에서 필수 리터럴을 뽑아 오토마톤으로 먼저 거르고,
+    후보로 남은 정규식만 실행한다.
+    """
+
+    def __init__(self, patterns: List[CompiledPattern]):
+        self._prefilter = AhoCorasick()
+        self._unfiltered: List[CompiledPattern] = []
+        self._compiled: Dict[int, "re.Pattern"] = {}
+        self.size = 0
+
+        for p in patterns:
+            try:
+                regex = re.compile(p.merchant_name)
+            except re.error as e:
+                logger.warning(f"정규식 패턴 {p.id} 컴파일 실패 (건너뜀): {e}")
+                continue
+            self._compiled[p.id] = regex
+            self.size += 1
+            literal = required_literal(regex)
+            if literal:
+                self._prefilter.add(literal, p)
+            else:
+                self._unfiltered.append(p)
+        self._prefilter.build()
+
+    def match(self, merchant_name: str, card_id: Optional[int]) -> Optional[CompiledPattern]:
+        if not self.size:
+            return None
+        candidates = {
+            p for p in self._prefilter.iter_matches(merchant_name)
+            if p.card_id is None or p.card_id == card_id
+        }
+        candidates.update(
+            p for p in self._unfiltered
+            if p.card_id is None or p.card_id == card_id
+        )
+        for p in sorted(candidates, key=lambda x: x.rank):
+            if self._compiled[p.id].search(merchant_name):
+                return p
+        return None
+
+
+class _Snapshot:
+    """특정 버전의 패턴 집합으로 빌드된 불변 인덱스"""
+
+    def __init__(self, patterns: List[CompiledPattern]):
+        self.exact: Dict[Tuple[Optional[int], str], CompiledPattern] = {}
+        self.exact_key: Dict[Tuple[Optional[int], str], CompiledPattern] = {}
+        self.contains = AhoCorasick()
+        self.size = len(patterns)
+        regex_patterns = []
+
+        for p in sorted(patterns, key=lambda x: x.rank):
+            if p.match_type == MatchType.EXACT.value:
+                # 같은 키가 여러 개면 우선순위가 가장 높은 패턴 유지
+                self.exact.setdefault((p.card_id, p.merchant_name), p)
+                self.exact_key.setdefault((p.card_id, p.merchant_key), p)
+            elif p.match_type == MatchType.CONTAINS.value:
+                self.contains.add(p.merchant_name, p)
+            elif p.match_type == MatchType.REGEX.value:
+                regex_patterns.append(p)
+        self.contains.build()
+        self.regex = _RegexSet(regex_patterns)
+
+    def match(self, merchant_name: str, card_id: Optional[int]) -> Tuple[Optional[CompiledPattern], str]:
+        """매칭 결과와 결정 단계 (구간별 소요 시간은 인덱스 판정 지표에 기록)"""
+        pattern, tier, stage_ms = self._match_traced(merchant_name, card_id)
+        get_match_metrics().record_lookup(stage_ms)
+        return pattern, tier
+
+    def _match_traced(
+        self, merchant_name: str, card_id: Optional[int]
+    ) -> Tuple[Optional[CompiledPattern], str, Dict[str, float]]:
+        """매칭 결과와 결정 단계, 구간별 소요 시간(ms)"""
+        stage_ms: Dict[str, float] = {}
+        started = time.perf_counter()
+        merchant_key = normalize_merchant(merchant_name)
+
+        def elapsed(stage: str) -> None:
+            nonlocal started
+            now = time.perf_counter()
+            stage_ms[stage] = (now - started) * 1000
+            started = now
+
+        # 1. 카드 전용 정확 매칭 (원문 → 정규화 키)
+        if card_id:
+            pattern = self.exact.get((card_id, merchant_name))
+            if pattern:
+                elapsed("exact")
+                return pattern, "card_exact", stage_ms
+            pattern = self.exact_key.get((card_id, merchant_key))
+            if pattern:
+                elapsed("exact")
+                return pattern, "card_key", stage_ms
+
+        # 2. 공통 정확 매칭 (원문 → 정규화 키)
+        pattern = self.exact.get((None, merchant_name))
+        if pattern:
+            elapsed("exact")
+            return pattern, "common_exact", stage_ms
+        pattern = self.exact_key.get((None, merchant_key))
+        elapsed("exact")
+        if pattern:
+            return pattern, "common_key", stage_ms
+
+        # 3. 포함 매칭 (우선순위 최고 패턴)
+        best = None
+        for p in self.contains.iter_matches(merchant_name):
+            if p.card_id is None or p.card_id == card_id:
+                if best is None or p.rank < best.rank:
+                    best = p
+        elapsed("contains")
+        if best:
+            return best, "contains", stage_ms
+
+        # 4. 정규식 매칭 (우선순위 순)
+        pattern = self.regex.match(merchant_name, card_id)
+        elapsed("regex")
+        return pattern, ("regex" if pattern else "none"), stage_ms
+
+
+class PatternIndex:
+    """
+    프로세스 전역 패턴 인덱스
+
+    패턴이 변경되면 invalidate()로 버전을 올리고,
+    다음 조회 시점에 DB에서 한 번만 다시 빌드한다.
+    다른 워커에서 바뀐 패턴은 check_interval초마다 DB의 패턴 집합 지문
+    (건수, 최대 ID, 최근 생성·수정 시각)을 비교해 알아챈다.
+    """
+
+    def __init__(self, check_interval: Optional[float] = None):
+        self.check_interval = VERSION_CHECK_SECONDS if check_interval is None else check_interval
+        self._lock = threading.Lock()
+        self._version = 0
+        # (빌드한 버전, 스냅샷) - 둘이 어긋나 보이지 않도록 한 번에 교체하고 한 번에 읽는다
+        self._state: Tuple[int, Optional[_Snapshot]] = (-1, None)
+        self._fingerprint: Optional[tuple] = None
+        self._checked_at = float("-inf")
+
+    @property
+    def version(self) -> int:
+        """패턴 집합 버전 (변경마다 증가)"""
+        return self._version
+
+    def current_version(self, db: Session) -> int:
+        """
+        DB의 패턴 집합 변경을 반영한 버전 (확인은 check_interval초에 한 번)
+
+        Args:
+            db: 지문 조회에 사용할 DB 세션
+
+        Returns:
+            패턴 집합 버전 (다른 워커의 변경이 보이면 증가)
+        """
+        self._check_fingerprint(db)
+        return self._version
+
+    def invalidate(self) -> None:
+        """패턴 변경 알림 - 다음 조회 시 재빌드"""
+        with self._lock:
+            self._version += 1
+
+    @staticmethod
+    def _read_fingerprint(db: Session) -> tuple:
+        """패턴 집합 지문: 생성·수정·삭제되면 달라지는 집계값 (쿼리 1회)"""
+        return tuple(db.query(
+            func.count(Pattern.id),
+            func.max(Pattern.id),
+            func.max(Pattern.created_at),
+            func.max(Pattern.updated_at),
+        ).one())
+
+    def _check_fingerprint(self, db: Session) -> None:
+        """check_interval이 지났으면 DB 지문을 확인하고, 달라졌으면 버전을 올림"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            fingerprint = self._read_fingerprint(db)
+            if self._fingerprint is not None and fingerprint != self._fingerprint:
+                self._version += 1
+            self._fingerprint = fingerprint
+
+    def _get_snapshot(self, db: Session) -> _Snapshot:
+        self._check_fingerprint(db)
+        built_version, snapshot = self._state
+        if snapshot is not None and built_version == self._version:
+            return snapshot
+
+        with self._lock:
+            built_version, snapshot = self._state
+            if snapshot is not None and built_version == self._version:
+                return snapshot
+            version = self._version
+            # 빌드에 쓴 패턴과 같은 시점의 지문을 기준으로 삼는다
+            self._fingerprint = self._read_fingerprint(db)
+            self._checked_at = time.monotonic()
+            # 호출자 세션에 이미 올라온 Pattern 객체(변경 전 값)를 재사용하지 않도록 컬럼만 조회
+            rows = db.query(
+                Pattern.id,
+                Pattern.merchant_name,
+                Pattern.merchant_key,
+                Pattern.usage_description,
+                Pattern.card_id,
+                Pattern.match_type,
+                Pattern.priority,
+            ).all()
+            snapshot = _Snapshot([CompiledPattern.from_model(row) for row in rows])
+            self._state = (version, snapshot)
+            return snapshot
+
+    def match(
+        self, db: Session, merchant_name: str, card_id: Optional[int] = None
+    ) -> Optional[CompiledPattern]:
+        """
+        가맹점명에 적용할 패턴 찾기
+
+        Args:
+            db: 인덱스 빌드가 필요할 때 사용할 DB 세션
+            merchant_name: 가맹점명
+            card_id: 카드 ID (카드 전용 패턴 우선)
+
+        Returns:
+            매칭된 CompiledPattern. 없으면 None
+        """
+        return self._get_snapshot(db).match(merchant_name, card_id)[0]
+
+    def match_many(
+        self, db: Session, items: List[Tuple[str, Optional[int]]]
+    ) -> List[Tuple[Optional[CompiledPattern], str]]:
+        """
+        여러 가맹점을 한 번에 매칭 (입력 순서 유지)
+
+        같은 (가맹점명, 카드 ID) 조합은 한 번만 판정한다.
+
+        Returns:
+            입력 순서와 같은 [(CompiledPattern 또는 None, 단계), ...]
+        """
+        snapshot = self._get_snapshot(db)
+        resolved: Dict[Tuple[str, Optional[int]], Tuple[Optional[CompiledPattern], str]] = {}
+        results = []
+        for key in items:
+            if key not in resolved:
+                resolved[key] = snapshot.match(*key)
+            results.append(resolved[key])
+        return results
+
+    def explain_many(
+        self, db: Session, items: List[Tuple[str, Optional[int]]]
+    ) -> List[Tuple[Optional[CompiledPattern], str]]:
+        """
+        여러 가맹점의 매칭 결과와 결정 단계 (미리보기용, 매칭 지표에 기록하지 않음)
+
+        Returns:
+            입력 순서와 같은 [(CompiledPattern 또는 None, 단계), ...]
+        """
+        snapshot = self._get_snapshot(db)
+        resolved: Dict[Tuple[str, Optional[int]], Tuple[Optional[CompiledPattern], str]] = {}
+        results = []
+        for key in items:
+            if key not in resolved:
+                pattern, tier, _ = snapshot._match_traced(*key)
+                resolved[key] = (pattern, tier)
+            results.append(resolved[key])
+        return results
+
+
+# 싱글톤 인스턴스
+_pattern_index: Optional[PatternIndex] = None
+
+
+def get_pattern_index() -> PatternIndex:
+    """패턴 인덱스 인스턴스 반환"""
+    global _pattern_index
+    if _pattern_index is None:
+        _pattern_index = PatternIndex()
+    return _pattern_index
@@ -1,11 +1,14 @@
 """
 패턴 Repository
 """
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, update, case, func
 
 from app.models.pattern import Pattern, MatchType
+from app.merchant_key import normalize_merchant
+from app.repositories.pattern_index import CompiledPattern, get_pattern_index, validate_pattern
+from app.repositories.suggest_index import get_suggest_index
 
 
 class PatternRepository:
@@ -47,46 +50,36 @@ class PatternRepository:
         self, merchant_name: str, card_id: Optional[int] = None
     ) -> Optional[Pattern]:
         """매칭 로직 적용하여 패턴 찾기"""
-        # 1. 카드 전용 정확 매칭
-        if card_id:
-            pattern = (
-                self.db.query(Pattern)
-                .filter(
-                    Pattern.card_id == card_id,
-                    Pattern.merchant_name == merchant_name,
-                    Pattern.match_type == MatchType.EXACT.value,
-                )
-                .first()
-            )
-            if pattern:
-                return pattern
-
-        # 2. 공통 정확 매칭
-        pattern = (
-            self.db.query(Pattern)
-            .filter(
-                Pattern.card_id == None,
-                Pattern.merchant_name == merchant_name,
-                Pattern.match_type == MatchType.EXACT.value,
-            )
-            .first()
-        )
-        if pattern:
-            return pattern
-
-        # 3. 포함 매칭 (CONTAINS)
-        contains_patterns = (
-            self.db.query(Pattern)
-            .filter(Pattern.match_type == MatchType.CONTAINS.value)
-            .order_by(Pattern.priority.desc())
-            .all()
-        )
-        for p in contains_patterns:
-            if p.merchant_name in merchant_name:
-                if p.card_id is None or p.card_id == card_id:
-                    return p
+        entry = self.find_matching_entry(merchant_name, card_id)
+        if not entry:
+            return None
+        return self.db.get(Pattern, entry.id)
 
-        return None
+    def find_matching_entry(
+        self, merchant_name: str, card_id: Optional[int] = None
+    ) -> Optional[CompiledPattern]:
+        """
+        컴파일된 인덱스로 패턴 찾기 (SQL 조회 없음)
+
+        매칭 순서:
+        1. 카드 전용 정확 매칭 (원문 → merchant_key)
+        2. 공통 정확 매칭 (원문 → merchant_key)
+        3. 포함(CONTAINS) 매칭 - 우선순위 순
+        4. 정규식(REGEX) 매칭 - 우선순위 순
+        """
+        return get_pattern_index().match(self.db, merchant_name, card_id)
+
+    def find_matching_entries(
+        self, items: List[Tuple[str, Optional[int]]]
+    ) -> List[Tuple[Optional[CompiledPattern], str]]:
+        """(가맹점명, 카드 ID) 목록을 한 번에 매칭 → [(패턴 또는 None, 결정 단계)] (입력 순서 유지)"""
+        return get_pattern_index().match_many(self.db, items)
+
+    def explain_matching_entries(
+        self, items: List[Tuple[str, Optional[int]]]
+    ) -> List[Tuple[Optional[CompiledPattern], str]]:
+        """(가맹점명, 카드 ID) 목록의 매칭 결과와 결정 단계 (읽기 전용)"""
+        return get_pattern_index().explain_many(self.db, items)
 
     def create(
         self,
@@ -97,9 +90,16 @@ class PatternRepository:
         priority: int = 0,
         created_by: Optional[str] = None,
     ) -> Pattern:
-        """새 패턴 생성"""
+        """
+        새 패턴 생성
+
+        Raises:
+            ValueError: 정규식 패턴이 컴파일되지 않는 경우
+        """
+        validate_pattern(merchant_name, match_type)
         pattern = Pattern(
             merchant_name=merchant_name,
+            merchant_key=normalize_merchant(merchant_name),
             usage_description=usage_description,
             card_id=card_id,
             match_type=match_type,
@@ -109,26 +109,66 @@ class PatternRepository:
         self.db.add(pattern)
         self.db.commit()
         self.db.refresh(pattern)
+        self._on_patterns_changed(upserted=[pattern])
         return pattern
 
     def update(self, pattern_id: int, **kwargs) -> Optional[Pattern]:
-        """패턴 수정"""
+        """
+        패턴 수정
+
+        Raises:
+            ValueError: 수정 후 정규식 패턴이 컴파일되지 않는 경우
+        """
         pattern = self.get_by_id(pattern_id)
         if not pattern:
             return None
+        if "merchant_name" in kwargs or "match_type" in kwargs:
+            validate_pattern(
+                kwargs.get("merchant_name", pattern.merchant_name),
+                kwargs.get("match_type", pattern.match_type),
+            )
         for key, value in kwargs.items():
             if hasattr(pattern, key):
                 setattr(pattern, key, value)
+        if "merchant_name" in kwargs:
+            pattern.merchant_key = normalize_merchant(pattern.merchant_name)
         self.db.commit()
         self.db.refresh(pattern)
+        self._on_patterns_changed(upserted=[pattern])
         return pattern
 
-    def increment_use_count(self, pattern_id: int) -> None:
-        """사용 횟수 증가"""
-        pattern = self.get_by_id(pattern_id)
-        if pattern:
-            pattern.use_count += 1
-            self.db.commit()
+    def add_use_counts(self, counts: Dict[int, int], chunk_size: int = 500) -> int:
+        """
+        사용 횟수 일괄 증가
+
+        패턴별 증가분을 CASE 식으로 묶어 청크당 UPDATE 한 번으로 반영한다.
+        현재 값에 더하는 방식이라 여러 번 나눠 반영해도 합계가 정확하다.
+        규칙이 바뀐 것은 아니므로 updated_at은 그대로 둔다 (패턴 인덱스 지문에 포함).
+        UPDATE만 실행하고 커밋하지 않는다 (호출자의 작업 단위와 함께 커밋).
+
+        Args:
+            counts: {pattern_id: 증가분}
+            chunk_size: UPDATE 한 번에 포함할 패턴 수
+
+        Returns:
+            갱신된 패턴 수
+        """
+        ids = [pattern_id for pattern_id, count in counts.items() if count]
+        updated = 0
+        for start in range(0, len(ids), chunk_size):
+            chunk = {pattern_id: counts[pattern_id] for pattern_id in ids[start:start + chunk_size]}
+            result = self.db.execute(
+                update(Pattern)
+                .where(Pattern.id.in_(chunk.keys()))
+                .values(
+                    use_count=func.coalesce(Pattern.use_count, 0)
+                    + case(chunk, value=Pattern.id, else_=0),
+                    updated_at=Pattern.updated_at,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+        return updated
 
     def delete(self, pattern_id: int) -> bool:
         """패턴 삭제"""
@@ -137,6 +177,7 @@ class PatternRepository:
             return False
         self.db.delete(pattern)
         self.db.commit()
+        self._on_patterns_changed(deleted_ids=[pattern_id])
         return True
 
     def get_or_create(
@@ -152,13 +193,33 @@ class PatternRepository:
         return pattern
 
     def bulk_create(self, patterns_data: List[dict]) -> List[Pattern]:
-        """대량 패턴 생성"""
+        """
+        대량 패턴 생성 (하나라도 유효하지 않으면 아무것도 저장하지 않음)
+
+        Raises:
+            ValueError: 정규식 패턴이 컴파일되지 않는 경우
+        """
+        for data in patterns_data:
+            validate_pattern(data["merchant_name"], data.get("match_type", MatchType.EXACT.value))
         patterns = []
         for data in patterns_data:
             pattern = Pattern(**data)
+            pattern.merchant_key = normalize_merchant(pattern.merchant_name)
             self.db.add(pattern)
             patterns.append(pattern)
         self.db.commit()
         for p in patterns:
             self.db.refresh(p)
+        self._on_patterns_changed(upserted=patterns)
         return patterns
+
+    def _on_patterns_changed(
+        self,
+        upserted: List[Pattern] = (),
+        deleted_ids: List[int] = (),
+    ) -> None:
+        """패턴 집합 변경 후 인메모리 인덱스 갱신"""
+        get_pattern_index().invalidate()
+        suggest_index = get_suggest_index()
+        suggest_index.upsert(CompiledPattern.from_model(p) for p in upserted)
+        suggest_index.remove(deleted_ids)
@@ -1,7 +1,9 @@
 """
 업로드 세션 Repository
 """
+from datetime import datetime
 from typing import Optional, List
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
 from app.models.session import UploadSession, SessionStatus
@@ -35,26 +37,67 @@ class SessionRepository:
             .all()
         )
 
-    def create(self, filename: str, created_by: Optional[str] = None) -> UploadSession:
+    def get_by_content_hash(
+        self,
+        content_hash: str,
+        processing_since: Optional[datetime] = None,
+    ) -> Optional[UploadSession]:
+        """
+        같은 파일로 만든 재사용 가능한 가장 최근 세션
+
+        완료(동기화 포함)된 세션과, processing_since 이후에 시작해 아직 처리 중인 세션만 대상이다.
+        그보다 오래된 처리 중 세션은 재시작 등으로 버려진 것으로 보고 제외한다.
+
+        Args:
+            content_hash: 업로드 파일 SHA-256
+            processing_since: 처리 중 세션을 인정할 시작 시각 하한 (없으면 처리 중 세션 제외)
+        """
+        reusable = UploadSession.status.in_([SessionStatus.COMPLETED.value, SessionStatus.SYNCED.value])
+        if processing_since is not None:
+            reusable = or_(reusable, and_(
+                UploadSession.status == SessionStatus.PROCESSING.value,
+                UploadSession.upload_date >= processing_since,
+            ))
+        return (
+            self.db.query(UploadSession)
+            .filter(UploadSession.content_hash == content_hash, reusable)
+            .order_by(UploadSession.id.desc())
+            .first()
+        )
+
+    def create(
+        self,
+        filename: str,
+        created_by: Optional[str] = None,
+        status: str = SessionStatus.PENDING.value,
+        content_hash: Optional[str] = None,
+    ) -> UploadSession:
         """새 세션 생성"""
         session = UploadSession(
             filename=filename,
             created_by=created_by,
+            status=status,
+            content_hash=content_hash,
         )
         self.db.add(session)
         self.db.commit()
         self.db.refresh(session)
         return session
 
-    def update_status(self, session_id: int, status: str) -> Optional[UploadSession]:
+    def _update(self, session_id: int, values: dict, commit: bool = True) -> bool:
+        """세션 한 행을 UPDATE 한 번으로 변경 (조회·refresh 없음)"""
+        updated = (
+            self.db.query(UploadSession)
+            .filter(UploadSession.id == session_id)
+            .update(values, synchronize_session=False)
+        )
+        if commit:
+            self.db.commit()
+        return updated > 0
+
+    def update_status(self, session_id: int, status: str) -> bool:
         """세션 상태 업데이트"""
-        session = self.get_by_id(session_id)
-        if not session:
-            return None
-        session.status = status
-        self.db.commit()
-        self.db.refresh(session)
-        return session
+        return self._update(session_id, {UploadSession.status: status})
 
     def update_counts(
         self,
@@ -62,26 +105,69 @@ class SessionRepository:
         total: Optional[int] = None,
         matched: Optional[int] = None,
         pending: Optional[int] = None,
-    ) -> Optional[UploadSession]:
-        """세션 카운트 업데이트"""
-        session = self.get_by_id(session_id)
-        if not session:
-            return None
+    ) -> bool:
+        """세션 카운트 업데이트 (지정한 값으로 덮어씀)"""
+        values = {}
         if total is not None:
-            session.total_transactions = total
+            values[UploadSession.total_transactions] = total
         if matched is not None:
-            session.matched_count = matched
+            values[UploadSession.matched_count] = matched
         if pending is not None:
-            session.pending_count = pending
-        self.db.commit()
-        self.db.refresh(session)
-        return session
+            values[UploadSession.pending_count] = pending
+        if not values:
+            return False
+        return self._update(session_id, values)
 
-    def mark_completed(self, session_id: int) -> Optional[UploadSession]:
+    def add_ingested(
+        self,
+        session_id: int,
+        created: int,
+        matched: int,
+        status: Optional[str] = None,
+    ) -> bool:
+        """
+        저장된 거래 수만큼 세션 카운트 증가 (+ 상태 전환) - 커밋하지 않음
+
+        거래 INSERT와 같은 트랜잭션에서 호출해 세션 카운트가
+        실제로 저장된 거래와 항상 일치하도록 한다.
+
+        Args:
+            session_id: 세션 ID
+            created: 저장된 거래 수
+            matched: 그중 자동 매칭된 수
+            status: 함께 바꿀 상태 (없으면 유지)
+
+        Returns:
+            세션 존재 여부
+        """
+        values = {
+            UploadSession.total_transactions: func.coalesce(UploadSession.total_transactions, 0) + created,
+            UploadSession.matched_count: func.coalesce(UploadSession.matched_count, 0) + matched,
+            UploadSession.pending_count: func.coalesce(UploadSession.pending_count, 0) + (created - matched),
+        }
+        if status is not None:
+            values[UploadSession.status] = status
+        return self._update(session_id, values, commit=False)
+
+    def record_timings(self, session_id: int, timings: dict) -> bool:
+        """처리 소요 시간 기록 (StageTimer.to_dict() 결과)"""
+        return self._update(session_id, {
+            UploadSession.duration_ms: int(timings["total_ms"]),
+            UploadSession.timings: timings,
+        })
+
+    def mark_completed(self, session_id: int) -> bool:
         """세션 완료 처리"""
         return self.update_status(session_id, SessionStatus.COMPLETED.value)
 
-    def mark_synced(self, session_id: int) -> Optional[UploadSession]:
+    def mark_failed(self, session_id: int, error_message: str) -> bool:
+        """세션 실패 처리 (사유 기록)"""
+        return self._update(session_id, {
+            UploadSession.status: SessionStatus.FAILED.value,
+            UploadSession.error_message: error_message[:500],
+        })
+
+    def mark_synced(self, session_id: int) -> bool:
         """세션 동기화 완료 처리"""
         return self.update_status(session_id, SessionStatus.SYNCED.value)
 
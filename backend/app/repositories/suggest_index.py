@@ -0,0 +1,165 @@
+"""
+패턴 제안용 n-gram 역색인
+띄어쓰기 없는 한글 가맹점명도 후보를 빠르게 좁힐 수 있도록 문자 bigram 단위로 색인
+"""
+import heapq
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.pattern import Pattern
+from app.repositories.pattern_index import CompiledPattern
+
+
+def _bigrams(text: str) -> Set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _index_keys(name: str) -> Set[str]:
+    """패턴 가맹점명의 색인 키 (bigram + 한 글자 단어)"""
+    keys = _bigrams(name)
+    if len(name) == 1:
+        keys.add(name)
+    keys.update(word for word in name.split() if len(word) == 1)
+    return keys
+
+
+def _score(pattern_name: str, merchant_name: str) -> int:
+    """기존 제안 점수 체계 (100/80/60/40)"""
+    if pattern_name == merchant_name:
+        return 100
+    if pattern_name in merchant_name:
+        return 80
+    if merchant_name in pattern_name:
+        return 60
+    if any(word in merchant_name for word in pattern_name.split()):
+        return 40
+    return 0
+
+
+class SuggestIndex:
+    """
+    가맹점명 bigram 역색인
+
+    처음 조회할 때 DB에서 한 번 적재하고, 이후에는 패턴 변경 시
+    upsert/remove로 해당 패턴만 갱신한다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._entries: Dict[int, CompiledPattern] = {}
+        self._grams: Dict[int, Set[str]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._empty: Set[int] = set()  # 가맹점명이 빈 패턴 (항상 후보)
+
+    def _add(self, entry: CompiledPattern) -> None:
+        self._entries[entry.id] = entry
+        if not entry.merchant_name:
+            self._empty.add(entry.id)
+            return
+        grams = _index_keys(entry.merchant_name)
+        self._grams[entry.id] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(entry.id)
+
+    def _remove(self, pattern_id: int) -> None:
+        self._entries.pop(pattern_id, None)
+        self._empty.discard(pattern_id)
+        for gram in self._grams.pop(pattern_id, ()):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(pattern_id)
+                if not ids:
+                    del self._postings[gram]
+
+    def ensure_loaded(self, db: Session) -> None:
+        """최초 1회 전체 패턴 적재"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for p in db.query(Pattern).all():
+                self._add(CompiledPattern.from_model(p))
+            self._loaded = True
+
+    def upsert(self, entries: Iterable[CompiledPattern]) -> None:
+        """패턴 추가/수정 반영 (적재 전이면 무시 - 적재 시 DB에서 읽음)"""
+        with self._lock:
+            if not self._loaded:
+                return
+            for entry in entries:
+                self._remove(entry.id)
+                self._add(entry)
+
+    def remove(self, pattern_ids: Iterable[int]) -> None:
+        """패턴 삭제 반영"""
+        with self._lock:
+            if not self._loaded:
+                return
+            for pattern_id in pattern_ids:
+                self._remove(pattern_id)
+
+    def suggest(
+        self,
+        db: Session,
+        merchant_name: str,
+        card_id: Optional[int] = None,
+        limit: int = 5,
+    ) -> List[dict]:
+        """
+        유사 패턴 상위 limit개
+
+        bigram을 공유하는 패턴만 후보로 삼아 기존 점수(100/80/60/40)를 매기고,
+        같은 점수 안에서는 카드 전용 → bigram 유사도(Dice) 순으로 정렬한다.
+        """
+        self.ensure_loaded(db)
+        query_grams = _bigrams(merchant_name)
+
+        with self._lock:
+            if len(merchant_name) < 2:
+                candidate_ids = set(self._entries)
+            else:
+                candidate_ids = set(self._empty)
+                for gram in query_grams | set(merchant_name):
+                    candidate_ids.update(self._postings.get(gram, ()))
+            candidates = [self._entries[i] for i in candidate_ids]
+
+        ranked = []
+        for p in candidates:
+            if card_id and p.card_id is not None and p.card_id != card_id:
+                continue
+            score = _score(p.merchant_name, merchant_name)
+            if score == 0:
+                continue
+            pattern_grams = _bigrams(p.merchant_name)
+            total = len(pattern_grams) + len(query_grams)
+            similarity = 2 * len(pattern_grams & query_grams) / total if total else 0.0
+            is_card_specific = p.card_id == card_id
+            ranked.append(((-score, -is_card_specific, -similarity, p.id), p, score, similarity))
+
+        return [
+            {
+                "pattern_id": p.id,
+                "merchant_name": p.merchant_name,
+                "usage_description": p.usage_description,
+                "score": score,
+                "similarity": round(similarity, 3),
+                "is_card_specific": p.card_id == card_id,
+            }
+            for _, p, score, similarity in heapq.nsmallest(limit, ranked, key=lambda x: x[0])
+        ]
+
+
+# 싱글톤 인스턴스
+_suggest_index: Optional[SuggestIndex] = None
+
+
+def get_suggest_index() -> SuggestIndex:
+    """제안 색인 인스턴스 반환"""
+    global _suggest_index
+    if _suggest_index is None:
+        _suggest_index = SuggestIndex()
+    return _suggest_index
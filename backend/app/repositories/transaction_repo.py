@@ -1,12 +1,13 @@
 """
 거래내역 Repository
 """
-from typing import Optional, List
+from typing import Iterable, Optional, List, Set
 from datetime import date
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
 
 from app.models.transaction import Transaction, MatchStatus
+from app.merchant_key import normalize_merchant
+from app.dedup_key import make_dedup_key
 
 
 class TransactionRepository:
@@ -68,15 +69,25 @@ class TransactionRepository:
         merchant_name: str,
         amount: int,
         industry: Optional[str] = None,
+        usage_description: Optional[str] = None,
+        matched_pattern_id: Optional[int] = None,
+        match_status: str = MatchStatus.PENDING.value,
+        merchant_key: Optional[str] = None,
+        dedup_key: Optional[str] = None,
     ) -> Transaction:
-        """새 거래 생성"""
+        """새 거래 생성 (매칭 결과가 있으면 함께 저장)"""
         transaction = Transaction(
             session_id=session_id,
             card_id=card_id,
             transaction_date=transaction_date,
             merchant_name=merchant_name,
+            merchant_key=merchant_key or normalize_merchant(merchant_name),
+            dedup_key=dedup_key or make_dedup_key(card_id, transaction_date, merchant_name, amount),
             amount=amount,
             industry=industry,
+            usage_description=usage_description,
+            matched_pattern_id=matched_pattern_id,
+            match_status=match_status,
         )
         self.db.add(transaction)
         self.db.commit()
@@ -88,6 +99,13 @@ class TransactionRepository:
         transactions = []
         for data in transactions_data:
             transaction = Transaction(**data)
+            if not transaction.merchant_key:
+                transaction.merchant_key = normalize_merchant(transaction.merchant_name)
+            if not transaction.dedup_key:
+                transaction.dedup_key = make_dedup_key(
+                    transaction.card_id, transaction.transaction_date,
+                    transaction.merchant_name, transaction.amount,
+                )
             self.db.add(transaction)
             transactions.append(transaction)
         self.db.commit()
@@ -95,6 +113,68 @@ class TransactionRepository:
             self.db.refresh(t)
         return transactions
 
+    def insert_many(self, mappings: List[dict]) -> Set[str]:
+        """
+        거래 일괄 INSERT (executemany, 커밋하지 않음)
+
+        dedup_key 유니크 인덱스와 충돌하는 행은 건너뛴다.
+        (PostgreSQL / SQLite 모두 INSERT ... ON CONFLICT (dedup_key) DO NOTHING)
+        동시에 올라온 업로드끼리도 DB가 중복을 막는다.
+
+        Args:
+            mappings: dedup_key를 포함한 거래 데이터 리스트
+
+        Returns:
+            실제로 저장된 행의 dedup_key 집합
+        """
+        if not mappings:
+            return set()
+        for data in mappings:
+            if not data.get("merchant_key"):
+                data["merchant_key"] = normalize_merchant(data["merchant_name"])
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = (
+            dialect_insert(Transaction)
+            .on_conflict_do_nothing(index_elements=[Transaction.dedup_key])
+            .returning(Transaction.dedup_key)
+        )
+        result = self.db.execute(stmt, mappings)
+        return set(result.scalars().all())
+
+    def exists_by_key(self, dedup_key: str) -> bool:
+        """중복 판정 키로 거래 존재 확인"""
+        return (
+            self.db.query(Transaction.id)
+            .filter(Transaction.dedup_key == dedup_key)
+            .first()
+            is not None
+        )
+
+    def find_existing_keys(self, dedup_keys: Iterable[str], chunk_size: int = 500) -> Set[str]:
+        """
+        이미 저장된 중복 판정 키 조회 (IN 조회를 chunk_size개씩)
+
+        Args:
+            dedup_keys: 확인할 dedup_key들
+
+        Returns:
+            DB에 있는 dedup_key 집합
+        """
+        keys = list(dict.fromkeys(dedup_keys))
+        existing: Set[str] = set()
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            existing.update(
+                key for (key,) in
+                self.db.query(Transaction.dedup_key).filter(Transaction.dedup_key.in_(chunk))
+            )
+        return existing
+
     def update_match(
         self,
         transaction_id: int,
@@ -136,25 +216,3 @@ class TransactionRepository:
             "pending": pending,
             "match_rate": round(matched / total * 100, 1) if total > 0 else 0,
         }
-
-    def exists(
-        self,
-        card_id: int,
-        transaction_date: date,
-        merchant_name: str,
-        amount: int,
-    ) -> bool:
-        """중복 거래 확인"""
-        return (
-            self.db.query(Transaction)
-            .filter(
-                and_(
-                    Transaction.card_id == card_id,
-                    Transaction.transaction_date == transaction_date,
-                    Transaction.merchant_name == merchant_name,
-                    Transaction.amount == amount,
-                )
-            )
-            .first()
-            is not None
-        )
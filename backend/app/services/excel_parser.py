@@ -1,13 +1,20 @@
 """
 Excel 파싱 서비스
-카드사 청구명세서 .xls/.xlsx 파일 파싱
+카드사 청구명세서 .xls/.xlsx 파일 파싱 (HTML 표·탭 구분 텍스트로 저장된 명세서 포함)
 """
-from dataclasses import dataclass
-from typing import List, Optional
+import logging
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterator, List, Optional, Union
 from pathlib import Path
 from datetime import date
+import numpy as np
 import pandas as pd
 
+from app.merchant_key import normalize_merchant
+from app.services.statement_reader import iter_statement, read_statement
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class ParsedTransaction:
@@ -17,6 +24,22 @@ class ParsedTransaction:
     amount: int
     card_number: str  # 끝 4자리
     industry: str
+    merchant_key: str = ""  # 정규화된 가맹점명
+
+
+@dataclass
+class RejectedRow:
+    """파싱에서 제외된 행"""
+    row: int  # DataFrame 행 번호 (0부터, 헤더 제외)
+    reason: str  # card_number / date / merchant / amount
+    value: str  # 문제가 된 원본 값
+
+
+@dataclass
+class ParseReport:
+    """파싱 결과 (거래 + 제외된 행)"""
+    transactions: List[ParsedTransaction] = field(default_factory=list)
+    rejected: List[RejectedRow] = field(default_factory=list)
 
 
 class ExcelParserService:
@@ -31,6 +54,31 @@ class ExcelParserService:
         "industry": "가맹점업종",
     }
 
+    # 헤더명 별칭 (다운로드 화면/카드사마다 헤더명이 조금씩 다름, 앞쪽 별칭 우선)
+    COLUMN_ALIASES = {
+        "card_number": ("카드번호", "이용카드번호", "카드No"),
+        "date": ("승인일자", "승인일", "이용일자", "거래일자"),
+        "merchant": ("가맹점명", "가맹점명/국가명", "이용가맹점", "이용하신가맹점"),
+        "amount": ("거래금액(원화)", "이용금액", "승인금액", "거래금액"),
+        "industry": ("가맹점업종", "업종"),
+    }
+    REQUIRED_COLUMNS = ("card_number", "date", "merchant", "amount")
+
+    # Excel 날짜 일련번호 범위 (1900-01-01 ~ 9999-12-31)
+    EXCEL_SERIAL_RANGE = (1, 2958465)
+
+    # iter_transactions 기본 배치 크기 (거래 건수)
+    STREAM_BATCH_SIZE = 1000
+
+    def __init__(self, reader_backend: Optional[str] = None):
+        """
+        Args:
+            reader_backend: Excel 리더 백엔드 선호 순서 ("calamine", "xlrd,openpyxl" 등).
+                없으면 STATEMENT_READER 환경변수 (기본 auto)
+        """
+        self.reader_backend = reader_backend
+        self.last_report: Optional[ParseReport] = None  # 마지막 파싱의 제외 행 포함 결과
+
     def parse_file(self, file_path: str) -> List[ParsedTransaction]:
         """
         카드사 Excel 파일 파싱
@@ -39,26 +87,16 @@ class ExcelParserService:
             file_path: 파일 경로
 
         Returns:
-            ParsedTransaction 리스트
+            ParsedTransaction 리스트 (제외된 행은 last_report.rejected)
         """
-        transactions = []
         path = Path(file_path)
 
         if not path.exists():
             raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
 
-        # 파일 형식에 따라 엔진 선택
+        # 파일 앞부분 바이트로 형식을 판별해 한 번만 읽기
         df = self._read_excel(file_path)
-
-        for idx, row in df.iterrows():
-            try:
-                tx = self._parse_row(row)
-                if tx:
-                    transactions.append(tx)
-            except Exception as e:
-                print(f"행 {idx} 파싱 오류: {e}")
-
-        return transactions
+        return self._parse_and_report(df, path.name)
 
     def parse_bytes(self, file_bytes: bytes, filename: str) -> List[ParsedTransaction]:
         """
@@ -66,125 +104,239 @@ class ExcelParserService:
 
         Args:
             file_bytes: 파일 바이트
-            filename: 파일명 (확장자 판별용)
+            filename: 파일명 (로그용)
 
         Returns:
             ParsedTransaction 리스트
         """
         import io
 
-        transactions = []
-        ext = Path(filename).suffix.lower()
+        return self.parse_fileobj(io.BytesIO(file_bytes), filename)
 
-        # 바이트를 파일 객체로 변환
-        file_obj = io.BytesIO(file_bytes)
+    def parse_fileobj(self, file_obj: BinaryIO, filename: str) -> List[ParsedTransaction]:
+        """
+        파일 객체 파싱 (업로드 스풀 등 바이트 복사 없이 읽기)
+
+        Args:
+            file_obj: 읽기 가능한 바이너리 파일 객체
+            filename: 파일명 (로그용, 형식은 파일 내용으로 판별)
 
+        Returns:
+            ParsedTransaction 리스트 (제외된 행은 last_report.rejected)
+        """
         try:
-            if ext == ".xls":
-                df = pd.read_excel(file_obj, engine="xlrd")
-            else:
-                df = pd.read_excel(file_obj, engine="openpyxl")
-        except Exception as e:
-            raise ValueError(f"Excel 파일 읽기 오류: {e}")
-
-        for idx, row in df.iterrows():
-            try:
-                tx = self._parse_row(row)
-                if tx:
-                    transactions.append(tx)
-            except Exception as e:
-                print(f"행 {idx} 파싱 오류: {e}")
+            df = self._read(file_obj)
+        except ValueError as e:
+            raise ValueError(f"명세서 파일 읽기 오류: {e}")
+
+        return self._parse_and_report(df, filename)
+
+    def iter_transactions(
+        self,
+        source: Union[str, Path, BinaryIO],
+        filename: Optional[str] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[List[ParsedTransaction]]:
+        """
+        명세서를 스트리밍으로 읽어 검증된 거래를 batch_size건씩 yield
 
-        return transactions
+        파일을 batch_size 행씩 읽어 바로 파싱하므로 전체 DataFrame/거래 리스트를 만들지 않는다.
+        마지막 배치만 batch_size보다 작을 수 있다. 끝까지 소비하면 last_report.rejected에
+        제외 행이 모인다 (last_report.transactions는 비어 있음).
 
-    def _read_excel(self, file_path: str) -> pd.DataFrame:
-        """Excel 파일 읽기"""
-        try:
-            # xlrd로 .xls 파일 시도
-            return pd.read_excel(file_path, engine="xlrd")
-        except Exception:
-            # openpyxl로 .xlsx 파일 시도
-            return pd.read_excel(file_path, engine="openpyxl")
-
-    def _parse_row(self, row: pd.Series) -> Optional[ParsedTransaction]:
-        """단일 행 파싱"""
-        # 카드번호 추출
-        card_number = str(row.get(self.COLUMN_MAP["card_number"], ""))
-        if not card_number or card_number == "nan":
-            return None
-
-        card_last4 = card_number.replace("-", "")[-4:]
-        if len(card_last4) != 4 or not card_last4.isdigit():
-            return None
-
-        # 승인일자 파싱
-        date_raw = row.get(self.COLUMN_MAP["date"], "")
-        parsed_date = self._parse_date(date_raw)
-        if not parsed_date:
-            return None
-
-        # 가맹점명
-        merchant = str(row.get(self.COLUMN_MAP["merchant"], "")).strip()
-        if not merchant or merchant == "nan":
-            return None
-
-        # 거래금액
-        amount = self._parse_amount(row.get(self.COLUMN_MAP["amount"], 0))
-        if amount == 0:
-            return None
-
-        # 가맹점업종 (선택)
-        industry = str(row.get(self.COLUMN_MAP["industry"], "")).strip()
-        if industry == "nan":
-            industry = ""
-
-        return ParsedTransaction(
-            transaction_date=parsed_date,
-            merchant_name=merchant,
-            amount=amount,
-            card_number=card_last4,
-            industry=industry,
+        Args:
+            source: 파일 경로 또는 읽기 가능한 바이너리 파일 객체
+            filename: 파일명 (로그용, 없으면 경로의 파일명)
+            batch_size: 배치당 거래 건수
+
+        Yields:
+            ParsedTransaction 리스트 (입력 행 순서)
+        """
+        if isinstance(source, (str, Path)):
+            if not Path(source).exists():
+                raise FileNotFoundError(f"파일을 찾을 수 없습니다: {source}")
+            filename = filename or Path(source).name
+
+        report = ParseReport()
+        self.last_report = report
+        chunks = iter_statement(
+            source,
+            columns=self.COLUMN_ALIASES,
+            required=self.REQUIRED_COLUMNS,
+            chunk_size=batch_size,
+            backend=self.reader_backend,
         )
 
-    def _parse_date(self, value) -> Optional[date]:
-        """날짜 파싱"""
-        if pd.isna(value):
-            return None
+        pending: List[ParsedTransaction] = []
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            except ValueError as e:
+                raise ValueError(f"명세서 파일 읽기 오류: {e}")
+
+            part = self.parse_frame(chunk)
+            report.rejected.extend(part.rejected)
+            pending.extend(part.transactions)
+            while len(pending) >= batch_size:
+                yield pending[:batch_size]
+                pending = pending[batch_size:]
+
+        if pending:
+            yield pending
+        if report.rejected:
+            logger.info(f"{filename}: {len(report.rejected)}행 제외")
+
+    def _parse_and_report(self, df: pd.DataFrame, filename: str) -> List[ParsedTransaction]:
+        report = self.parse_frame(df)
+        self.last_report = report
+        if report.rejected:
+            logger.info(f"{filename}: {len(report.rejected)}행 제외 (유효 {len(report.transactions)}행)")
+        return report.transactions
 
-        date_str = str(value).strip()
+    def _read_excel(self, file_path: str) -> pd.DataFrame:
+        """명세서 파일 읽기 (xls / xlsx / HTML 표 / 탭·쉼표 구분 텍스트)"""
+        return self._read(file_path)
+
+    def _read(self, source) -> pd.DataFrame:
+        """헤더 행을 별칭으로 찾아 필요한 컬럼만 문자열로 읽기 (컬럼명은 COLUMN_MAP 키)"""
+        return read_statement(
+            source,
+            columns=self.COLUMN_ALIASES,
+            required=self.REQUIRED_COLUMNS,
+            backend=self.reader_backend,
+        )
 
-        # YYYY-MM-DD 형식
-        if len(date_str) >= 10 and "-" in date_str:
-            try:
-                return date.fromisoformat(date_str[:10])
-            except ValueError:
-                pass
+    def parse_frame(self, df: pd.DataFrame) -> ParseReport:
+        """
+        명세서 DataFrame 파싱 (컬럼 단위 벡터 연산)
 
-        # YYYYMMDD 형식
-        if len(date_str) == 8 and date_str.isdigit():
-            try:
-                return date(
-                    int(date_str[:4]),
-                    int(date_str[4:6]),
-                    int(date_str[6:8])
-                )
-            except ValueError:
-                pass
-
-        # pandas Timestamp
-        try:
-            ts = pd.to_datetime(value)
-            return ts.date()
-        except:
-            return None
+        카드번호 끝 4자리, 승인일자(YYYY-MM-DD / YYYYMMDD / Excel 일련번호), 금액 정리를
+        컬럼 전체에 한 번씩 적용하고, 유효한 행만 마스크로 골라 한 번에 ParsedTransaction으로 만든다.
+        유효하지 않은 행은 처음 걸린 사유와 함께 rejected에 남긴다.
 
-    def _parse_amount(self, value) -> int:
-        """금액 파싱"""
-        if pd.isna(value):
-            return 0
+        Args:
+            df: 명세서 DataFrame (컬럼명은 COLUMN_MAP 키 또는 원래 헤더명)
 
-        try:
-            clean = str(value).replace(",", "").replace(" ", "").strip()
-            return int(float(clean))
-        except:
-            return 0
+        Returns:
+            ParseReport
+        """
+        card_raw = self._text(self._column(df, "card_number"))
+        card = card_raw.str.replace("-", "", regex=False).str[-4:]
+        card_ok = (card.str.len() == 4) & card.str.isdigit()
+
+        date_raw = self._column(df, "date")
+        dates = self._parse_dates(date_raw)
+        date_ok = dates.notna()
+
+        merchant = self._text(self._column(df, "merchant"))
+        merchant_ok = merchant != ""
+
+        amount_raw = self._column(df, "amount")
+        amounts = self._parse_amounts(amount_raw)
+        amount_ok = amounts.notna() & (amounts != 0)
+
+        industry = self._text(self._column(df, "industry"))
+
+        valid = card_ok & date_ok & merchant_ok & amount_ok
+
+        # 유효 행 일괄 생성 (정규화 키는 가맹점명별 한 번)
+        merchants = merchant[valid].tolist()
+        keys = {name: normalize_merchant(name) for name in set(merchants)}
+        transactions = [
+            ParsedTransaction(
+                transaction_date=tx_date,
+                merchant_name=name,
+                amount=int(amount),
+                card_number=card_last4,
+                industry=industry_name,
+                merchant_key=keys[name],
+            )
+            for tx_date, name, amount, card_last4, industry_name in zip(
+                dates[valid].dt.date.tolist(),
+                merchants,
+                amounts[valid].tolist(),
+                card[valid].tolist(),
+                industry[valid].tolist(),
+            )
+        ]
+
+        # 제외 행 (검사 순서대로 처음 걸린 사유)
+        rejected = []
+        remaining = ~valid
+        for reason, ok, raw in (
+            ("card_number", card_ok, card_raw),
+            ("date", date_ok, date_raw),
+            ("merchant", merchant_ok, merchant),
+            ("amount", amount_ok, amount_raw),
+        ):
+            hit = remaining & ~ok
+            rejected.extend(
+                RejectedRow(row=int(idx), reason=reason, value="" if pd.isna(value) else str(value))
+                for idx, value in raw[hit].items()
+            )
+            remaining &= ok
+        rejected.sort(key=lambda r: r.row)
+
+        return ParseReport(transactions=transactions, rejected=rejected)
+
+    def _column(self, df: pd.DataFrame, key: str) -> pd.Series:
+        """COLUMN_MAP 컬럼 (키 → 원래 헤더명 순으로 찾고, 없으면 빈 값 컬럼)"""
+        for name in (key, self.COLUMN_MAP[key]):
+            if name in df.columns:
+                return df[name]
+        return pd.Series([""] * len(df), index=df.index, dtype=object)
+
+    @staticmethod
+    def _text(series: pd.Series) -> pd.Series:
+        """문자열 컬럼 (앞뒤 공백 제거, 빈 값/None/NaN은 "")"""
+        # pandas 2.x의 astype(str)은 None/NaN을 "None"/"nan" 문자열로 바꾸므로 먼저 비운다
+        text = series.where(series.notna(), "").astype(str).str.strip()
+        return text.mask(text.isin(["None", "nan"]), "")
+
+    @classmethod
+    def _parse_dates(cls, raw: pd.Series) -> pd.Series:
+        """날짜 컬럼 파싱 (실패는 NaT)"""
+        if pd.api.types.is_datetime64_any_dtype(raw):
+            return raw.dt.normalize()
+
+        text = cls._text(raw)
+        result = pd.Series(pd.NaT, index=raw.index, dtype="datetime64[ns]")
+
+        # YYYY-MM-DD 형식 (YYYY.MM.DD, YYYY/MM/DD 포함)
+        iso = (text.str.len() >= 10) & text.str.match(r"\d{4}[-./]")
+        if iso.any():
+            result[iso] = pd.to_datetime(
+                text[iso].str[:10].str.replace(r"[./]", "-", regex=True), format="%Y-%m-%d", errors="coerce"
+            )
+
+        # YYYYMMDD 형식
+        compact = (text.str.len() == 8) & text.str.isdigit()
+        todo = result.isna() & compact
+        if todo.any():
+            result[todo] = pd.to_datetime(text[todo], format="%Y%m%d", errors="coerce")
+
+        # Excel 날짜 일련번호
+        numeric = pd.to_numeric(raw, errors="coerce")
+        low, high = cls.EXCEL_SERIAL_RANGE
+        todo = result.isna() & ~compact & numeric.between(low, high)
+        if todo.any():
+            result[todo] = pd.to_datetime(numeric[todo], unit="D", origin="1899-12-30").dt.normalize()
+
+        # 그 밖의 형식 (남은 값만 개별 해석)
+        todo = result.isna() & (text != "") & numeric.isna()
+        if todo.any():
+            result[todo] = pd.to_datetime(text[todo], format="mixed", errors="coerce")
+
+        return result
+
+    @classmethod
+    def _parse_amounts(cls, raw: pd.Series) -> pd.Series:
+        """금액 컬럼 파싱 (쉼표·공백 제거, 소수점 이하 버림, 실패는 NaN)"""
+        if pd.api.types.is_numeric_dtype(raw) and not pd.api.types.is_bool_dtype(raw):
+            numeric = raw.astype(float)
+        else:
+            clean = cls._text(raw).str.replace(",", "", regex=False).str.replace(" ", "", regex=False)
+            numeric = pd.to_numeric(clean, errors="coerce")
+        return np.trunc(numeric.where(np.isfinite(numeric)))
@@ -0,0 +1,77 @@
+"""
+로컬 파일시스템 Storage
+Supabase Storage 대신 로컬 디렉토리에 저장 (오프라인 개발/테스트용)
+
+STORAGE_BACKEND=local 로 설정하면 get_storage_service()가 이 구현을 반환한다.
+"""
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Union
+
+from app.services.supabase_storage import SupabaseStorageService
+
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent.parent / "data" / "storage"
+
+
+class LocalStorageService(SupabaseStorageService):
+    """Supabase Storage와 같은 인터페이스의 로컬 디렉토리 저장소"""
+
+    def __init__(self, root: Union[str, Path, None] = None):
+        self.root = Path(root or os.getenv("STORAGE_LOCAL_DIR", DEFAULT_ROOT))
+        self.bucket_name = "local"
+
+    def _resolve(self, path: str) -> Path:
+        target = (self.root / path).resolve()
+        if self.root.resolve() not in target.parents:
+            raise ValueError(f"잘못된 경로입니다: {path}")
+        return target
+
+    def upload_file(
+        self,
+        file_bytes: Union[bytes, str],
+        filename: str,
+        folder: str = "exports",
+        content_type: str = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ) -> dict:
+        """파일 저장 (바이트 또는 로컬 파일 경로)"""
+        safe_filename = self._sanitize_filename(filename)
+        date_folder = datetime.now().strftime("%Y-%m")
+        path = f"{folder}/{date_folder}/{safe_filename}"
+
+        target = self._resolve(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(file_bytes, bytes):
+            target.write_bytes(file_bytes)
+        else:
+            shutil.copyfile(file_bytes, target)
+
+        return {
+            "path": path,
+            "url": self.get_public_url(path),
+            "bucket": self.bucket_name
+        }
+
+    def download_file(self, path: str) -> bytes:
+        """파일 읽기"""
+        return self._resolve(path).read_bytes()
+
+    def list_files(self, folder: str = "exports") -> list:
+        """폴더 내 파일 목록 (Supabase list 응답과 같은 name 키)"""
+        directory = self._resolve(folder)
+        if not directory.is_dir():
+            return []
+        return [{"name": p.name} for p in sorted(directory.iterdir())]
+
+    def delete_file(self, path: str) -> bool:
+        """파일 삭제"""
+        try:
+            self._resolve(path).unlink()
+            return True
+        except Exception:
+            return False
+
+    def get_public_url(self, path: str) -> str:
+        """로컬 파일 URI"""
+        return self._resolve(path).as_uri()
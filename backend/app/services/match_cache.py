@@ -0,0 +1,100 @@
+"""
+매칭 결과 LRU 캐시
+매달 반복되는 가맹점(하이패스, 쿠팡, 주유소 등)의 매칭 결과를 프로세스 메모리에 보관
+"""
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+MatchKey = Tuple[str, Optional[int]]           # (가맹점명, 카드 ID)
+MatchResult = Tuple[Optional[str], Optional[int], str]  # (사용내역, 패턴 ID, 결정 단계) - 미매칭은 (None, None, "none")
+
+MISSING = object()
+
+
+class MatchCache:
+    """
+    (가맹점명, 카드 ID) → 매칭 결과 LRU 캐시
+
+    패턴 집합 세대(generation)가 바뀌면 이전 세대의 항목은 모두 버린다.
+    세대는 패턴 인덱스 버전을 사용하므로 패턴 변경 직후 오래된 결과가 나가지 않는다.
+    (다른 워커에서 바뀐 패턴은 인덱스의 DB 지문 확인 주기 안에 반영)
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[MatchKey, MatchResult]" = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync_generation(self, generation: int) -> bool:
+        """세대 맞추기 (락 보유 상태에서 호출). 오래된 세대면 False"""
+        if generation < self._generation:
+            return False
+        if generation > self._generation:
+            self._data.clear()
+            self._generation = generation
+            self.invalidations += 1
+        return True
+
+    def get(self, key: MatchKey, generation: int):
+        """
+        캐시 조회
+
+        Returns:
+            캐시된 (사용내역, 패턴ID, 결정 단계). 없으면 MISSING
+        """
+        with self._lock:
+            if self._sync_generation(generation) and key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key: MatchKey, value: MatchResult, generation: int) -> None:
+        """결과 저장 (계산 도중 세대가 바뀌었으면 저장하지 않음)"""
+        with self._lock:
+            if not self._sync_generation(generation):
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """전체 비우기"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """캐시 통계"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "generation": self._generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# 싱글톤 인스턴스
+_match_cache: Optional[MatchCache] = None
+
+
+def get_match_cache() -> MatchCache:
+    """매칭 캐시 인스턴스 반환"""
+    global _match_cache
+    if _match_cache is None:
+        _match_cache = MatchCache()
+    return _match_cache
@@ -2,11 +2,22 @@
 매칭 서비스
 가맹점명 → 사용내역 자동 매칭
 """
-from typing import Optional, Tuple
+import logging
+import re
+from typing import Optional, Tuple, List, Iterable, Iterator
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 
 from app.repositories.pattern_repo import PatternRepository
+from app.repositories.pattern_index import get_pattern_index, required_literal
+from app.repositories.suggest_index import get_suggest_index
+from app.repositories.match_metrics import get_match_metrics
+from app.services.use_count_buffer import UseCountBuffer
+from app.services.match_cache import get_match_cache, MISSING
 from app.models.pattern import Pattern, MatchType
+from app.merchant_key import normalize_merchant
+
+logger = logging.getLogger(__name__)
 
 
 class MatchingService:
@@ -15,6 +26,7 @@ class MatchingService:
     def __init__(self, db: Session):
         self.db = db
         self.pattern_repo = PatternRepository(db)
+        self.use_counts = UseCountBuffer()
 
     def find_match(
         self,
@@ -24,10 +36,11 @@ class MatchingService:
         """
         가맹점명으로 사용내역 찾기
 
-        3단계 매칭 로직:
+        4단계 매칭 로직:
         1. 카드 전용 정확 매칭
         2. 공통 정확 매칭
         3. 포함(CONTAINS) 매칭
+        4. 정규식(REGEX) 매칭
 
         Args:
             merchant_name: 가맹점명
@@ -36,14 +49,126 @@ class MatchingService:
         Returns:
             (사용내역, 패턴ID) 튜플. 매칭 없으면 (None, None)
         """
-        pattern = self.pattern_repo.find_matching_pattern(merchant_name, card_id)
+        return self.match_many([(merchant_name, card_id)])[0]
+
+    def match_many(
+        self,
+        items: List[Tuple[str, Optional[int]]],
+        record_use: bool = True,
+    ) -> List[Tuple[Optional[str], Optional[int]]]:
+        """
+        여러 가맹점을 한 번에 매칭
+
+        명세서에는 같은 가맹점이 반복되므로 (가맹점명, 카드 ID) 조합별로
+        한 번만 판정하고 결과를 입력 순서대로 돌려준다.
+        판정 결과(미매칭 포함)는 프로세스 전역 LRU 캐시에 남겨
+        다음 업로드에서 재사용한다.
+
+        Args:
+            items: [(가맹점명, 카드 ID), ...]
+            record_use: 매칭된 행마다 패턴 사용 횟수를 누적할지 여부
+
+        Returns:
+            입력 순서와 같은 [(사용내역, 패턴ID), ...]. 매칭 없으면 (None, None)
+        """
+        resolved = self.resolve_many(items)
+        self.record_match_results([name for name, _ in items], [tier for *_, tier in resolved])
+        results = [(usage, pattern_id) for usage, pattern_id, _ in resolved]
+        if record_use:
+            self.record_uses(pattern_id for _, pattern_id in results)
+        return results
+
+    def resolve_many(
+        self,
+        items: List[Tuple[str, Optional[int]]],
+    ) -> List[Tuple[Optional[str], Optional[int], str]]:
+        """
+        여러 가맹점의 매칭 결과와 결정 단계 (캐시 사용, 매칭 지표는 기록하지 않음)
+
+        저장 전에 매칭하고 실제로 저장된 행만 record_match_results로 기록할 때 사용한다.
+
+        Args:
+            items: [(가맹점명, 카드 ID), ...]
+
+        Returns:
+            입력 순서와 같은 [(사용내역, 패턴ID, 매칭 단계), ...]. 매칭 없으면 (None, None, "none")
+        """
+        cache = get_match_cache()
+        generation = get_pattern_index().current_version(self.db)
+
+        resolved = {}
+        for key in dict.fromkeys(items):
+            cached = cache.get(key, generation)
+            if cached is not MISSING:
+                resolved[key] = cached
+
+        missing = [key for key in dict.fromkeys(items) if key not in resolved]
+        if missing:
+            entries = self.pattern_repo.find_matching_entries(missing)
+            for key, (p, tier) in zip(missing, entries):
+                # 캐시 적중 행도 단계별로 집계되도록 결정 단계를 함께 보관
+                value = (p.usage_description, p.id, tier) if p else (None, None, tier)
+                resolved[key] = value
+                cache.put(key, value, generation)
+
+        return [resolved[key] for key in items]
+
+    @staticmethod
+    def record_match_results(merchant_names: List[str], tiers: List[str]) -> None:
+        """
+        행 단위 매칭 결과를 매칭 지표에 기록
+
+        Args:
+            merchant_names: 가맹점명 리스트
+            tiers: 같은 순서의 매칭 단계 리스트 (미매칭은 "none")
+        """
+        get_match_metrics().record_results(
+            tiers=tiers,
+            unmatched_names=(name for name, tier in zip(merchant_names, tiers) if tier == "none"),
+        )
+
+    def preview_many(
+        self,
+        items: List[Tuple[str, Optional[int]]],
+    ) -> List[Tuple[Optional[str], Optional[int], str]]:
+        """
+        여러 가맹점의 매칭 결과 미리보기 (읽기 전용)
+
+        match_many와 같은 인덱스로 판정하되 캐시·매칭 지표·사용 횟수는 건드리지 않는다.
+
+        Args:
+            items: [(가맹점명, 카드 ID), ...]
+
+        Returns:
+            입력 순서와 같은 [(사용내역, 패턴ID, 매칭 단계), ...]
+            매칭 단계: card_exact, card_key, common_exact, common_key, contains, regex, none
+        """
+        return [
+            (p.usage_description, p.id, tier) if p else (None, None, tier)
+            for p, tier in self.pattern_repo.explain_matching_entries(items)
+        ]
+
+    def record_uses(self, pattern_ids: Iterable[Optional[int]]) -> None:
+        """매칭된 패턴 ID들의 사용 횟수 누적 (None은 무시)"""
+        threshold_reached = False
+        for pattern_id in pattern_ids:
+            if pattern_id is not None:
+                threshold_reached = self.use_counts.add(pattern_id) or threshold_reached
+        if threshold_reached:
+            self.flush_use_counts()
+
+    def flush_use_counts(self) -> int:
+        """
+        누적된 패턴 사용 횟수를 DB에 반영
 
-        if pattern:
-            # 사용 횟수 증가
-            self.pattern_repo.increment_use_count(pattern.id)
-            return pattern.usage_description, pattern.id
+        업로드/재매칭 등 작업 단위가 끝날 때 호출하고, 커밋은 호출자가 한다.
+        누적분이 flush_threshold를 넘으면 record_uses에서 자동으로 호출된다
+        (이때도 커밋하지 않으므로 진행 중인 작업 단위와 함께 커밋되거나 롤백된다).
 
-        return None, None
+        Returns:
+            반영된 사용 횟수 합계
+        """
+        return self.use_counts.flush(self.db)
 
     def create_pattern_from_manual(
         self,
@@ -73,64 +198,200 @@ class MatchingService:
             created_by=created_by,
         )
 
-    def get_match_stats(self) -> dict:
-        """매칭 통계 조회"""
-        all_patterns = self.pattern_repo.get_all()
+    def apply_pattern(self, pattern: Pattern) -> int:
+        """
+        새로 만들거나 수정한 패턴을 미매칭 거래에 바로 적용
+
+        패턴이 영향을 줄 수 있는 미매칭 거래만 골라 UPDATE 한 번으로 반영한다.
+        - EXACT: merchant_name / merchant_key 인덱스 조회 (카드 전용이면 card_id 조건 추가)
+        - CONTAINS: LIKE '%가맹점명%'
+        - REGEX: 필수 리터럴 LIKE로 후보를 좁힌 뒤 정규식 판정, ID 목록으로 UPDATE
+          (컴파일되지 않는 정규식이면 적용하지 않음)
 
-        total = len(all_patterns)
-        by_type = {}
-        by_card = {}
+        미매칭 거래는 기존 패턴에 걸리지 않은 거래이므로
+        이 패턴이 매칭되면 그대로 최우선 결과가 된다.
+
+        Args:
+            pattern: 적용할 패턴
+
+        Returns:
+            매칭된 거래 수
+        """
+        from app.models.transaction import Transaction, MatchStatus
 
-        for p in all_patterns:
-            # 타입별 분류
-            match_type = p.match_type
-            by_type[match_type] = by_type.get(match_type, 0) + 1
+        conditions = [
+            (Transaction.usage_description.is_(None)) |
+            (Transaction.usage_description == "")
+        ]
+        if pattern.card_id is not None:
+            conditions.append(Transaction.card_id == pattern.card_id)
+
+        if pattern.match_type == MatchType.EXACT.value:
+            merchant_key = pattern.merchant_key or normalize_merchant(pattern.merchant_name)
+            conditions.append(
+                (Transaction.merchant_name == pattern.merchant_name) |
+                (Transaction.merchant_key == merchant_key)
+            )
+        elif pattern.match_type == MatchType.CONTAINS.value:
+            conditions.append(
+                Transaction.merchant_name.contains(pattern.merchant_name, autoescape=True)
+            )
+        elif pattern.match_type == MatchType.REGEX.value:
+            try:
+                regex = re.compile(pattern.merchant_name)
+            except re.error as e:
+                # 검증 이전에 저장된 패턴 등: 매칭 인덱스와 같이 건너뜀
+                logger.warning(f"정규식 패턴 {pattern.id} 컴파일 실패 (건너뜀): {e}")
+                return 0
+            literal = required_literal(regex)
+            query = self.db.query(Transaction.id, Transaction.merchant_name).filter(*conditions)
+            if literal:
+                query = query.filter(Transaction.merchant_name.contains(literal, autoescape=True))
+            ids = [row.id for row in query if regex.search(row.merchant_name)]
+            if not ids:
+                return 0
+            conditions = [Transaction.id.in_(ids)]
+        else:
+            return 0
+
+        result = self.db.execute(
+            update(Transaction)
+            .where(*conditions)
+            .values(
+                usage_description=pattern.usage_description,
+                matched_pattern_id=pattern.id,
+                match_status=MatchStatus.AUTO.value,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        matched = result.rowcount
+        if matched:
+            self.use_counts.add(pattern.id, matched)
+        self.flush_use_counts()
+        self.db.commit()
+        return matched
+
+    def get_match_stats(self, top_n: int = 20) -> dict:
+        """
+        매칭 통계 조회
+
+        패턴 수는 GROUP BY로 집계하고, 단계별 적중/지연 시간과
+        자주 미매칭되는 가맹점은 프로세스 내 계측값을 함께 돌려준다.
+
+        Args:
+            top_n: 미매칭 가맹점 상위 개수
+
+        Returns:
+            패턴 수, 매칭 계측, 캐시 통계
+        """
+        by_type = {
+            match_type: count
+            for match_type, count in self.db.query(Pattern.match_type, func.count(Pattern.id))
+            .group_by(Pattern.match_type)
+        }
 
-            # 카드별 분류
-            card_key = "common" if p.card_id is None else f"card_{p.card_id}"
-            by_card[card_key] = by_card.get(card_key, 0) + 1
+        by_card = {}
+        for card_id, count in self.db.query(Pattern.card_id, func.count(Pattern.id)).group_by(Pattern.card_id):
+            card_key = "common" if card_id is None else f"card_{card_id}"
+            by_card[card_key] = count
 
         return {
-            "total_patterns": total,
+            "total_patterns": sum(by_type.values()),
             "by_type": by_type,
             "by_card": by_card,
+            "matching": get_match_metrics().stats(top_n),
+            "cache": get_match_cache().stats(),
         }
 
-    def batch_rematch(self, card_id: Optional[int] = None) -> dict:
+    def batch_rematch(
+        self,
+        card_id: Optional[int] = None,
+        chunk_size: int = 500,
+    ) -> dict:
         """
         미매칭 거래에 대해 재매칭 시도
 
         Args:
             card_id: 특정 카드만 재매칭 (None이면 전체)
+            chunk_size: 청크당 처리 건수
 
         Returns:
             재매칭 통계
         """
-        from app.models.transaction import Transaction, MatchStatus
+        stats = {}
+        for stats in self.iter_rematch(card_id, chunk_size):
+            pass
+        return stats
 
-        query = self.db.query(Transaction).filter(
-            (Transaction.usage_description.is_(None)) |
-            (Transaction.usage_description == "")
-        )
+    def iter_rematch(
+        self,
+        card_id: Optional[int] = None,
+        chunk_size: int = 500,
+    ) -> Iterator[dict]:
+        """
+        미매칭 거래를 청크 단위로 재매칭
 
-        if card_id:
-            query = query.filter(Transaction.card_id == card_id)
+        ID 기준 키셋 페이지네이션으로 미매칭 거래를 chunk_size씩 읽고,
+        청크마다 일괄 매칭 → 기본키 기준 일괄 UPDATE → 커밋한다.
+        메모리 사용량과 트랜잭션 길이가 청크 크기로 제한된다.
 
-        pending = query.all()
-        stats = {"total": len(pending), "matched": 0, "failed": 0}
+        Args:
+            card_id: 특정 카드만 재매칭 (None이면 전체)
+            chunk_size: 청크당 처리 건수
 
-        for tx in pending:
-            usage, pattern_id = self.find_match(tx.merchant_name, tx.card_id)
-            if usage:
-                tx.usage_description = usage
-                tx.matched_pattern_id = pattern_id
-                tx.match_status = MatchStatus.AUTO.value
-                stats["matched"] += 1
-            else:
-                stats["failed"] += 1
+        Yields:
+            시작 시점과 청크 처리 후마다 누적 통계
+            {total, processed, matched, failed, chunks}
+        """
+        from app.models.transaction import Transaction, MatchStatus
 
-        self.db.commit()
-        return stats
+        pending_filter = [
+            (Transaction.usage_description.is_(None)) |
+            (Transaction.usage_description == "")
+        ]
+        if card_id:
+            pending_filter.append(Transaction.card_id == card_id)
+
+        total = self.db.query(func.count(Transaction.id)).filter(*pending_filter).scalar()
+        stats = {"total": total, "processed": 0, "matched": 0, "failed": 0, "chunks": 0}
+        yield dict(stats)
+
+        last_id = 0
+        while True:
+            rows = (
+                self.db.query(Transaction.id, Transaction.merchant_name, Transaction.card_id)
+                .filter(*pending_filter, Transaction.id > last_id)
+                .order_by(Transaction.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            results = self.match_many([(row.merchant_name, row.card_id) for row in rows])
+            mappings = [
+                {
+                    "id": row.id,
+                    "usage_description": usage,
+                    "matched_pattern_id": pattern_id,
+                    "match_status": MatchStatus.AUTO.value,
+                }
+                for row, (usage, pattern_id) in zip(rows, results)
+                if usage
+            ]
+            if mappings:
+                self.db.execute(update(Transaction), mappings)
+
+            # 사용 횟수도 같은 청크에서 반영 후 커밋
+            self.flush_use_counts()
+            self.db.commit()
+
+            stats["processed"] += len(rows)
+            stats["matched"] += len(mappings)
+            stats["failed"] += len(rows) - len(mappings)
+            stats["chunks"] += 1
+            yield dict(stats)
 
     def get_card_patterns(self, card_id: int) -> list:
         """카드별 패턴 목록 (공통 포함)"""
@@ -149,46 +410,13 @@ class MatchingService:
         """
         가맹점명으로 유사 패턴 제안
 
+        bigram 역색인으로 후보를 좁힌 뒤 점수를 매긴다.
+
         Args:
             merchant_name: 가맹점명
             card_id: 카드 ID
 
         Returns:
-            유사 패턴 목록
+            유사 패턴 목록 (상위 5개)
         """
-        from app.models.pattern import Pattern
-
-        # 가맹점명 일부가 포함된 패턴 검색
-        query = self.db.query(Pattern)
-        if card_id:
-            query = query.filter(
-                (Pattern.card_id == card_id) | (Pattern.card_id.is_(None))
-            )
-
-        all_patterns = query.all()
-        suggestions = []
-
-        for p in all_patterns:
-            # 부분 매칭 점수 계산
-            score = 0
-            if p.merchant_name == merchant_name:
-                score = 100
-            elif p.merchant_name in merchant_name:
-                score = 80
-            elif merchant_name in p.merchant_name:
-                score = 60
-            elif any(word in merchant_name for word in p.merchant_name.split()):
-                score = 40
-
-            if score > 0:
-                suggestions.append({
-                    "pattern_id": p.id,
-                    "merchant_name": p.merchant_name,
-                    "usage_description": p.usage_description,
-                    "score": score,
-                    "is_card_specific": p.card_id == card_id,
-                })
-
-        # 점수순 정렬
-        suggestions.sort(key=lambda x: (-x["score"], -x.get("is_card_specific", False)))
-        return suggestions[:5]  # 상위 5개
+        return get_suggest_index().suggest(self.db, merchant_name, card_id, limit=5)
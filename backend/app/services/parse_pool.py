@@ -0,0 +1,110 @@
+"""
+명세서 병렬 파싱
+여러 파일을 한 번에 올리면 Excel 파싱(CPU 작업)을 프로세스 풀에서 파일별로 동시에 실행
+"""
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+from app.services.excel_parser import ExcelParserService, ParsedTransaction
+
+logger = logging.getLogger(__name__)
+
+ParseSource = Union[bytes, str]  # 파일 바이트 또는 로컬 파일 경로
+ParseResult = Tuple[Optional[List[ParsedTransaction]], Optional[str]]  # (거래, 오류 메시지)
+
+
+def parse_source(source: ParseSource, filename: str) -> List[ParsedTransaction]:
+    """
+    파일 하나 파싱 (워커 프로세스에서 실행되므로 모듈 최상위 함수)
+
+    Args:
+        source: 파일 바이트 또는 로컬 파일 경로
+        filename: 원본 파일명 (확장자 판별용)
+
+    Returns:
+        ParsedTransaction 리스트
+    """
+    parser = ExcelParserService()
+    if isinstance(source, bytes):
+        return parser.parse_fileobj(io.BytesIO(source), filename)
+    with open(source, "rb") as file_obj:
+        return parser.parse_fileobj(file_obj, filename)
+
+
+class ParsePool:
+    """
+    파싱 프로세스 풀
+
+    파일이 하나뿐이면 프로세스를 거치지 않고 현재 스레드에서 파싱한다.
+    워커는 spawn으로 띄워 서버 스레드/DB 커넥션 상태를 물려받지 않는다.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(
+            os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1)))
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def parse_many(self, sources: Sequence[Tuple[ParseSource, str]]) -> List[ParseResult]:
+        """
+        여러 파일 파싱 (입력 순서대로 결과 반환)
+
+        한 파일의 파싱 실패는 해당 파일의 오류 메시지로만 남기고 나머지는 계속 처리한다.
+
+        Args:
+            sources: [(파일 바이트 또는 경로, 파일명), ...]
+
+        Returns:
+            [(ParsedTransaction 리스트 또는 None, 오류 메시지 또는 None), ...]
+        """
+        if len(sources) <= 1 or self.max_workers <= 1:
+            return [self._parse_inline(source, filename) for source, filename in sources]
+
+        executor = self._get_executor()
+        futures = [executor.submit(parse_source, source, filename) for source, filename in sources]
+        results: List[ParseResult] = []
+        for future, (_, filename) in zip(futures, sources):
+            try:
+                results.append((future.result(), None))
+            except Exception as e:
+                logger.warning(f"파싱 실패 ({filename}): {e}")
+                results.append((None, str(e)))
+        return results
+
+    @staticmethod
+    def _parse_inline(source: ParseSource, filename: str) -> ParseResult:
+        try:
+            return parse_source(source, filename), None
+        except Exception as e:
+            logger.warning(f"파싱 실패 ({filename}): {e}")
+            return None, str(e)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """워커 프로세스 종료"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# 싱글톤 인스턴스
+_parse_pool: Optional[ParsePool] = None
+
+
+def get_parse_pool() -> ParsePool:
+    """파싱 프로세스 풀 인스턴스 반환"""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ParsePool()
+    return _parse_pool
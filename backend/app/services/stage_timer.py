@@ -0,0 +1,68 @@
+"""
+업로드 단계별 소요 시간 측정
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# 업로드 처리 단계 (응답/저장 시 이 순서로 정렬)
+STAGES = ("parse", "dedup", "match", "insert", "bookkeeping", "storage")
+
+
+class StageTimer:
+    """
+    단계별 monotonic 타이머
+
+    같은 단계를 여러 번 측정하면 누적한다 (여러 파일 업로드 등).
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """with timer.stage("parse"): ... 구간 측정"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stages[name] = self._stages.get(name, 0.0) + (time.perf_counter() - started)
+
+    @property
+    def total_seconds(self) -> float:
+        """타이머 생성 이후 경과 시간 (초)"""
+        return time.perf_counter() - self._started
+
+    def to_dict(self, rows: Optional[int] = None) -> dict:
+        """
+        측정 결과
+
+        Args:
+            rows: 처리한 행 수 (rows_per_sec 계산용)
+
+        Returns:
+            {"stages_ms": {단계: ms}, "total_ms", "rows", "rows_per_sec"}
+        """
+        order = {name: i for i, name in enumerate(STAGES)}
+        stages_ms = {
+            name: round(seconds * 1000, 2)
+            for name, seconds in sorted(self._stages.items(), key=lambda x: order.get(x[0], len(order)))
+        }
+        total = self.total_seconds
+        return {
+            "stages_ms": stages_ms,
+            "total_ms": round(total * 1000, 2),
+            "rows": rows,
+            "rows_per_sec": round(rows / total, 1) if rows and total > 0 else None,
+        }
+
+
+@contextmanager
+def timed(timer: Optional[StageTimer], name: str) -> Iterator[None]:
+    """타이머가 없으면 측정 없이 실행"""
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
@@ -0,0 +1,624 @@
+"""
+명세서 파일 형식 판별 및 읽기
+확장자 대신 파일 앞부분 바이트(매직 바이트)로 형식을 판별해 맞는 리더로 한 번만 읽는다.
+카드사 ".xls" 다운로드 중 실제로는 HTML 표나 탭 구분 텍스트인 파일도 그대로 처리한다.
+Excel 리더 백엔드(calamine / xlrd / openpyxl)는 STATEMENT_READER 환경변수로 고른다.
+"""
+import enum
+import functools
+import importlib.util
+import io
+import itertools
+import math
+import os
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # .xls (OLE2 Compound File)
+ZIP_MAGIC = b"PK\x03\x04"  # .xlsx (OOXML)
+SNIFF_BYTES = 8192
+HEADER_SCAN_ROWS = 30  # 헤더 행을 찾을 때 살펴볼 앞쪽 행 수
+STREAM_CHUNK_ROWS = 1000  # 스트리밍 읽기 기본 청크 행 수
+
+READER_ENV = "STATEMENT_READER"  # "auto" 또는 "calamine,openpyxl" 같은 선호 순서
+
+StatementSource = Union[str, Path, BinaryIO]
+ColumnAliases = Mapping[str, Sequence[str]]  # {컬럼 키: (헤더명 별칭, ...)}
+SheetSelector = Union[Sequence[str], Callable[[str], bool], None]  # 시트명 목록 또는 시트명 필터
+
+
+class StatementFormat(str, enum.Enum):
+    """명세서 파일 형식"""
+    XLS = "xls"    # Excel 97-2003
+    XLSX = "xlsx"  # Excel 2007+
+    HTML = "html"  # HTML 표로 저장된 ".xls"
+    TSV = "tsv"    # 탭 구분 텍스트
+    CSV = "csv"    # 쉼표 구분 텍스트
+
+
+@dataclass(frozen=True)
+class ReaderBackend:
+    """Excel 리더 백엔드 (pandas read_excel 엔진)"""
+    name: str                              # pandas engine 이름
+    module: str                            # 설치 여부 확인용 모듈
+    formats: Tuple[StatementFormat, ...]   # 읽을 수 있는 형식
+
+    @property
+    def available(self) -> bool:
+        return _installed(self.module)
+
+
+READER_BACKENDS: Dict[str, ReaderBackend] = {
+    "calamine": ReaderBackend("calamine", "python_calamine", (StatementFormat.XLS, StatementFormat.XLSX)),
+    "xlrd": ReaderBackend("xlrd", "xlrd", (StatementFormat.XLS,)),
+    "openpyxl": ReaderBackend("openpyxl", "openpyxl", (StatementFormat.XLSX,)),
+}
+
+# auto 선택 순서 (형식별, 설치된 첫 백엔드 사용)
+# calamine은 카드사 .xls(codepage 1252로 선언하고 문자열은 UTF-16으로 저장)의 한글을
+# 깨뜨리므로 xls는 xlrd를 우선하고, xlsx는 openpyxl보다 10배가량 빠른 calamine을 우선한다.
+AUTO_READER_ORDER: Dict[StatementFormat, Tuple[str, ...]] = {
+    StatementFormat.XLS: ("xlrd", "calamine"),
+    StatementFormat.XLSX: ("calamine", "openpyxl"),
+}
+
+# 스트리밍 읽기(iter_statement)의 auto 순서
+# calamine은 시트 전체를 한 번에 올리므로 xlsx는 행 단위로 읽는 openpyxl read_only 모드를 우선한다.
+STREAM_READER_ORDER: Dict[StatementFormat, Tuple[str, ...]] = {
+    StatementFormat.XLS: ("xlrd", "calamine"),
+    StatementFormat.XLSX: ("openpyxl", "calamine"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def reader_order(
+    fmt: StatementFormat,
+    preference: Optional[str] = None,
+    auto: Mapping[StatementFormat, Sequence[str]] = AUTO_READER_ORDER,
+) -> List[str]:
+    """
+    형식별 리더 백엔드 후보 순서
+
+    선호 목록을 앞에 두고 auto 순서를 뒤에 붙여, 선호 백엔드가 없거나
+    해당 형식을 못 읽으면 기존 엔진으로 넘어간다.
+
+    Args:
+        fmt: 파일 형식
+        preference: "auto" 또는 쉼표 구분 백엔드 이름. 없으면 STATEMENT_READER 환경변수 (기본 auto)
+        auto: 형식별 auto 순서
+
+    Returns:
+        백엔드 이름 리스트
+
+    Raises:
+        ValueError: 알 수 없는 백엔드 이름
+    """
+    value = (preference or os.getenv(READER_ENV) or "auto").strip().lower()
+    names = [] if value == "auto" else [n.strip() for n in value.split(",") if n.strip()]
+    unknown = [n for n in names if n not in READER_BACKENDS]
+    if unknown:
+        raise ValueError(
+            f"알 수 없는 리더 백엔드: {', '.join(unknown)} (사용 가능: auto, {', '.join(READER_BACKENDS)})"
+        )
+
+    order = []
+    for name in names + list(auto.get(fmt, ())):
+        if name not in order and fmt in READER_BACKENDS[name].formats:
+            order.append(name)
+    return order
+
+
+def select_engine(
+    fmt: StatementFormat,
+    preference: Optional[str] = None,
+    auto: Mapping[StatementFormat, Sequence[str]] = AUTO_READER_ORDER,
+) -> str:
+    """
+    설치된 백엔드 중 우선순위가 가장 높은 pandas 엔진 이름
+
+    Raises:
+        ValueError: 해당 형식을 읽을 백엔드가 설치되어 있지 않음
+    """
+    for name in reader_order(fmt, preference, auto):
+        if READER_BACKENDS[name].available:
+            return READER_BACKENDS[name].name
+    raise ValueError(f"{fmt.value} 파일을 읽을 리더가 설치되어 있지 않습니다")
+
+
+def sniff_format(head: bytes) -> StatementFormat:
+    """
+    파일 앞부분 바이트로 형식 판별
+
+    Args:
+        head: 파일 앞부분 (SNIFF_BYTES 정도)
+
+    Returns:
+        StatementFormat
+
+    Raises:
+        ValueError: 지원하지 않는 형식
+    """
+    if head.startswith(OLE2_MAGIC):
+        return StatementFormat.XLS
+    if head.startswith(ZIP_MAGIC):
+        return StatementFormat.XLSX
+
+    text = decode_text(head, strict=False).lstrip("\ufeff \t\r\n").lower()
+    if text.startswith("<") and re.search(r"<(!doctype html|html|table|meta|body)", text[:2048]):
+        return StatementFormat.HTML
+    if "\x00" not in text:
+        first_line = text.split("\n", 1)[0]
+        if "\t" in first_line:
+            return StatementFormat.TSV
+        if "," in first_line:
+            return StatementFormat.CSV
+
+    raise ValueError("지원하지 않는 파일 형식입니다. Excel(.xls/.xlsx), HTML 표, 탭/쉼표 구분 텍스트만 읽을 수 있습니다.")
+
+
+def decode_text(data: bytes, strict: bool = True) -> str:
+    """
+    텍스트 파일 디코딩 (BOM → HTML meta charset → UTF-8 → CP949 순)
+
+    Args:
+        data: 파일 바이트
+        strict: False면 잘린 앞부분처럼 끝이 깨진 바이트도 허용
+    """
+    errors = "strict" if strict else "ignore"
+    if data.startswith(b"\xef\xbb\xbf"):
+        return data[3:].decode("utf-8", errors)
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16", errors)
+
+    charset = re.search(rb"charset=[\"']?([\w-]+)", data[:SNIFF_BYTES], re.IGNORECASE)
+    candidates = [charset.group(1).decode("ascii")] if charset else []
+    candidates += ["utf-8", "cp949"]
+    for encoding in candidates:
+        try:
+            return data.decode(encoding, errors)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return data.decode("cp949", "replace")
+
+
+class _HtmlTableParser(HTMLParser):
+    """HTML 문서의 <table>들을 셀 문자열 행 리스트로 수집 (중첩 표는 바깥 표에 포함하지 않음)"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables: List[List[List[str]]] = []
+        self._stack: List[List[List[str]]] = []
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self._stack.append([])
+        elif not self._stack:
+            return
+        elif tag == "tr":
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+        elif tag == "br" and self._cell is not None:
+            self._cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag == "table" and self._stack:
+            self.tables.append(self._stack.pop())
+        elif tag in ("td", "th") and self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None and self._stack:
+            self._stack[-1].append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def _html_rows(text: str) -> List[List[str]]:
+    """가장 큰 HTML 표의 행들 (셀은 문자열)"""
+    parser = _HtmlTableParser()
+    parser.feed(text)
+    parser.close()
+    rows = max(parser.tables, key=len, default=[])
+    if not rows:
+        raise ValueError("HTML 파일에서 표를 찾을 수 없습니다")
+    return rows
+
+
+def _rows_to_frame(header: List[str], body: List[List[str]]) -> pd.DataFrame:
+    """헤더 + 본문 행 → DataFrame (길이가 다른 행은 빈 문자열로 채움, 모든 값은 문자열)"""
+    width = max(len(header), max((len(r) for r in body), default=0))
+    columns = header + [f"Unnamed: {i}" for i in range(len(header), width)]
+    body = [r + [""] * (width - len(r)) for r in body]
+    return pd.DataFrame(body, columns=columns, dtype=object)
+
+
+def _normalize_header(value) -> str:
+    """헤더 비교용 (공백 제거, 소문자)"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return "".join(str(value).split()).lower()
+
+
+def find_header(
+    rows: Sequence[Sequence],
+    columns: ColumnAliases,
+    required: Sequence[str] = (),
+) -> Tuple[int, Dict[str, str]]:
+    """
+    별칭 표로 헤더 행과 컬럼별 실제 헤더명 찾기
+
+    앞쪽 행 중 별칭과 일치하는 셀이 가장 많은 행을 헤더로 본다 (표 위 제목/안내 행 건너뜀).
+    한 컬럼에 여러 별칭이 있으면 별칭 순서가 앞선 것을 쓴다.
+
+    Args:
+        rows: 앞쪽 행들 (셀 값 리스트)
+        columns: {컬럼 키: (헤더명 별칭, ...)}
+        required: 반드시 있어야 하는 컬럼 키
+
+    Returns:
+        (헤더 행 번호, {컬럼 키: 실제 헤더명})
+
+    Raises:
+        ValueError: 필수 컬럼이 있는 헤더 행이 없음
+    """
+    best_index, best = -1, {}
+    for index, row in enumerate(rows[:HEADER_SCAN_ROWS]):
+        cells = {}
+        for cell in row:
+            cells.setdefault(_normalize_header(cell), str(cell))
+        found = {}
+        for key, aliases in columns.items():
+            for alias in aliases:
+                name = cells.get(_normalize_header(alias))
+                if name is not None:
+                    found[key] = name
+                    break
+        if len(found) > len(best):
+            best_index, best = index, found
+
+    missing = [key for key in required if key not in best]
+    if best_index < 0 or missing:
+        names = ", ".join(columns[key][0] for key in (missing or required))
+        raise ValueError(f"명세서 헤더를 찾을 수 없습니다 (필요한 컬럼: {names})")
+    return best_index, best
+
+
+def _select(df: pd.DataFrame, names: Dict[str, str]) -> pd.DataFrame:
+    """찾은 컬럼만 남기고 컬럼 키로 이름 변경"""
+    return df[list(names.values())].set_axis(list(names.keys()), axis=1)
+
+
+def _text_rows(text: str, sep: str) -> List[List[str]]:
+    return [line.split(sep) for line in text.splitlines()[:HEADER_SCAN_ROWS]]
+
+
+def _open(source: StatementSource):
+    if isinstance(source, (str, Path)):
+        return open(source, "rb"), True
+    return source, False
+
+
+def _sniff(file_obj: BinaryIO) -> StatementFormat:
+    """파일 위치를 옮기지 않고 형식 판별"""
+    start = file_obj.tell()
+    head = file_obj.read(SNIFF_BYTES)
+    file_obj.seek(start)
+    return sniff_format(head)
+
+
+def read_statement(
+    source: StatementSource,
+    columns: Optional[ColumnAliases] = None,
+    required: Sequence[str] = (),
+    backend: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    명세서 파일을 형식에 맞는 리더로 한 번만 읽기
+
+    columns를 주면 별칭 표로 헤더 행을 찾고, 필요한 컬럼만(usecols) 문자열로(dtype=str)
+    읽어 타입 추론을 건너뛴다. 결과 컬럼명은 컬럼 키가 되고, 없는 선택 컬럼은 빠진다.
+
+    Args:
+        source: 파일 경로 또는 읽기 가능한(seek 가능한) 바이너리 파일 객체
+        columns: {컬럼 키: (헤더명 별칭, ...)}. 없으면 첫 행을 헤더로 전체 컬럼
+        required: columns 중 반드시 있어야 하는 컬럼 키
+        backend: Excel 리더 백엔드 선호 순서 (없으면 STATEMENT_READER 환경변수)
+
+    Returns:
+        DataFrame
+
+    Raises:
+        ValueError: 지원하지 않는 형식, 헤더 없음, 읽기 실패
+    """
+    file_obj, owned = _open(source)
+    try:
+        fmt = _sniff(file_obj)
+
+        try:
+            if fmt in (StatementFormat.XLS, StatementFormat.XLSX):
+                engine = select_engine(fmt, backend)
+                if columns is None:
+                    return pd.read_excel(file_obj, engine=engine)
+                with pd.ExcelFile(file_obj, engine=engine) as book:
+                    preview = book.parse(header=None, nrows=HEADER_SCAN_ROWS, dtype=str)
+                    header, names = find_header(preview.values.tolist(), columns, required)
+                    df = book.parse(header=header, usecols=list(names.values()), dtype=str)
+                return _select(df, names)
+
+            text = decode_text(file_obj.read())
+            if fmt == StatementFormat.HTML:
+                rows = _html_rows(text)
+                if columns is None:
+                    return _rows_to_frame(rows[0], rows[1:])
+                header, names = find_header(rows, columns, required)
+                return _select(_rows_to_frame(rows[header], rows[header + 1:]), names)
+
+            sep = "\t" if fmt == StatementFormat.TSV else ","
+            if columns is None:
+                return pd.read_csv(io.StringIO(text), sep=sep, dtype=object, keep_default_na=False)
+            header, names = find_header(_text_rows(text, sep), columns, required)
+            df = pd.read_csv(
+                io.StringIO(text), sep=sep, skiprows=header, header=0,
+                usecols=list(names.values()), dtype=str, keep_default_na=False,
+            )
+            return _select(df, names)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"{fmt.value} 파일 읽기 오류: {e}")
+    finally:
+        if owned:
+            file_obj.close()
+
+
+def read_sheet(
+    source: StatementSource,
+    sheet_name: Union[str, int] = 0,
+    header: int = 0,
+    backend: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    시트 하나를 pd.read_excel처럼 읽기 (형식은 파일 내용으로 판별)
+
+    HTML 표 / 탭·쉼표 구분 텍스트는 시트 구분 없이 전체를 읽고, 값은 문자열로 둔다.
+
+    Args:
+        source: 파일 경로 또는 바이너리 파일 객체
+        sheet_name: 시트명 또는 순번 (Excel만)
+        header: 헤더 행 번호
+        backend: Excel 리더 백엔드 선호 순서
+
+    Returns:
+        DataFrame
+    """
+    file_obj, owned = _open(source)
+    try:
+        fmt = _sniff(file_obj)
+        if fmt in (StatementFormat.XLS, StatementFormat.XLSX):
+            return pd.read_excel(file_obj, sheet_name=sheet_name, header=header, engine=select_engine(fmt, backend))
+
+        text = decode_text(file_obj.read())
+        if fmt == StatementFormat.HTML:
+            rows = _html_rows(text)
+            return _rows_to_frame(rows[header], rows[header + 1:])
+        sep = "\t" if fmt == StatementFormat.TSV else ","
+        return pd.read_csv(io.StringIO(text), sep=sep, skiprows=header, header=0, dtype=object, keep_default_na=False)
+    finally:
+        if owned:
+            file_obj.close()
+
+
+def read_workbook(
+    source: StatementSource,
+    sheets: SheetSelector = None,
+    backend: Optional[str] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Excel 통합문서를 한 번만 열어 여러 시트 읽기
+
+    Args:
+        source: 파일 경로 또는 바이너리 파일 객체
+        sheets: 시트명 목록 또는 시트명을 받아 bool을 돌려주는 필터. 없으면 전체 시트
+        backend: Excel 리더 백엔드 선호 순서
+
+    Returns:
+        {시트명: DataFrame} (통합문서 시트 순서)
+
+    Raises:
+        ValueError: Excel 파일이 아님
+    """
+    file_obj, owned = _open(source)
+    try:
+        fmt = _sniff(file_obj)
+        if fmt not in (StatementFormat.XLS, StatementFormat.XLSX):
+            raise ValueError(f"시트를 읽을 수 없는 형식입니다: {fmt.value}")
+
+        with pd.ExcelFile(file_obj, engine=select_engine(fmt, backend)) as book:
+            if sheets is None:
+                names = list(book.sheet_names)
+            elif callable(sheets):
+                names = [name for name in book.sheet_names if sheets(name)]
+            else:
+                wanted = set(sheets)
+                names = [name for name in book.sheet_names if name in wanted]
+            return {name: book.parse(sheet_name=name) for name in names}
+    finally:
+        if owned:
+            file_obj.close()
+
+
+def _cell_text(value) -> str:
+    """셀 값 → 문자열 (read_excel(dtype=str)과 같게 정수인 실수는 소수점 없이, 빈 셀/오류 셀은 "")"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+def _xlrd_value(value, cell_type: int, datemode: int):
+    """xlrd 셀 값 → 파이썬 값 (날짜 셀은 datetime, 오류 셀은 None)"""
+    import xlrd
+
+    if cell_type == xlrd.XL_CELL_DATE:
+        try:
+            return xlrd.xldate.xldate_as_datetime(value, datemode)
+        except (OverflowError, ValueError):
+            return value
+    if cell_type == xlrd.XL_CELL_ERROR:
+        return None
+    if cell_type == xlrd.XL_CELL_BOOLEAN:
+        return bool(value)
+    return value
+
+
+def _iter_excel_rows(file_obj: BinaryIO, engine: str) -> Iterator[Sequence]:
+    """
+    첫 시트의 행을 하나씩 읽기
+
+    openpyxl은 read_only 모드로 행을 읽는 대로 버린다. xls(BIFF)는 형식상 파일 전체를
+    한 번에 읽지만 시트가 65,536행으로 제한되고, 셀 값 변환은 행 단위로 한다.
+    """
+    if engine == "openpyxl":
+        from openpyxl import load_workbook
+
+        book = load_workbook(file_obj, read_only=True, data_only=True, keep_links=False)
+        try:
+            yield from book.worksheets[0].iter_rows(values_only=True)
+        finally:
+            book.close()
+    elif engine == "xlrd":
+        import xlrd
+
+        book = xlrd.open_workbook(file_contents=file_obj.read(), on_demand=True)
+        try:
+            sheet = book.sheet_by_index(0)
+            for i in range(sheet.nrows):
+                yield [
+                    _xlrd_value(value, cell_type, book.datemode)
+                    for value, cell_type in zip(sheet.row_values(i), sheet.row_types(i))
+                ]
+        finally:
+            book.release_resources()
+    else:
+        from python_calamine import CalamineWorkbook
+
+        book = CalamineWorkbook.from_filelike(file_obj)
+        try:
+            yield from book.get_sheet_by_index(0).iter_rows()
+        finally:
+            book.close()
+
+
+def _chunk_rows(
+    rows: Iterator[Sequence],
+    columns: ColumnAliases,
+    required: Sequence[str],
+    chunk_size: int,
+) -> Iterator[pd.DataFrame]:
+    """
+    행 이터레이터 → 헤더를 찾은 뒤 필요한 컬럼만 chunk_size 행씩 문자열 DataFrame
+
+    빈 셀은 None이 아닌 ""로 채운다 (pandas 2.x에서 None이 "None" 문자열로 바뀌지 않도록).
+    """
+    head = list(itertools.islice(rows, HEADER_SCAN_ROWS))
+    header, names = find_header(head, columns, required)
+    header_cells = ["" if cell is None else str(cell) for cell in head[header]]
+    positions = [header_cells.index(name) for name in names.values()]
+
+    chunk: List[List[str]] = []
+    start = 0
+    blank = 0  # 아직 내보내지 않은 연속 빈 행 (끝에 남으면 read_excel처럼 버림)
+    for row in itertools.chain(head[header + 1:], rows):
+        if all(cell is None or cell == "" for cell in row):
+            blank += 1
+            continue
+        values = [_cell_text(row[p]) if p < len(row) else "" for p in positions]
+        for cells in [[""] * len(positions)] * blank + [values]:
+            chunk.append(cells)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=list(names), index=range(start, start + len(chunk)), dtype=str)
+                start += len(chunk)
+                chunk = []
+        blank = 0
+    if chunk:
+        yield pd.DataFrame(chunk, columns=list(names), index=range(start, start + len(chunk)), dtype=str)
+
+
+def iter_statement(
+    source: StatementSource,
+    columns: ColumnAliases,
+    required: Sequence[str] = (),
+    chunk_size: int = STREAM_CHUNK_ROWS,
+    backend: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    명세서를 chunk_size 행씩 나눠 읽기 (read_statement의 스트리밍 버전)
+
+    전체 DataFrame을 만들지 않고 행을 읽는 대로 청크로 넘기므로, 몇 달 치 전사 내보내기
+    파일도 메모리 사용량이 청크 크기 정도로 유지된다. 청크의 컬럼명은 컬럼 키, 값은 문자열,
+    인덱스는 파일 전체 기준 행 번호(헤더 제외)로 read_statement와 같다. Excel/HTML은 중간의
+    빈 행도 ""로 채운 행으로 번호를 차지하고 끝에 남은 빈 행만 버린다 (텍스트는 read_csv 기준).
+
+    Args:
+        source: 파일 경로 또는 읽기 가능한(seek 가능한) 바이너리 파일 객체
+        columns: {컬럼 키: (헤더명 별칭, ...)}
+        required: 반드시 있어야 하는 컬럼 키
+        chunk_size: 청크 행 수
+        backend: Excel 리더 백엔드 선호 순서 (없으면 STATEMENT_READER, auto는 STREAM_READER_ORDER)
+
+    Yields:
+        DataFrame 청크
+
+    Raises:
+        ValueError: 지원하지 않는 형식, 헤더 없음, 읽기 실패
+    """
+    file_obj, owned = _open(source)
+    try:
+        fmt = _sniff(file_obj)
+
+        try:
+            if fmt in (StatementFormat.XLS, StatementFormat.XLSX):
+                engine = select_engine(fmt, backend, STREAM_READER_ORDER)
+                yield from _chunk_rows(_iter_excel_rows(file_obj, engine), columns, required, chunk_size)
+                return
+
+            text = decode_text(file_obj.read())
+            if fmt == StatementFormat.HTML:
+                yield from _chunk_rows(iter(_html_rows(text)), columns, required, chunk_size)
+                return
+
+            sep = "\t" if fmt == StatementFormat.TSV else ","
+            header, names = find_header(_text_rows(text, sep), columns, required)
+            reader = pd.read_csv(
+                io.StringIO(text), sep=sep, skiprows=header, header=0,
+                usecols=list(names.values()), dtype=str, keep_default_na=False,
+                chunksize=chunk_size,
+            )
+            with reader:
+                for df in reader:
+                    yield _select(df, names)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"{fmt.value} 파일 읽기 오류: {e}")
+    finally:
+        if owned:
+            file_obj.close()
@@ -0,0 +1,385 @@
+"""
+Storage 업로드 outbox
+요청 처리 중에는 파일을 로컬 디스크와 storage_outbox 테이블에만 기록하고,
+실제 Storage 업로드는 백그라운드 업로더가 재시도·서킷 브레이커와 함께 처리
+"""
+import logging
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Union
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.storage_outbox import StorageOutbox, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTBOX_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "outbox"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class CircuitBreaker:
+    """
+    Storage 장애 시 업로드 시도를 잠시 멈추는 서킷 브레이커
+
+    - closed: 정상. 연속 실패가 failure_threshold에 도달하면 open
+    - open: reset_timeout 동안 업로드 중단
+    - half_open: 시험 업로드 1건만 허용. 성공하면 closed, 실패하면 다시 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        """업로드 시도 가능 여부 (open → half_open 전환 포함, 시험 1건 제한은 호출 측에서)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            return self.state == self.HALF_OPEN
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class StorageUploader:
+    """
+    outbox 백그라운드 업로더
+
+    - 동시 업로드 수 제한 (max_concurrency)
+    - 실패 시 지수 백오프 + 지터로 재시도, max_attempts 초과 시 failed
+    - 서킷 브레이커가 열려 있으면 새 업로드를 시작하지 않음
+    - 선점(uploading)에는 lease_seconds 기한이 있어, 기한이 지난 항목만 다른 워커가 회수
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        poll_interval: float = 5.0,
+        outbox_dir: Union[str, Path, None] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        lease_seconds: Optional[float] = None,
+    ):
+        self.max_concurrency = max_concurrency or int(os.getenv("STORAGE_UPLOAD_CONCURRENCY", "2"))
+        self.max_attempts = max_attempts or int(os.getenv("STORAGE_UPLOAD_MAX_ATTEMPTS", "8"))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.outbox_dir = Path(outbox_dir or os.getenv("STORAGE_OUTBOX_DIR", DEFAULT_OUTBOX_DIR))
+        self.breaker = breaker or CircuitBreaker()
+        # 업로드 1건의 최대 소요 시간보다 길어야 함 (살아 있는 워커의 업로드를 빼앗지 않도록)
+        self.lease_seconds = lease_seconds or float(os.getenv("STORAGE_UPLOAD_LEASE_SECONDS", "600"))
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+
+    # ------------------------------------------------------------------
+    # 등록
+    # ------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        db: Session,
+        source: Union[bytes, str],
+        filename: str,
+        folder: str,
+        content_type: str,
+    ) -> StorageOutbox:
+        """
+        업로드 대기 항목 등록 (파일 내용을 outbox 디렉토리에 보관)
+
+        Args:
+            db: DB 세션 (커밋함)
+            source: 파일 바이트 또는 로컬 파일 경로
+            filename: 원본 파일명
+            folder: Storage 폴더
+            content_type: content-type
+
+        Returns:
+            등록된 StorageOutbox
+        """
+        self.outbox_dir.mkdir(parents=True, exist_ok=True)
+        local_path = self.outbox_dir / f"{uuid.uuid4().hex}{Path(filename).suffix.lower()}"
+        if isinstance(source, bytes):
+            local_path.write_bytes(source)
+        else:
+            shutil.copyfile(source, local_path)
+
+        item = StorageOutbox(
+            filename=filename,
+            folder=folder,
+            content_type=content_type,
+            local_path=str(local_path),
+        )
+        db.add(item)
+        db.commit()
+        db.refresh(item)
+
+        self.start()
+        self._wake.set()
+        return item
+
+    def enqueue_billing_statement(self, db: Session, source: Union[bytes, str], filename: str) -> StorageOutbox:
+        """청구명세서 원본 업로드 등록"""
+        from app.services.supabase_storage import SupabaseStorageService
+
+        return self.enqueue(db, source, filename, "uploads", SupabaseStorageService.content_type_for(filename))
+
+    def enqueue_excel_export(self, db: Session, file_bytes: bytes, filename: str) -> StorageOutbox:
+        """Excel 내보내기 파일 업로드 등록"""
+        return self.enqueue(db, file_bytes, filename, "exports", XLSX_CONTENT_TYPE)
+
+    @staticmethod
+    def reference(item: StorageOutbox) -> dict:
+        """응답에 넣을 Storage 참조 (업로드 완료 전에는 status만 pending)"""
+        return {
+            "outbox_id": item.id,
+            "status": item.status,
+            "path": item.storage_path,
+            "url": item.storage_url,
+            "status_url": f"/api/storage/outbox/{item.id}",
+        }
+
+    # ------------------------------------------------------------------
+    # 백그라운드 처리
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """업로더 스레드 시작 (이미 실행 중이면 무시)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="storage-upload"
+            )
+            self._thread = threading.Thread(target=self._loop, name="storage-outbox", daemon=True)
+            self._thread.start()
+
+    def _recover(self) -> None:
+        """
+        선점 lease가 만료된 uploading 항목을 대기 상태로 되돌림
+
+        업로드 도중 종료된 워커의 항목만 회수하고, 다른 살아 있는 워커(uvicorn --workers,
+        롤링 재시작)가 업로드 중인 항목은 lease 안에 있으므로 건드리지 않는다.
+        claimed_at이 없는 이전 버전 항목은 마지막 변경 시각(updated_at)으로 판단한다.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        claimed = func.coalesce(StorageOutbox.claimed_at, StorageOutbox.updated_at)
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(StorageOutbox)
+                .where(
+                    StorageOutbox.status == OutboxStatus.UPLOADING.value,
+                    or_(claimed < cutoff, claimed.is_(None)),
+                )
+                .values(status=OutboxStatus.PENDING.value, claimed_at=None)
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"outbox 복구 실패: {e}")
+        finally:
+            db.close()
+
+    def stop(self, wait: bool = True) -> None:
+        """업로더 종료"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    def _loop(self) -> None:
+        while not self._stopped.is_set():
+            self._recover()
+            try:
+                self._dispatch()
+            except Exception as e:
+                logger.warning(f"outbox 처리 오류: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _dispatch(self) -> None:
+        """재시도 시각이 된 항목을 빈 슬롯만큼 가져와 업로드 시작"""
+        with self._lock:
+            free = self.max_concurrency - self._in_flight
+        if free <= 0 or not self.breaker.allow():
+            return
+        if self.breaker.state == CircuitBreaker.HALF_OPEN:
+            # 시험 업로드는 한 번에 1건만
+            if free < self.max_concurrency:
+                return
+            free = 1
+
+        db = SessionLocal()
+        try:
+            ids = [
+                row.id for row in
+                db.query(StorageOutbox.id)
+                .filter(
+                    StorageOutbox.status == OutboxStatus.PENDING.value,
+                    StorageOutbox.next_attempt_at <= datetime.utcnow(),
+                )
+                .order_by(StorageOutbox.next_attempt_at)
+                .limit(free)
+            ]
+            for outbox_id in ids:
+                # 다른 프로세스와 동시에 가져가지 않도록 조건부 UPDATE로 선점
+                claimed = db.execute(
+                    update(StorageOutbox)
+                    .where(
+                        StorageOutbox.id == outbox_id,
+                        StorageOutbox.status == OutboxStatus.PENDING.value,
+                    )
+                    .values(status=OutboxStatus.UPLOADING.value, claimed_at=datetime.utcnow())
+                ).rowcount
+                db.commit()
+                if claimed:
+                    with self._lock:
+                        self._in_flight += 1
+                    self._executor.submit(self._upload, outbox_id)
+        finally:
+            db.close()
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _upload(self, outbox_id: int) -> None:
+        from app.services.supabase_storage import get_storage_service
+
+        db = SessionLocal()
+        try:
+            item = db.get(StorageOutbox, outbox_id)
+            if item is None:
+                return
+            try:
+                info = get_storage_service().upload_file(
+                    file_bytes=item.local_path,
+                    filename=item.filename,
+                    folder=item.folder,
+                    content_type=item.content_type,
+                )
+            except Exception as e:
+                self.breaker.record_failure()
+                item.attempts = (item.attempts or 0) + 1
+                item.last_error = str(e)[:500]
+                item.claimed_at = None
+                if item.attempts >= self.max_attempts:
+                    item.status = OutboxStatus.FAILED.value
+                    logger.error(f"Storage 업로드 최종 실패 (outbox {item.id}): {e}")
+                else:
+                    item.status = OutboxStatus.PENDING.value
+                    item.next_attempt_at = datetime.utcnow() + timedelta(seconds=self._backoff(item.attempts))
+                    logger.warning(f"Storage 업로드 실패, 재시도 예정 (outbox {item.id}, {item.attempts}회): {e}")
+                db.commit()
+                return
+
+            self.breaker.record_success()
+            item.status = OutboxStatus.DONE.value
+            item.claimed_at = None
+            item.storage_path = info["path"]
+            item.storage_url = info["url"]
+            item.last_error = None
+            db.commit()
+            logger.info(f"Storage 업로드 완료 (outbox {item.id}): {info['path']}")
+            try:
+                os.unlink(item.local_path)
+            except OSError:
+                pass
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"outbox {outbox_id} 상태 기록 실패: {e}")
+        finally:
+            db.close()
+            with self._lock:
+                self._in_flight -= 1
+            self._wake.set()
+
+    # ------------------------------------------------------------------
+    # 조회 / 관리
+    # ------------------------------------------------------------------
+
+    def retry(self, db: Session, outbox_id: int) -> Optional[StorageOutbox]:
+        """실패 항목 재시도 예약"""
+        item = db.get(StorageOutbox, outbox_id)
+        if item is None:
+            return None
+        if item.status == OutboxStatus.FAILED.value:
+            item.status = OutboxStatus.PENDING.value
+            item.attempts = 0
+            item.next_attempt_at = datetime.utcnow()
+            db.commit()
+            db.refresh(item)
+            self.start()
+            self._wake.set()
+        return item
+
+    def stats(self, db: Session) -> dict:
+        """상태별 건수 + 서킷 브레이커 상태"""
+        counts = dict(
+            db.query(StorageOutbox.status, func.count(StorageOutbox.id))
+            .group_by(StorageOutbox.status)
+        )
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "by_status": {status.value: counts.get(status.value, 0) for status in OutboxStatus},
+            "in_flight": in_flight,
+            "max_concurrency": self.max_concurrency,
+            "circuit_breaker": self.breaker.to_dict(),
+        }
+
+
+# 싱글톤 인스턴스
+_storage_uploader: Optional[StorageUploader] = None
+
+
+def get_storage_uploader() -> StorageUploader:
+    """Storage 업로더 인스턴스 반환"""
+    global _storage_uploader
+    if _storage_uploader is None:
+        _storage_uploader = StorageUploader()
+    return _storage_uploader
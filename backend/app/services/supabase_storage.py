@@ -4,7 +4,7 @@ Excel 파일 및 업로드된 청구서 저장
 """
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 
 from supabase import create_client, Client
 
@@ -56,7 +56,7 @@ class SupabaseStorageService:
 
     def upload_file(
         self,
-        file_bytes: bytes,
+        file_bytes: Union[bytes, str],
         filename: str,
         folder: str = "exports",
         content_type: str = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
@@ -65,7 +65,7 @@ class SupabaseStorageService:
         파일 업로드
 
         Args:
-            file_bytes: 파일 바이트 데이터
+            file_bytes: 파일 바이트 데이터 또는 로컬 파일 경로 (경로면 스트리밍 업로드)
             filename: 파일명
             folder: 저장 폴더 (기본: exports)
             content_type: 콘텐츠 타입
@@ -108,21 +108,28 @@ class SupabaseStorageService:
             content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
-    def upload_billing_statement(self, file_bytes: bytes, filename: str) -> dict:
-        """청구명세서 원본 파일 업로드"""
-        # 파일 확장자에 따른 content-type 결정
+    @staticmethod
+    def content_type_for(filename: str) -> str:
+        """파일 확장자에 따른 content-type"""
         if filename.endswith('.xlsx'):
-            content_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            return "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         elif filename.endswith('.xls'):
-            content_type = "application/vnd.ms-excel"
-        else:
-            content_type = "application/octet-stream"
-
+            return "application/vnd.ms-excel"
+        elif filename.endswith(('.htm', '.html')):
+            return "text/html"
+        elif filename.endswith(('.tsv', '.txt')):
+            return "text/tab-separated-values"
+        elif filename.endswith('.csv'):
+            return "text/csv"
+        return "application/octet-stream"
+
+    def upload_billing_statement(self, file_bytes: Union[bytes, str], filename: str) -> dict:
+        """청구명세서 원본 파일 업로드 (바이트 또는 로컬 파일 경로)"""
         return self.upload_file(
             file_bytes=file_bytes,
             filename=filename,
             folder="uploads",
-            content_type=content_type
+            content_type=self.content_type_for(filename)
         )
 
     def download_file(self, path: str) -> bytes:
@@ -153,8 +160,16 @@ _storage_service: Optional[SupabaseStorageService] = None
 
 
 def get_storage_service() -> SupabaseStorageService:
-    """Storage 서비스 인스턴스 반환"""
+    """
+    Storage 서비스 인스턴스 반환
+
+    STORAGE_BACKEND=local 이면 로컬 디렉토리 저장소(LocalStorageService) 사용
+    """
     global _storage_service
     if _storage_service is None:
-        _storage_service = SupabaseStorageService()
+        if os.getenv("STORAGE_BACKEND", "supabase").lower() == "local":
+            from app.services.local_storage import LocalStorageService
+            _storage_service = LocalStorageService()
+        else:
+            _storage_service = SupabaseStorageService()
     return _storage_service
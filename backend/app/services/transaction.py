@@ -1,14 +1,21 @@
 """
 거래 처리 서비스
 """
-from typing import List, Optional, Dict
+import logging
+from typing import List, Optional, Dict, Tuple
 from datetime import date
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.repositories.transaction_repo import TransactionRepository
 from app.repositories.card_repo import CardRepository
+from app.repositories.session_repo import SessionRepository
 from app.services.matching import MatchingService
+from app.services.stage_timer import StageTimer, timed
 from app.models.transaction import Transaction, MatchStatus
+from app.dedup_key import assign_dedup_keys, make_dedup_key
+
+logger = logging.getLogger(__name__)
 
 
 class TransactionService:
@@ -18,6 +25,7 @@ class TransactionService:
         self.db = db
         self.transaction_repo = TransactionRepository(db)
         self.card_repo = CardRepository(db)
+        self.session_repo = SessionRepository(db)
         self.matching_service = MatchingService(db)
 
     def create_transaction(
@@ -29,6 +37,7 @@ class TransactionService:
         amount: int,
         industry: Optional[str] = None,
         auto_match: bool = True,
+        merchant_key: Optional[str] = None,
     ) -> Transaction:
         """
         새 거래 생성
@@ -41,6 +50,7 @@ class TransactionService:
             amount: 금액
             industry: 업종
             auto_match: 자동 매칭 시도 여부
+            merchant_key: 정규화된 가맹점명 (없으면 새로 계산)
 
         Returns:
             생성된 Transaction
@@ -50,84 +60,356 @@ class TransactionService:
         if not card:
             raise ValueError(f"등록되지 않은 카드: {card_number}")
 
-        # 중복 확인
-        if self.transaction_repo.exists(card.id, transaction_date, merchant_name, amount):
-            raise ValueError("중복된 거래입니다")
+        match, tier = (None, None), None
+        if auto_match:
+            usage, pattern_id, tier = self.matching_service.resolve_many([(merchant_name, card.id)])[0]
+            match = (usage, pattern_id)
 
-        # 거래 생성
-        transaction = self.transaction_repo.create(
+        transaction = self._insert_transaction(
             session_id=session_id,
             card_id=card.id,
             transaction_date=transaction_date,
             merchant_name=merchant_name,
             amount=amount,
             industry=industry,
+            match=match,
+            merchant_key=merchant_key,
         )
+        if tier is not None:
+            self.matching_service.record_match_results([merchant_name], [tier])
+        self.matching_service.record_uses([transaction.matched_pattern_id])
+        self.matching_service.flush_use_counts()
+        self.db.commit()
+        return transaction
 
-        # 자동 매칭 시도
-        if auto_match:
-            usage, pattern_id = self.matching_service.find_match(
-                merchant_name, card.id
-            )
-            if usage:
-                self.transaction_repo.update_match(
-                    transaction.id,
-                    usage_description=usage,
-                    pattern_id=pattern_id,
-                    match_status=MatchStatus.AUTO.value,
-                )
-                self.db.refresh(transaction)
+    def _insert_transaction(
+        self,
+        session_id: int,
+        card_id: int,
+        transaction_date: date,
+        merchant_name: str,
+        amount: int,
+        industry: Optional[str],
+        match: Tuple[Optional[str], Optional[int]],
+        merchant_key: Optional[str] = None,
+        dedup_key: Optional[str] = None,
+    ) -> Transaction:
+        """중복 확인 후 매칭 결과를 포함해 거래 저장"""
+        dedup_key = dedup_key or make_dedup_key(card_id, transaction_date, merchant_name, amount)
+        if self.transaction_repo.exists_by_key(dedup_key):
+            raise ValueError("중복된 거래입니다")
 
-        return transaction
+        usage, pattern_id = match
+        try:
+            return self.transaction_repo.create(
+                session_id=session_id,
+                card_id=card_id,
+                transaction_date=transaction_date,
+                merchant_name=merchant_name,
+                amount=amount,
+                industry=industry,
+                merchant_key=merchant_key,
+                dedup_key=dedup_key,
+                usage_description=usage,
+                matched_pattern_id=pattern_id,
+                match_status=MatchStatus.AUTO.value if usage else MatchStatus.PENDING.value,
+            )
+        except IntegrityError:
+            # 동시에 올라온 다른 업로드가 먼저 저장한 경우
+            self.db.rollback()
+            raise ValueError("중복된 거래입니다")
 
     def bulk_create_transactions(
         self,
         session_id: int,
         transactions_data: List[dict],
         auto_match: bool = True,
+        final_status: Optional[str] = None,
+        timer: Optional[StageTimer] = None,
+        occurrences: Optional[dict] = None,
     ) -> Dict[str, int]:
         """
-        대량 거래 생성
+        대량 거래 생성 (집합 단위 처리)
+
+        1. 배치의 카드번호를 한 번에 조회해 카드 ID 매핑
+        2. 명세서(source)별 순서대로 중복 판정 키(dedup_key) 부여
+           - 여러 파일을 합친 배치면 파일이 겹치는 구간은 배치 안에서 중복 처리
+        3. resolve_many로 가맹점 조합별 한 번만 매칭 (매칭 지표는 저장된 행만 기록)
+        4. 매칭 결과를 포함한 거래를 executemany 한 번으로 INSERT
+           (dedup_key 충돌 행은 DB가 건너뛰고 중복으로 집계)
+        5. 세션 카운트 증가(+ 상태 전환)를 UPDATE 한 번으로 같은 트랜잭션에 넣고 커밋
+           → 세션 카운트는 실제로 저장된 거래와 항상 일치
+
+        일괄 INSERT가 실패하면 롤백 후 행 단위 저장으로 전환해
+        문제 행만 오류로 집계한다.
 
         Args:
             session_id: 업로드 세션 ID
-            transactions_data: 거래 데이터 리스트
+            transactions_data: 거래 데이터 리스트 (여러 파일이면 각 행에 "source" 지정)
             auto_match: 자동 매칭 시도 여부
+            final_status: 저장과 함께 전환할 세션 상태 (예: completed)
+            timer: 단계별 소요 시간 측정 (dedup / match / insert / bookkeeping)
+            occurrences: 중복 판정 키 순번 상태 (한 명세서를 배치로 나눠 저장할 때
+                호출마다 같은 dict를 넘기면 같은 날 반복 결제 순번을 배치 사이에 이어서 셈)
 
         Returns:
             결과 통계 {created, duplicates, errors, matched}
+            source가 있으면 파일별 통계 by_source 포함
         """
-        stats = {
-            "created": 0,
-            "duplicates": 0,
-            "errors": 0,
-            "matched": 0,
-        }
+        outcomes: List[Optional[str]] = [None] * len(transactions_data)
+        matched_flags = [False] * len(transactions_data)
+        if not transactions_data:
+            stats = self._summarize(transactions_data, outcomes, matched_flags)
+            self.session_repo.add_ingested(session_id, 0, 0, status=final_status)
+            self.db.commit()
+            return stats
+
+        with timed(timer, "dedup"):
+            # 1. 카드번호 → 카드 ID (쿼리 1회)
+            card_ids = self.card_repo.get_id_map(data["card_number"] for data in transactions_data)
+
+            rows = []
+            for index, data in enumerate(transactions_data):
+                card_id = card_ids.get(data["card_number"])
+                if card_id is None:
+                    outcomes[index] = "errors"
+                    continue
+                rows.append((index, card_id, data))
+
+            # 2. 중복 판정 키 (같은 날 반복 결제는 명세서 안에서의 순번으로 구분)
+            dedup_keys = assign_dedup_keys(
+                ((card_id, data["transaction_date"], data["merchant_name"], data["amount"])
+                 for _, card_id, data in rows),
+                sources=[data.get("source") for _, _, data in rows],
+                occurrences=occurrences,
+            )
 
-        for data in transactions_data:
+            # 겹치는 명세서에서 온 같은 키는 첫 행만 저장
+            unique_rows = []
+            seen = set()
+            for (index, card_id, data), dedup_key in zip(rows, dedup_keys):
+                if dedup_key in seen:
+                    outcomes[index] = "duplicates"
+                    continue
+                seen.add(dedup_key)
+                unique_rows.append((index, card_id, data, dedup_key))
+
+        # 3. 배치 전체 매칭 (매칭 지표는 실제로 저장된 행만 나중에 기록)
+        matches = [(None, None)] * len(unique_rows)
+        tiers: Optional[List[str]] = None
+        if auto_match and unique_rows:
+            with timed(timer, "match"):
+                resolved = self.matching_service.resolve_many(
+                    [(data["merchant_name"], card_id) for _, card_id, data, _ in unique_rows]
+                )
+            matches = [(usage, pattern_id) for usage, pattern_id, _ in resolved]
+            tiers = [tier for *_, tier in resolved]
+
+        # 4. 일괄 INSERT (트랜잭션 1회)
+        mappings = []
+        for (_, card_id, data, dedup_key), (usage, pattern_id) in zip(unique_rows, matches):
+            mappings.append({
+                "session_id": session_id,
+                "card_id": card_id,
+                "transaction_date": data["transaction_date"],
+                "merchant_name": data["merchant_name"],
+                "merchant_key": data.get("merchant_key"),
+                "dedup_key": dedup_key,
+                "amount": data["amount"],
+                "industry": data.get("industry"),
+                "usage_description": usage,
+                "matched_pattern_id": pattern_id,
+                "match_status": MatchStatus.AUTO.value if usage else MatchStatus.PENDING.value,
+            })
+
+        try:
+            with timed(timer, "insert"):
+                inserted_keys = self.transaction_repo.insert_many(mappings)
+            for (index, *_), mapping in zip(unique_rows, mappings):
+                if mapping["dedup_key"] in inserted_keys:
+                    outcomes[index] = "created"
+                    matched_flags[index] = mapping["match_status"] != MatchStatus.PENDING.value
+                else:
+                    outcomes[index] = "duplicates"
+            stats = self._summarize(transactions_data, outcomes, matched_flags)
+
+            # 5. 세션 카운트/상태 (INSERT와 같은 트랜잭션)
+            with timed(timer, "bookkeeping"):
+                self.session_repo.add_ingested(
+                    session_id, stats["created"], stats["matched"], status=final_status
+                )
+                self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"일괄 저장 실패, 행 단위로 재시도: {e}")
+            for index, *_ in unique_rows:
+                outcomes[index] = None
+                matched_flags[index] = False
+            with timed(timer, "insert"):
+                self._create_rows_individually(session_id, unique_rows, matches, outcomes, matched_flags)
+            stats = self._summarize(transactions_data, outcomes, matched_flags)
+            with timed(timer, "bookkeeping"):
+                self.session_repo.add_ingested(
+                    session_id, stats["created"], stats["matched"], status=final_status
+                )
+                self.db.commit()
+            self._record_match_results(unique_rows, tiers, outcomes)
+            return stats
+
+        self._record_match_results(unique_rows, tiers, outcomes)
+
+        # 패턴 사용 횟수 일괄 반영
+        with timed(timer, "bookkeeping"):
+            self.matching_service.record_uses(
+                mapping["matched_pattern_id"]
+                for (index, *_), mapping in zip(unique_rows, mappings)
+                if matched_flags[index]
+            )
+            self.matching_service.flush_use_counts()
+            self.db.commit()
+
+        return stats
+
+    def preview_transactions(self, transactions_data: List[dict]) -> dict:
+        """
+        거래 생성 미리보기 (dry-run, DB에 쓰지 않음)
+
+        bulk_create_transactions와 같은 순서로 판정한다.
+        카드 조회·기존 거래 조회는 각각 IN 조회 한 번(청크 단위), 매칭은 인덱스 일괄 판정.
+
+        Args:
+            transactions_data: 거래 데이터 리스트
+
+        Returns:
+            {"rows": 행별 예상 결과, "stats": 집계}
+            행 status: new / duplicate / unknown_card
+        """
+        card_ids = self.card_repo.get_id_map(data["card_number"] for data in transactions_data)
+        known = [
+            (index, card_ids[data["card_number"]], data)
+            for index, data in enumerate(transactions_data)
+            if data["card_number"] in card_ids
+        ]
+        dedup_keys = assign_dedup_keys(
+            (card_id, data["transaction_date"], data["merchant_name"], data["amount"])
+            for _, card_id, data in known
+        )
+        existing = self.transaction_repo.find_existing_keys(dedup_keys)
+        matches = self.matching_service.preview_many(
+            [(data["merchant_name"], card_id) for _, card_id, data in known]
+        )
+
+        rows = [
+            {
+                "row": index,
+                "card_number": data["card_number"],
+                "transaction_date": data["transaction_date"].isoformat(),
+                "merchant_name": data["merchant_name"],
+                "amount": data["amount"],
+                "status": "unknown_card",
+                "usage_description": None,
+                "pattern_id": None,
+                "match_tier": None,
+            }
+            for index, data in enumerate(transactions_data)
+        ]
+        stats = {"total": len(rows), "new": 0, "duplicates": 0, "unknown_card": 0, "matched": 0, "by_tier": {}}
+
+        seen = set()
+        for (index, _, _), dedup_key, (usage, pattern_id, tier) in zip(known, dedup_keys, matches):
+            row = rows[index]
+            if dedup_key in existing or dedup_key in seen:
+                row["status"] = "duplicate"
+                stats["duplicates"] += 1
+                continue
+            seen.add(dedup_key)
+            row.update(status="new", usage_description=usage, pattern_id=pattern_id, match_tier=tier)
+            stats["new"] += 1
+            stats["matched"] += pattern_id is not None
+            stats["by_tier"][tier] = stats["by_tier"].get(tier, 0) + 1
+        stats["unknown_card"] = stats["total"] - stats["new"] - stats["duplicates"]
+
+        return {"rows": rows, "stats": stats}
+
+    def _create_rows_individually(
+        self,
+        session_id: int,
+        rows: List[Tuple[int, int, dict, str]],
+        matches: List[Tuple[Optional[str], Optional[int]]],
+        outcomes: List[Optional[str]],
+        matched_flags: List[bool],
+    ) -> None:
+        """일괄 INSERT 실패 시 행 단위 저장 (실패한 행만 오류로 집계)"""
+        used_pattern_ids = []
+        for (index, card_id, data, dedup_key), match in zip(rows, matches):
             try:
-                tx = self.create_transaction(
+                tx = self._insert_transaction(
                     session_id=session_id,
-                    card_number=data["card_number"],
+                    card_id=card_id,
                     transaction_date=data["transaction_date"],
                     merchant_name=data["merchant_name"],
                     amount=data["amount"],
                     industry=data.get("industry"),
-                    auto_match=auto_match,
+                    match=match,
+                    merchant_key=data.get("merchant_key"),
+                    dedup_key=dedup_key,
                 )
-                stats["created"] += 1
+                outcomes[index] = "created"
                 if tx.match_status != MatchStatus.PENDING.value:
-                    stats["matched"] += 1
+                    matched_flags[index] = True
+                    used_pattern_ids.append(tx.matched_pattern_id)
 
             except ValueError as e:
-                if "중복" in str(e):
-                    stats["duplicates"] += 1
-                else:
-                    stats["errors"] += 1
+                outcomes[index] = "duplicates" if "중복" in str(e) else "errors"
             except Exception as e:
-                print(f"거래 생성 오류: {e}")
-                stats["errors"] += 1
+                self.db.rollback()
+                logger.warning(f"거래 생성 오류: {e}")
+                outcomes[index] = "errors"
+
+        # 행 오류의 롤백에 섞이지 않도록 사용 횟수는 끝에서 한 번에 반영 (커밋은 호출자)
+        self.matching_service.record_uses(used_pattern_ids)
+        self.matching_service.flush_use_counts()
 
+    def _record_match_results(
+        self,
+        rows: List[Tuple[int, int, dict, str]],
+        tiers: Optional[List[str]],
+        outcomes: List[Optional[str]],
+    ) -> None:
+        """매칭 지표에 실제로 저장된 행만 기록 (중복으로 건너뛴 행 제외)"""
+        if tiers is None:
+            return
+        created = [
+            (data["merchant_name"], tier)
+            for (index, _, data, _), tier in zip(rows, tiers)
+            if outcomes[index] == "created"
+        ]
+        self.matching_service.record_match_results(
+            [name for name, _ in created], [tier for _, tier in created]
+        )
+
+    @staticmethod
+    def _summarize(
+        transactions_data: List[dict],
+        outcomes: List[Optional[str]],
+        matched_flags: List[bool],
+    ) -> dict:
+        """행별 결과 → 통계 (source가 있으면 파일별 통계 포함)"""
+        def empty() -> Dict[str, int]:
+            return {"created": 0, "duplicates": 0, "errors": 0, "matched": 0}
+
+        stats = empty()
+        by_source: Dict[object, Dict[str, int]] = {}
+        for data, outcome, matched in zip(transactions_data, outcomes, matched_flags):
+            targets = [stats]
+            if "source" in data:
+                targets.append(by_source.setdefault(data["source"], empty()))
+            for target in targets:
+                target[outcome or "errors"] += 1
+                target["matched"] += matched
+
+        if by_source:
+            stats["by_source"] = by_source
         return stats
 
     def update_manual_match(
@@ -140,6 +422,8 @@ class TransactionService:
         """
         수동 매칭 업데이트
 
+        패턴으로 저장하면 같은 가맹점의 다른 미매칭 거래에도 바로 적용한다.
+
         Args:
             transaction_id: 거래 ID
             usage_description: 사용내역
@@ -173,6 +457,9 @@ class TransactionService:
             transaction.matched_pattern_id = pattern.id
             self.db.commit()
 
+            # 같은 가맹점의 다른 미매칭 거래에 적용
+            self.matching_service.apply_pattern(pattern)
+
         self.db.refresh(transaction)
         return transaction
 
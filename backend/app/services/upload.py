@@ -1,15 +1,30 @@
 """
 파일 업로드 처리 서비스
 """
-from typing import Tuple
+import logging
+import os
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple, TYPE_CHECKING
 from pathlib import Path
 from sqlalchemy.orm import Session
 
 from app.repositories.session_repo import SessionRepository
 from app.services.excel_parser import ExcelParserService
 from app.services.transaction import TransactionService
+from app.services.upload_spool import UploadSpool
+from app.services.stage_timer import StageTimer
+from app.services.storage_outbox import StorageUploader, get_storage_uploader
 from app.models.session import UploadSession, SessionStatus
 
+if TYPE_CHECKING:
+    from app.services.upload_jobs import UploadProgress
+
+logger = logging.getLogger(__name__)
+
+# 이 시간이 지나도 PROCESSING인 세션은 버려진 것으로 보고 재업로드 시 재사용하지 않음 (기본 30분)
+PROCESSING_TIMEOUT_SECONDS = int(os.getenv("UPLOAD_PROCESSING_TIMEOUT_SECONDS", str(30 * 60)))
+
 
 class UploadService:
     """파일 업로드 처리 서비스"""
@@ -20,6 +35,36 @@ class UploadService:
         self.parser = ExcelParserService()
         self.transaction_service = TransactionService(db)
 
+    def create_session(
+        self,
+        filename: str,
+        created_by: str = None,
+        content_hash: Optional[str] = None,
+    ) -> UploadSession:
+        """업로드 세션 생성 (PROCESSING 상태)"""
+        return self.session_repo.create(
+            filename=filename,
+            created_by=created_by,
+            status=SessionStatus.PROCESSING.value,
+            content_hash=content_hash,
+        )
+
+    def find_previous_upload(self, content_hash: str) -> Optional[UploadSession]:
+        """
+        같은 내용의 파일로 이미 처리했거나 처리 중인 세션 조회
+
+        처리 중 세션은 PROCESSING_TIMEOUT_SECONDS 안에 시작한 것만 인정한다
+        (업로드 작업은 프로세스 안 스레드라 재시작되면 PROCESSING으로 남은 세션은 끝나지 않음).
+
+        Args:
+            content_hash: 업로드 파일 SHA-256
+
+        Returns:
+            기존 UploadSession. 없으면 None (실패·오래된 처리 중 세션은 제외)
+        """
+        since = datetime.utcnow() - timedelta(seconds=PROCESSING_TIMEOUT_SECONDS)
+        return self.session_repo.get_by_content_hash(content_hash, processing_since=since)
+
     def process_upload(
         self,
         file_bytes: bytes,
@@ -27,7 +72,7 @@ class UploadService:
         created_by: str = None,
     ) -> Tuple[UploadSession, dict]:
         """
-        업로드 파일 처리
+        업로드 파일 처리 (요청 스레드에서 바로 실행)
 
         Args:
             file_bytes: 파일 바이트
@@ -37,56 +82,280 @@ class UploadService:
         Returns:
             (UploadSession, 처리 통계)
         """
-        # 1. 세션 생성
-        session = self.session_repo.create(
-            filename=filename,
-            created_by=created_by,
-        )
+        with UploadSpool.from_bytes(file_bytes, filename) as spool:
+            session = self.create_session(filename, created_by, content_hash=spool.sha256)
+            stats = self.run_upload(session.id, spool)
+        self.db.refresh(session)
+        return session, stats
 
-        try:
-            # 2. 상태 업데이트: 처리 중
-            self.session_repo.update_status(session.id, SessionStatus.PROCESSING.value)
+    def preview_upload(self, spool: UploadSpool) -> dict:
+        """
+        업로드 결과 미리보기 (세션·거래를 만들지 않음)
 
-            # 3. Excel 파싱
-            parsed_transactions = self.parser.parse_bytes(file_bytes, filename)
+        Args:
+            spool: 업로드 파일 스풀 (호출한 쪽에서 close)
 
-            # 4. 거래 데이터 변환
+        Returns:
+            {"filename", "rows": 행별 예상 결과, "stats": 집계, "rejected": 파싱에서 제외된 행}
+        """
+        # 전체 DataFrame 없이 스트리밍으로 읽어 행만 모음 (미리보기는 행별 결과를 모두 돌려줌)
+        with spool.open() as file_obj:
             transactions_data = [
-                {
-                    "card_number": tx.card_number,
-                    "transaction_date": tx.transaction_date,
-                    "merchant_name": tx.merchant_name,
-                    "amount": tx.amount,
-                    "industry": tx.industry,
-                }
-                for tx in parsed_transactions
+                row
+                for batch in self.parser.iter_transactions(file_obj, spool.filename)
+                for row in self._to_rows(batch)
             ]
+        preview = self.transaction_service.preview_transactions(transactions_data)
+        rejected = [asdict(r) for r in self.parser.last_report.rejected]
+        return {"filename": spool.filename, **preview, "rejected": rejected}
+
+    def run_upload(
+        self,
+        session_id: int,
+        spool: UploadSpool,
+        progress: Optional["UploadProgress"] = None,
+    ) -> dict:
+        """
+        생성된 세션에 대해 파싱 → 저장/매칭 → 원본 보관 실행
+
+        명세서를 iter_transactions로 배치(ExcelParserService.STREAM_BATCH_SIZE건)씩 읽어
+        배치마다 저장·매칭하고 커밋한다. 전체 DataFrame/거래 리스트를 만들지 않으므로
+        메모리 사용량이 파일 크기와 무관하고, 다음 배치 파싱과 DB 저장이 번갈아 진행된다.
+        세션 카운트는 배치마다 거래 INSERT와 같은 트랜잭션에서 늘고,
+        COMPLETED 전환은 마지막 배치와 함께 반영된다.
+        진행 상황(parsed / inserted / matched)도 배치마다 갱신한다.
+        실패하면 세션을 FAILED로 표시하고 예외를 다시 던진다 (이미 커밋한 배치는 남고,
+        다시 올리면 그 거래는 중복으로 건너뛴다).
+
+        Args:
+            session_id: 업로드 세션 ID
+            spool: 업로드 파일 스풀 (호출한 쪽에서 close)
+            progress: 진행 상황을 기록할 객체 (백그라운드 작업용)
+
+        Returns:
+            처리 통계 {created, duplicates, errors, matched, timings}
+            timings: 단계별 소요 시간 (세션에도 기록)
+        """
+        timer = StageTimer()
+        try:
+            # 1. 파싱 → 거래 생성 및 자동 매칭 + 세션 카운트 (배치마다 한 트랜잭션)
+            if progress:
+                progress.stage = "parsing"
+            stats = {"created": 0, "duplicates": 0, "errors": 0, "matched": 0}
+            occurrences: dict = {}  # 같은 날 반복 결제 순번 (배치 사이에 이어서 셈)
+            rows = 0
+            with spool.open() as file_obj:
+                for batch, is_last in self._iter_batches(file_obj, spool.filename, timer):
+                    transactions_data = self._to_rows(batch)
+                    rows += len(transactions_data)
+                    if progress:
+                        progress.stage = "saving"
+                        progress.parsed = rows
+                    batch_stats = self.transaction_service.bulk_create_transactions(
+                        session_id=session_id,
+                        transactions_data=transactions_data,
+                        auto_match=True,
+                        final_status=SessionStatus.COMPLETED.value if is_last else None,
+                        timer=timer,
+                        occurrences=occurrences,
+                    )
+                    for key in stats:
+                        stats[key] += batch_stats[key]
+                    # 배치가 커밋될 때마다 진행 상황 갱신 (저장 단계 동안 0 → 전체로 건너뛰지 않도록)
+                    self._record_progress(stats, progress)
 
-            # 5. 거래 생성 및 자동 매칭
+            if not rows:
+                # 유효한 거래가 없는 명세서: 빈 저장으로 완료 처리
+                self.transaction_service.bulk_create_transactions(
+                    session_id=session_id,
+                    transactions_data=[],
+                    final_status=SessionStatus.COMPLETED.value,
+                    timer=timer,
+                )
+            if progress:
+                progress.extra["rejected"] = len(self.parser.last_report.rejected)
+
+            # 2. 원본 파일 보관 예약 (업로드는 outbox 업로더가 처리, 실패해도 세션은 완료)
+            if progress:
+                progress.stage = "storing"
+            with timer.stage("storage"):
+                storage_ref = self._store_original(spool)
+            if progress and storage_ref:
+                progress.extra["storage"] = storage_ref
+
+            # 3. 소요 시간 기록
+            stats["timings"] = self._record_timings(session_id, timer, rows, progress)
+            return stats
+
+        except Exception as e:
+            self.db.rollback()
+            self.session_repo.mark_failed(session_id, str(e))
+            raise
+
+    def _iter_batches(
+        self,
+        file_obj,
+        filename: str,
+        timer: StageTimer,
+    ) -> Iterator[Tuple[list, bool]]:
+        """
+        명세서 파싱 배치를 (배치, 마지막 여부)로 내보냄
+
+        마지막 배치에 세션 완료 처리를 함께 넣을 수 있도록 다음 배치를 하나 미리 읽는다.
+        배치를 읽는 시간은 parse 단계로 누적한다.
+        """
+        batches = self.parser.iter_transactions(file_obj, filename)
+        with timer.stage("parse"):
+            current = next(batches, None)
+        while current is not None:
+            with timer.stage("parse"):
+                following = next(batches, None)
+            yield current, following is None
+            current = following
+
+    def run_batch_upload(
+        self,
+        session_id: int,
+        spools: List[UploadSpool],
+        progress: Optional["UploadProgress"] = None,
+    ) -> dict:
+        """
+        여러 명세서를 한 세션으로 처리
+
+        파일별 파싱은 프로세스 풀에서 병렬로 실행하고, 파싱 결과를 합쳐
+        중복 제거·매칭·저장은 한 번의 일괄 처리로 끝낸다.
+        기간이 겹치는 명세서끼리의 중복 거래는 먼저 나온 파일 쪽에 저장된다.
+        일부 파일만 파싱에 실패하면 나머지는 저장하고 파일별 오류로 보고한다.
+
+        Args:
+            session_id: 업로드 세션 ID
+            spools: 업로드 파일 스풀 리스트 (호출한 쪽에서 close)
+            progress: 진행 상황을 기록할 객체 (백그라운드 작업용)
+
+        Returns:
+            처리 통계 {created, duplicates, errors, matched, files, timings}
+            files: 파일별 {filename, parsed, created, duplicates, errors, matched, error}
+        """
+        from app.services.parse_pool import get_parse_pool
+
+        timer = StageTimer()
+        try:
+            # 1. 파일별 병렬 파싱
+            if progress:
+                progress.stage = "parsing"
+            with timer.stage("parse"):
+                results = get_parse_pool().parse_many(
+                    [(spool.storage_source(), spool.filename) for spool in spools]
+                )
+
+            files = []
+            transactions_data = []
+            for index, (spool, (parsed, error)) in enumerate(zip(spools, results)):
+                files.append({
+                    "filename": spool.filename,
+                    "parsed": len(parsed) if parsed is not None else 0,
+                    "created": 0,
+                    "duplicates": 0,
+                    "errors": 0,
+                    "matched": 0,
+                    "error": error,
+                })
+                if parsed:
+                    transactions_data.extend(self._to_rows(parsed, source=index))
+
+            if all(f["error"] for f in files):
+                raise ValueError(f"모든 파일 파싱에 실패했습니다: {files[0]['error']}")
+            if progress:
+                progress.parsed = len(transactions_data)
+                progress.extra["files"] = files
+                progress.stage = "saving"
+
+            # 2. 합친 거래를 한 번에 저장/매칭 + 세션 카운트/완료 처리 (한 트랜잭션)
             stats = self.transaction_service.bulk_create_transactions(
-                session_id=session.id,
+                session_id=session_id,
                 transactions_data=transactions_data,
                 auto_match=True,
+                final_status=SessionStatus.COMPLETED.value,
+                timer=timer,
             )
+            for index, file_stats in stats.pop("by_source", {}).items():
+                files[index].update(file_stats)
+            self._record_progress(stats, progress)
 
-            # 6. 세션 카운트 업데이트
-            self.session_repo.update_counts(
-                session.id,
-                total=stats["created"],
-                matched=stats["matched"],
-                pending=stats["created"] - stats["matched"],
-            )
+            # 3. 원본 파일 보관 예약
+            if progress:
+                progress.stage = "storing"
+            with timer.stage("storage"):
+                for file_info, spool in zip(files, spools):
+                    storage_ref = self._store_original(spool)
+                    if storage_ref:
+                        file_info["storage"] = storage_ref
 
-            # 7. 상태 업데이트: 완료
-            self.session_repo.update_status(session.id, SessionStatus.COMPLETED.value)
+            stats["files"] = files
+            stats["timings"] = self._record_timings(session_id, timer, len(transactions_data), progress)
+            return stats
 
-            self.db.refresh(session)
-            return session, stats
+        except Exception as e:
+            self.db.rollback()
+            self.session_repo.mark_failed(session_id, str(e))
+            raise
 
+    @staticmethod
+    def _to_rows(parsed_transactions: list, source: Optional[int] = None) -> List[dict]:
+        """ParsedTransaction → bulk_create_transactions 입력 (source: 배치 내 파일 번호)"""
+        rows = []
+        for tx in parsed_transactions:
+            row = {
+                "card_number": tx.card_number,
+                "transaction_date": tx.transaction_date,
+                "merchant_name": tx.merchant_name,
+                "amount": tx.amount,
+                "industry": tx.industry,
+                "merchant_key": tx.merchant_key,
+            }
+            if source is not None:
+                row["source"] = source
+            rows.append(row)
+        return rows
+
+    def _record_timings(
+        self,
+        session_id: int,
+        timer: StageTimer,
+        rows: int,
+        progress: Optional["UploadProgress"] = None,
+    ) -> dict:
+        """단계별 소요 시간을 세션과 진행 상황에 기록"""
+        timings = timer.to_dict(rows=rows)
+        try:
+            self.session_repo.record_timings(session_id, timings)
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Failed to record upload timings (continuing): {e}")
+        if progress:
+            progress.extra["timings"] = timings
+        return timings
+
+    @staticmethod
+    def _record_progress(stats: dict, progress: Optional["UploadProgress"] = None) -> None:
+        """처리 통계를 진행 상황에 반영"""
+        if progress:
+            progress.inserted = stats["created"]
+            progress.matched = stats["matched"]
+            progress.duplicates = stats["duplicates"]
+            progress.errors = stats["errors"]
+
+    def _store_original(self, spool: UploadSpool) -> Optional[dict]:
+        """원본 파일을 Storage 업로드 outbox에 등록 (실패해도 업로드는 성공 처리)"""
+        try:
+            item = get_storage_uploader().enqueue_billing_statement(
+                self.db, spool.storage_source(), spool.filename
+            )
+            return StorageUploader.reference(item)
         except Exception as e:
-            # 오류 발생 시 세션 상태 유지 (PENDING)
-            self.session_repo.update_status(session.id, SessionStatus.PENDING.value)
-            raise e
+            self.db.rollback()
+            logger.warning(f"Failed to queue storage upload (continuing): {e}")
+            return None
 
     def get_session_detail(self, session_id: int) -> dict:
         """
@@ -108,6 +377,9 @@ class UploadService:
                 "upload_date": session.upload_date.isoformat() if session.upload_date else None,
                 "status": session.status,
                 "created_by": session.created_by,
+                "error_message": session.error_message,
+                "duration_ms": session.duration_ms,
+                "timings": session.timings,
             },
             "summary": summary,
         }
@@ -124,6 +396,8 @@ class UploadService:
                 "matched_count": s.matched_count,
                 "pending_count": s.pending_count,
                 "status": s.status,
+                "duration_ms": s.duration_ms,
+                "timings": s.timings,
             }
             for s in sessions
         ]
@@ -0,0 +1,185 @@
+"""
+업로드 백그라운드 작업
+파싱 → 중복 제거 → 저장 → 매칭을 요청 스레드 밖의 워커 풀에서 실행 (외부 브로커 없음)
+"""
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING
+
+from app.database import SessionLocal
+
+if TYPE_CHECKING:
+    from app.services.upload import UploadService
+    from app.services.upload_spool import UploadSpool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UploadProgress:
+    """업로드 작업 진행 상황 (프로세스 메모리)"""
+    session_id: int
+    filename: str
+    stage: str = "queued"  # queued → parsing → saving → completed / failed
+    parsed: int = 0
+    inserted: int = 0
+    matched: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    error: Optional[str] = None
+    extra: dict = field(default_factory=dict)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class UploadJobRunner:
+    """
+    업로드 작업 실행기
+
+    스레드 풀에 작업을 넣고 세션 ID별 진행 상황을 보관한다.
+    작업마다 별도 DB 세션을 열고, 예외가 나면 세션을 FAILED로 남긴다.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_history: int = 200):
+        self.max_workers = max_workers or int(os.getenv("UPLOAD_WORKERS", "2"))
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="upload"
+        )
+        self._lock = threading.Lock()
+        self._progress: Dict[int, UploadProgress] = {}
+
+    def submit(
+        self,
+        session_id: int,
+        spool: "UploadSpool",
+    ) -> Future:
+        """
+        업로드 작업 등록
+
+        Args:
+            session_id: PROCESSING 상태로 만들어 둔 업로드 세션 ID
+            spool: 업로드 파일 스풀 (작업이 끝나면 닫음)
+
+        Returns:
+            작업 Future (결과는 처리 통계)
+        """
+        progress = UploadProgress(session_id=session_id, filename=spool.filename)
+        return self._submit(
+            progress, [spool],
+            lambda service: service.run_upload(session_id, spool, progress=progress),
+        )
+
+    def submit_batch(
+        self,
+        session_id: int,
+        spools: List["UploadSpool"],
+        filename: str,
+    ) -> Future:
+        """
+        여러 파일 업로드 작업 등록 (한 세션으로 처리)
+
+        Args:
+            session_id: PROCESSING 상태로 만들어 둔 업로드 세션 ID
+            spools: 업로드 파일 스풀 리스트 (작업이 끝나면 모두 닫음)
+            filename: 진행 상황에 표시할 이름
+
+        Returns:
+            작업 Future (결과는 파일별 통계를 포함한 처리 통계)
+        """
+        progress = UploadProgress(session_id=session_id, filename=filename)
+        return self._submit(
+            progress, spools,
+            lambda service: service.run_batch_upload(session_id, spools, progress=progress),
+        )
+
+    def _submit(
+        self,
+        progress: UploadProgress,
+        spools: List["UploadSpool"],
+        work: Callable[["UploadService"], dict],
+    ) -> Future:
+        with self._lock:
+            self._progress[progress.session_id] = progress
+            self._trim()
+        return self._executor.submit(self._run, progress, spools, work)
+
+    def _run(
+        self,
+        progress: UploadProgress,
+        spools: List["UploadSpool"],
+        work: Callable[["UploadService"], dict],
+    ) -> Optional[dict]:
+        progress.started_at = datetime.utcnow().isoformat()
+        db = None
+        try:
+            from app.services.upload import UploadService
+
+            db = SessionLocal()
+            stats = work(UploadService(db))
+            progress.stage = "completed"
+            return stats
+        except Exception as e:
+            logger.exception(f"업로드 작업 실패 (session {progress.session_id})")
+            progress.stage = "failed"
+            progress.error = str(e)
+            # 서비스 생성 등 run_upload 밖에서 실패해도 세션이 PROCESSING으로 남지 않도록
+            self._mark_failed(progress.session_id, str(e))
+            return None
+        finally:
+            progress.finished_at = datetime.utcnow().isoformat()
+            for spool in spools:
+                spool.close()
+            if db is not None:
+                db.close()
+
+    @staticmethod
+    def _mark_failed(session_id: int, error: str) -> None:
+        """작업 DB 세션과 별개의 새 세션으로 업로드 세션을 FAILED 처리"""
+        from app.repositories.session_repo import SessionRepository
+
+        db = SessionLocal()
+        try:
+            SessionRepository(db).mark_failed(session_id, error)
+        except Exception:
+            db.rollback()
+            logger.exception(f"세션 실패 기록 실패 (session {session_id})")
+        finally:
+            db.close()
+
+    def _trim(self) -> None:
+        """끝난 작업 기록이 max_history를 넘으면 오래된 것부터 삭제 (락 보유 상태에서 호출)"""
+        finished = [
+            sid for sid, p in self._progress.items()
+            if p.stage in ("completed", "failed")
+        ]
+        for sid in finished[: max(0, len(self._progress) - self.max_history)]:
+            del self._progress[sid]
+
+    def get_progress(self, session_id: int) -> Optional[UploadProgress]:
+        """세션 ID의 작업 진행 상황 (이 프로세스에서 실행한 작업만)"""
+        with self._lock:
+            return self._progress.get(session_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """워커 풀 종료"""
+        self._executor.shutdown(wait=wait)
+
+
+# 싱글톤 인스턴스
+_upload_jobs: Optional[UploadJobRunner] = None
+
+
+def get_upload_jobs() -> UploadJobRunner:
+    """업로드 작업 실행기 인스턴스 반환"""
+    global _upload_jobs
+    if _upload_jobs is None:
+        _upload_jobs = UploadJobRunner()
+    return _upload_jobs
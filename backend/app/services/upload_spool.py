@@ -0,0 +1,281 @@
+"""
+업로드 파일 스풀
+요청 본문(multipart)을 받는 대로 파싱해 파일 부분을 작은 파일은 메모리, 큰 파일은 임시 파일에 보관
+크기 제한은 청크마다 검사하고, 파서와 Storage 업로드가 같은 데이터를 추가 복사 없이 읽는다.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Union
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# 업로드 최대 크기 (기본 20MB)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+
+# 이 크기를 넘으면 디스크로 내림 (기본 2MB)
+SPOOL_MEMORY_LIMIT = int(os.getenv("UPLOAD_SPOOL_MEMORY_LIMIT", str(2 * 1024 * 1024)))
+
+# 한 번에 올릴 수 있는 파일 수 (여러 파일 업로드)
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "20"))
+
+# 파일이 아닌 폼 필드의 최대 크기 합계
+MAX_FORM_FIELD_BYTES = 64 * 1024
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """업로드 크기 제한 초과"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"파일이 너무 큽니다. 최대 {max_bytes // (1024 * 1024)}MB까지 업로드할 수 있습니다.")
+
+
+class UploadSpool:
+    """
+    업로드 파일 보관소
+
+    write()로 받은 크기를 누적하며 제한을 넘는 즉시 UploadTooLargeError를 던진다.
+    받는 동안 SHA-256을 함께 계산한다 (재업로드 판별용, sha256 속성).
+    finish() 이후에는 open()으로 읽기 핸들을, storage_source()로 Storage에 넘길 값
+    (메모리면 bytes, 디스크면 파일 경로)을 얻는다. close()에서 임시 파일을 지운다.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: Optional[int] = None,
+        memory_limit: Optional[int] = None,
+    ):
+        self.filename = filename
+        self.max_bytes = max_bytes if max_bytes is not None else MAX_UPLOAD_BYTES
+        self.memory_limit = memory_limit if memory_limit is not None else SPOOL_MEMORY_LIMIT
+        self.size = 0
+        self.path: Optional[str] = None
+        self._chunks: List[bytes] = []
+        self._data: Optional[bytes] = None
+        self._file: Optional[BinaryIO] = None
+        self._hash = hashlib.sha256()
+
+    @classmethod
+    def from_bytes(cls, file_bytes: bytes, filename: str) -> "UploadSpool":
+        """이미 메모리에 있는 바이트로 생성 (크기 제한 없음)"""
+        spool = cls(filename, max_bytes=len(file_bytes), memory_limit=len(file_bytes))
+        spool._data = file_bytes
+        spool.size = len(file_bytes)
+        spool._hash.update(file_bytes)
+        return spool
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    @property
+    def sha256(self) -> str:
+        """받은 내용의 SHA-256 (hex)"""
+        return self._hash.hexdigest()
+
+    def write(self, chunk: bytes) -> None:
+        """청크 추가 (크기 제한 검사, 필요하면 디스크로 전환)"""
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            self.close()
+            raise UploadTooLargeError(self.max_bytes)
+        self._hash.update(chunk)
+
+        if self._file is None and self.size > self.memory_limit:
+            fd, self.path = tempfile.mkstemp(
+                prefix="upload_", suffix=Path(self.filename).suffix.lower()
+            )
+            self._file = os.fdopen(fd, "wb")
+            for buffered in self._chunks:
+                self._file.write(buffered)
+            self._chunks = []
+
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._chunks.append(chunk)
+
+    def finish(self) -> None:
+        """쓰기 종료"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self._data is None:
+            self._data = b"".join(self._chunks)
+            self._chunks = []
+
+    def open(self) -> BinaryIO:
+        """읽기용 핸들 (메모리면 같은 bytes를 공유하는 BytesIO, 디스크면 파일)"""
+        if self.in_memory:
+            return io.BytesIO(self._data)
+        return open(self.path, "rb")
+
+    def storage_source(self) -> Union[bytes, str]:
+        """Storage 업로드에 넘길 값 (bytes 또는 파일 경로)"""
+        return self._data if self.in_memory else self.path
+
+    def close(self) -> None:
+        """임시 파일 삭제"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self._chunks = []
+        self._data = None
+
+    def __enter__(self) -> "UploadSpool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def batch_sha256(spools: List[UploadSpool]) -> str:
+    """여러 파일 업로드의 내용 해시 (파일 순서대로 각 SHA-256을 이어 다시 해시)"""
+    digest = hashlib.sha256()
+    for spool in spools:
+        digest.update(spool.sha256.encode("ascii"))
+    return digest.hexdigest()
+
+
+class _MultipartSpooler:
+    """python-multipart 파서 콜백: field 이름의 파일 부분을 UploadSpool에 바로 기록"""
+
+    def __init__(
+        self,
+        field: str,
+        max_files: int,
+        max_bytes: Optional[int],
+        validate: Optional[Callable[[str], None]],
+    ):
+        self.field = field
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.validate = validate
+        self.spools: List[UploadSpool] = []
+        self._current: Optional[UploadSpool] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._field_bytes = 0
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._current = None
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("utf-8", "replace") != self.field or b"filename" not in options:
+            return  # 다른 폼 필드
+
+        if len(self.spools) >= self.max_files:
+            raise ValueError(f"한 번에 최대 {self.max_files}개 파일까지 업로드할 수 있습니다.")
+        filename = options[b"filename"].decode("utf-8", "replace")
+        if self.validate is not None:
+            self.validate(filename)  # 본문을 받기 전에 파일명 검사
+        self._current = UploadSpool(filename, max_bytes=self.max_bytes)
+        self.spools.append(self._current)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._current is not None:
+            self._current.write(data[start:end])
+            return
+        self._field_bytes += end - start
+        if self._field_bytes > MAX_FORM_FIELD_BYTES:
+            raise ValueError("폼 필드가 너무 큽니다.")
+
+    def on_part_end(self) -> None:
+        if self._current is not None:
+            self._current.finish()
+            self._current = None
+
+    def close(self) -> None:
+        for spool in self.spools:
+            spool.close()
+
+
+async def spool_request(
+    request,
+    field: str,
+    max_files: int = 1,
+    max_bytes: Optional[int] = None,
+    validate: Optional[Callable[[str], None]] = None,
+) -> List[UploadSpool]:
+    """
+    multipart 요청 본문을 받는 대로 파싱해 파일 필드를 스풀에 보관
+
+    UploadFile 파라미터는 핸들러 실행 전에 본문 전체를 임시 파일로 받아 두므로 크기 제한이
+    받는 도중에 적용되지 않는다. 본문 스트림을 바로 파싱하면 제한을 넘는 청크에서 받기를 멈추고,
+    파일 내용은 스풀에만 한 번 기록된다.
+
+    Args:
+        request: Starlette Request
+        field: 파일 폼 필드 이름
+        max_files: 최대 파일 수
+        max_bytes: 파일당 최대 크기 (기본 MAX_UPLOAD_BYTES)
+        validate: 파일명 검사 함수 (예외를 던지면 파일 본문을 받기 전에 중단)
+
+    Returns:
+        쓰기가 끝난 UploadSpool 리스트 (요청 순서)
+
+    Raises:
+        UploadTooLargeError: 크기 제한 초과
+        ValueError: multipart 요청이 아니거나 형식 오류, 파일 수 초과
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise ValueError("multipart/form-data 요청이 아닙니다.")
+
+    limit = max_bytes if max_bytes is not None else MAX_UPLOAD_BYTES
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and (
+        int(content_length) > limit * max_files + MAX_FORM_FIELD_BYTES
+    ):
+        raise UploadTooLargeError(limit)
+
+    spooler = _MultipartSpooler(field, max_files, limit, validate)
+    parser = MultipartParser(params[b"boundary"], spooler.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+    except BaseException:
+        spooler.close()
+        raise
+    return spooler.spools
@@ -0,0 +1,76 @@
+"""
+패턴 사용 횟수 누적기
+매칭될 때마다 커밋하지 않고 메모리에 모아 두었다가 한 번에 반영
+"""
+import threading
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from app.repositories.pattern_repo import PatternRepository
+
+
+class UseCountBuffer:
+    """패턴별 사용 횟수 증가분 누적"""
+
+    def __init__(self, flush_threshold: int = 1000):
+        """
+        Args:
+            flush_threshold: 누적 증가분이 이 값에 도달하면 flush 필요로 판단
+        """
+        self.flush_threshold = flush_threshold
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """아직 반영되지 않은 증가분 합계"""
+        return self._pending
+
+    def add(self, pattern_id: int, count: int = 1) -> bool:
+        """
+        사용 횟수 누적
+
+        Returns:
+            flush_threshold에 도달했으면 True
+        """
+        with self._lock:
+            self._counts[pattern_id] += count
+            self._pending += count
+            return self._pending >= self.flush_threshold
+
+    def drain(self) -> Dict[int, int]:
+        """누적분을 꺼내고 비움"""
+        with self._lock:
+            counts = dict(self._counts)
+            self._counts.clear()
+            self._pending = 0
+        return counts
+
+    def restore(self, counts: Dict[int, int]) -> None:
+        """반영 실패한 누적분 되돌리기"""
+        with self._lock:
+            self._counts.update(counts)
+            self._pending += sum(counts.values())
+
+    def flush(self, db: Session) -> int:
+        """
+        누적분을 DB에 반영
+
+        db 세션의 현재 트랜잭션에서 UPDATE만 실행하고 커밋은 호출자가 한다.
+        실패하면 누적분을 되돌려 다음 flush에서 다시 반영한다.
+
+        Returns:
+            반영된 증가분 합계
+        """
+        counts = self.drain()
+        if not counts:
+            return 0
+        try:
+            PatternRepository(db).add_use_counts(counts)
+        except Exception:
+            self.restore(counts)
+            raise
+        return sum(counts.values())
@@ -0,0 +1,117 @@
+"""
+dedup_key 컬럼 추가 및 기존 거래 백필 스크립트
+
+transactions 테이블에 중복 판정 키(dedup_key)와 유니크 인덱스를 만들고
+기존 거래의 키를 채운다. (card_id, 거래일, 가맹점명, 금액) 순으로 정렬해
+같은 조합의 거래는 ID 순서대로 순번(occurrence)을 매긴다.
+청크 단위로 커밋하므로 대용량 테이블에서도 잠금 시간이 짧다.
+
+실행 (backend 디렉토리에서):
+    python -m scripts.backfill_dedup_keys
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# backend 디렉토리 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import inspect, text, tuple_, update
+
+from app.database import SessionLocal, engine, init_db
+from app.dedup_key import make_dedup_key
+from app.models.transaction import Transaction
+
+ORDER_COLUMNS = (
+    Transaction.card_id,
+    Transaction.transaction_date,
+    Transaction.merchant_name,
+    Transaction.amount,
+    Transaction.id,
+)
+
+
+def ensure_column() -> None:
+    """dedup_key 컬럼이 없으면 생성 (유니크 인덱스는 백필 후 생성)"""
+    columns = {c["name"] for c in inspect(engine).get_columns("transactions")}
+    if "dedup_key" not in columns:
+        print("  ➕ transactions.dedup_key 컬럼 추가")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE transactions ADD COLUMN dedup_key VARCHAR(64)"))
+
+
+def ensure_unique_index() -> None:
+    """dedup_key 유니크 인덱스 생성"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_transactions_dedup_key "
+            "ON transactions (dedup_key)"
+        ))
+
+
+def backfill(db, chunk_size: int) -> int:
+    """정렬 키 기준 키셋 페이지네이션으로 dedup_key 갱신"""
+    updated = 0
+    last = None
+    group = None
+    occurrence = 0
+
+    while True:
+        query = db.query(*ORDER_COLUMNS, Transaction.dedup_key)
+        if last is not None:
+            query = query.filter(tuple_(*ORDER_COLUMNS) > tuple_(*last))
+        rows = query.order_by(*ORDER_COLUMNS).limit(chunk_size).all()
+        if not rows:
+            break
+        last = tuple(rows[-1][:5])
+
+        mappings = []
+        for card_id, transaction_date, merchant_name, amount, tx_id, current in rows:
+            fields = (card_id, transaction_date, merchant_name, amount)
+            if fields == group:
+                occurrence += 1
+            else:
+                group, occurrence = fields, 0
+            key = make_dedup_key(*fields, occurrence=occurrence)
+            if key != current:
+                mappings.append({"id": tx_id, "dedup_key": key})
+        if mappings:
+            db.execute(update(Transaction), mappings)
+        db.commit()
+
+        updated += len(mappings)
+        print(f"  … transactions: {len(rows)}건 처리 ({updated}건 갱신)")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dedup_key 백필")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="청크당 처리 건수")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🚀 dedup_key 백필 시작")
+    print("=" * 60)
+
+    init_db()
+    ensure_column()
+
+    db = SessionLocal()
+    try:
+        count = backfill(db, args.chunk_size)
+        ensure_unique_index()
+
+        print("\n" + "=" * 60)
+        print(f"  • 거래: {count}건 갱신")
+        print("=" * 60)
+        print("✅ 백필 완료!")
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ 오류 발생: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
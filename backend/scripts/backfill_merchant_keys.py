@@ -0,0 +1,98 @@
+"""
+merchant_key 컬럼 추가 및 기존 데이터 백필 스크립트
+
+patterns / transactions 테이블에 정규화된 가맹점명(merchant_key)을 채운다.
+청크 단위로 커밋하므로 대용량 테이블에서도 잠금 시간이 짧다.
+
+실행 (backend 디렉토리에서):
+    python -m scripts.backfill_merchant_keys
+    python -m scripts.backfill_merchant_keys --all   # 정규화 규칙 변경 후 전체 재계산
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# backend 디렉토리 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import inspect, text, update
+
+from app.database import SessionLocal, engine, init_db
+from app.merchant_key import normalize_merchant
+from app.models.pattern import Pattern
+from app.models.transaction import Transaction
+
+
+def ensure_column(table: str) -> None:
+    """merchant_key 컬럼/인덱스가 없으면 생성"""
+    columns = {c["name"] for c in inspect(engine).get_columns(table)}
+    with engine.begin() as conn:
+        if "merchant_key" not in columns:
+            print(f"  ➕ {table}.merchant_key 컬럼 추가")
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN merchant_key VARCHAR(200)"))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_merchant_key ON {table} (merchant_key)"
+        ))
+
+
+def backfill(db, model, chunk_size: int, recompute_all: bool) -> int:
+    """ID 순으로 청크를 읽어 merchant_key 갱신"""
+    updated = 0
+    last_id = 0
+    while True:
+        query = db.query(model.id, model.merchant_name, model.merchant_key).filter(model.id > last_id)
+        if not recompute_all:
+            query = query.filter(model.merchant_key.is_(None))
+        rows = query.order_by(model.id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        mappings = []
+        for row in rows:
+            key = normalize_merchant(row.merchant_name)
+            if key != row.merchant_key:
+                mappings.append({"id": row.id, "merchant_key": key})
+        if mappings:
+            db.execute(update(model), mappings)
+        db.commit()
+
+        updated += len(mappings)
+        print(f"  … {model.__tablename__}: id {last_id}까지 처리 ({updated}건 갱신)")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="merchant_key 백필")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="청크당 처리 건수")
+    parser.add_argument("--all", action="store_true", help="이미 채워진 행도 다시 계산")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🚀 merchant_key 백필 시작")
+    print("=" * 60)
+
+    init_db()
+    for model in (Pattern, Transaction):
+        ensure_column(model.__tablename__)
+
+    db = SessionLocal()
+    try:
+        pattern_count = backfill(db, Pattern, args.chunk_size, args.all)
+        transaction_count = backfill(db, Transaction, args.chunk_size, args.all)
+
+        print("\n" + "=" * 60)
+        print(f"  • 패턴: {pattern_count}건 갱신")
+        print(f"  • 거래: {transaction_count}건 갱신")
+        print("=" * 60)
+        print("✅ 백필 완료!")
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ 오류 발생: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
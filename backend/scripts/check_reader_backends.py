@@ -0,0 +1,177 @@
+"""
+Excel 리더 백엔드 적합성 검사 스크립트
+
+설치된 리더 백엔드(calamine / xlrd / openpyxl)마다 표본 청구명세서를 파싱해
+기존 엔진(xls: xlrd, xlsx: openpyxl)과 ParsedTransaction 결과가 같은지 비교한다.
+.xls 표본은 같은 내용의 .xlsx로도 변환해 xlsx 리더까지 확인한다.
+스트리밍 파싱(iter_transactions)도 표본과 빈 셀이 섞인 명세서에서 전체 파싱과 같은지 확인한다.
+
+현재 설정(STATEMENT_READER)으로 선택되는 백엔드가 기존 엔진과 다르거나
+스트리밍 결과가 전체 파싱과 다르면 종료 코드 1.
+
+실행 (backend 디렉토리에서):
+    python -m scripts.check_reader_backends
+    python -m scripts.check_reader_backends path/to/명세서.xls ...
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+# backend 디렉토리 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd
+from openpyxl import Workbook
+
+from app.services.excel_parser import ExcelParserService
+from app.services.statement_reader import (
+    READER_BACKENDS,
+    StatementFormat,
+    select_engine,
+    sniff_format,
+)
+
+DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
+SAMPLE_GLOB = "*/청구명세서조회_*/*.xls*"
+
+# 비교 기준 엔진 (백엔드 선택 기능 이전의 고정 엔진)
+REFERENCE_ENGINES = {StatementFormat.XLS: "xlrd", StatementFormat.XLSX: "openpyxl"}
+
+
+def load_samples(paths):
+    """표본 파일 → [(이름, 형식, 바이트)] (.xls는 .xlsx 변환본도 추가)"""
+    samples = []
+    for path in paths:
+        data = Path(path).read_bytes()
+        fmt = sniff_format(data[:8192])
+        if fmt not in REFERENCE_ENGINES:
+            continue
+        samples.append((Path(path).name, fmt, data))
+
+        if fmt == StatementFormat.XLS and READER_BACKENDS["xlrd"].available:
+            raw = pd.read_excel(io.BytesIO(data), engine="xlrd", header=None, dtype=str)
+            buffer = io.BytesIO()
+            raw.to_excel(buffer, index=False, header=False, engine="openpyxl")
+            samples.append((f"{Path(path).stem}.xlsx (변환)", StatementFormat.XLSX, buffer.getvalue()))
+    return samples
+
+
+def parse(data: bytes, backend: str):
+    """(ParsedTransaction 리스트, 소요 ms)"""
+    started = time.perf_counter()
+    transactions = ExcelParserService(reader_backend=backend).parse_bytes(data, "sample")
+    return transactions, (time.perf_counter() - started) * 1000
+
+
+def stream(data: bytes, batch_size: int = 50):
+    """iter_transactions 결과를 펼친 (거래 리스트, 제외 행 리스트)"""
+    parser = ExcelParserService()
+    transactions = [tx for batch in parser.iter_transactions(io.BytesIO(data), "sample", batch_size) for tx in batch]
+    return transactions, parser.last_report.rejected
+
+
+def blank_cell_statement(with_industry: bool = True) -> bytes:
+    """빈 가맹점명·빈 업종·중간 빈 행이 있는 .xlsx 명세서"""
+    book = Workbook()
+    sheet = book.active
+    header = ["카드번호", "승인일자", "가맹점명", "거래금액(원화)"] + (["가맹점업종"] if with_industry else [])
+    sheet.append(header)
+    rows = [
+        ["9430-0322-1092-4985", "2025-12-01", "주유소", 50000, "주유"],
+        ["9430-0322-1092-4985", "2025-12-02", None, 12000, None],
+        [None] * 5,
+        ["9430-0322-1092-4985", "2025-12-03", "편의점", 3000, None],
+    ]
+    for row in rows:
+        sheet.append(row[:len(header)])
+    buffer = io.BytesIO()
+    book.save(buffer)
+    return buffer.getvalue()
+
+
+def check_streaming(samples) -> int:
+    """스트리밍 파싱이 전체 파싱과 같은지 (빈 셀이 "None"/"nan"으로 들어가지 않는지 포함)"""
+    cases = [(name, data) for name, _, data in samples]
+    cases += [
+        ("빈 셀 명세서", blank_cell_statement()),
+        ("업종 컬럼 없는 명세서", blank_cell_statement(with_industry=False)),
+    ]
+
+    print(f"\n🔁 스트리밍 파싱 (pandas {pd.__version__})")
+    failed = 0
+    for name, data in cases:
+        parser = ExcelParserService()
+        reference = parser.parse_bytes(data, "sample")
+        reference_rejected = [(r.row, r.reason) for r in parser.last_report.rejected]
+        transactions, rejected = stream(data)
+
+        leaked = [
+            tx for tx in transactions
+            if {tx.merchant_name, tx.industry, tx.merchant_key} & {"None", "none", "nan"}
+        ]
+        same = transactions == reference and [(r.row, r.reason) for r in rejected] == reference_rejected
+        ok = same and not leaked
+        print(f"  {'✅' if ok else '❌'} {name}: {len(transactions)}건, 제외 {len(rejected)}행")
+        if not ok:
+            failed += 1
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel 리더 백엔드 적합성 검사")
+    parser.add_argument("files", nargs="*", help=f"표본 명세서 (기본: data/{SAMPLE_GLOB})")
+    args = parser.parse_args()
+
+    paths = args.files or sorted(DATA_DIR.glob(SAMPLE_GLOB))
+    samples = load_samples(paths)
+    if not samples:
+        print("❌ 표본 명세서가 없습니다")
+        return 1
+
+    print("📦 리더 백엔드:")
+    for backend in READER_BACKENDS.values():
+        formats = ", ".join(fmt.value for fmt in backend.formats)
+        print(f"  - {backend.name:9s} ({formats}): {'설치됨' if backend.available else '미설치'}")
+
+    failed = 0
+    for name, fmt, data in samples:
+        reference_engine = REFERENCE_ENGINES[fmt]
+        if not READER_BACKENDS[reference_engine].available:
+            print(f"\n⚠️  {name}: 기준 엔진 {reference_engine} 미설치 - 건너뜀")
+            continue
+        reference, reference_ms = parse(data, reference_engine)
+        selected = select_engine(fmt)
+
+        print(f"\n📄 {name} [{fmt.value}] 기준 {reference_engine}: {len(reference)}건 {reference_ms:.0f}ms")
+        for backend in READER_BACKENDS.values():
+            if backend.name == reference_engine or fmt not in backend.formats or not backend.available:
+                continue
+            try:
+                transactions, elapsed_ms = parse(data, backend.name)
+                same = transactions == reference
+                detail = f"{len(transactions)}건 {elapsed_ms:.0f}ms"
+            except ValueError as e:
+                same, detail = False, f"오류: {e}"
+
+            mark = "✅ 일치" if same else "❌ 불일치"
+            in_use = " (현재 선택)" if backend.name == selected else ""
+            print(f"  {backend.name:9s} {mark}  {detail}{in_use}")
+            if not same and backend.name == selected:
+                failed += 1
+
+    stream_failed = check_streaming(samples)
+
+    if failed:
+        print(f"\n❌ 현재 선택된 백엔드가 기준과 다른 표본 {failed}건")
+    if stream_failed:
+        print(f"\n❌ 스트리밍 결과가 전체 파싱과 다른 명세서 {stream_failed}건")
+    if failed or stream_failed:
+        return 1
+    print("\n✅ 현재 선택된 백엔드는 모든 표본에서 기준 엔진과 같은 결과, 스트리밍도 일치")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+-- 거래 중복 판정 키: transactions 에 dedup_key 컬럼 + 유니크 인덱스 추가
+-- 실행 일시: 2026-10-17
+-- 목적: 행마다 4개 컬럼 SELECT로 중복을 확인하던 방식을 DB 유니크 제약으로 대체
+--       (겹치는 명세서를 동시에 업로드해도 중복 저장되지 않음)
+
+-- 1. 컬럼 추가
+ALTER TABLE transactions
+ADD COLUMN IF NOT EXISTS dedup_key VARCHAR(64);
+
+-- 2. 컬럼 설명 추가 (문서화)
+COMMENT ON COLUMN transactions.dedup_key IS 'SHA-256(card_id|거래일|가맹점명|금액|같은 조합 내 순번)';
+
+-- 3. 기존 데이터 백필 (키 계산 로직은 Python 측에 있으므로 스크립트로 실행)
+--    cd backend && python -m scripts.backfill_dedup_keys
+--    스크립트가 백필 후 유니크 인덱스까지 생성한다.
+
+-- 4. 유니크 인덱스 (스크립트 대신 수동으로 만들 경우, 백필 이후 실행)
+CREATE UNIQUE INDEX IF NOT EXISTS ix_transactions_dedup_key ON transactions (dedup_key);
+
+-- 5. 검증 쿼리
+SELECT COUNT(*) AS transactions_missing FROM transactions WHERE dedup_key IS NULL;
+
+-- 롤백 스크립트 (문제 발생 시)
+-- DROP INDEX IF EXISTS ix_transactions_dedup_key;
+-- ALTER TABLE transactions DROP COLUMN IF EXISTS dedup_key;
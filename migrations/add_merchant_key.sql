@@ -0,0 +1,32 @@
+-- 가맹점 정규화 키: patterns / transactions 에 merchant_key 컬럼 추가
+-- 실행 일시: 2026-10-17
+-- 목적: 표기가 다른 같은 가맹점("쿠팡(주)-쿠팡(주)", "㈜쿠팡")을 정확 매칭 경로에서 처리
+
+-- 1. 컬럼 추가
+ALTER TABLE patterns
+ADD COLUMN IF NOT EXISTS merchant_key VARCHAR(200);
+
+ALTER TABLE transactions
+ADD COLUMN IF NOT EXISTS merchant_key VARCHAR(200);
+
+-- 2. 인덱스 생성
+CREATE INDEX IF NOT EXISTS ix_patterns_merchant_key ON patterns (merchant_key);
+CREATE INDEX IF NOT EXISTS ix_transactions_merchant_key ON transactions (merchant_key);
+
+-- 3. 컬럼 설명 추가 (문서화)
+COMMENT ON COLUMN patterns.merchant_key IS '정규화된 가맹점명 (NFKC, 공백/구두점 제거, 법인형태·지점 접미어 제거)';
+COMMENT ON COLUMN transactions.merchant_key IS '정규화된 가맹점명 (업로드 파싱 시 계산)';
+
+-- 4. 기존 데이터 백필 (정규화 로직은 Python 측에 있으므로 스크립트로 실행)
+--    cd backend && python -m scripts.backfill_merchant_keys
+
+-- 5. 검증 쿼리
+SELECT
+  (SELECT COUNT(*) FROM patterns WHERE merchant_key IS NULL) AS patterns_missing,
+  (SELECT COUNT(*) FROM transactions WHERE merchant_key IS NULL) AS transactions_missing;
+
+-- 롤백 스크립트 (문제 발생 시)
+-- DROP INDEX IF EXISTS ix_patterns_merchant_key;
+-- DROP INDEX IF EXISTS ix_transactions_merchant_key;
+-- ALTER TABLE patterns DROP COLUMN IF EXISTS merchant_key;
+-- ALTER TABLE transactions DROP COLUMN IF EXISTS merchant_key;
@@ -0,0 +1,35 @@
+-- Storage 업로드 outbox: storage_outbox 테이블 추가
+-- 실행 일시: 2026-10-17
+-- 목적: Supabase Storage 업로드를 요청 처리 경로에서 분리
+--       (파일은 로컬 디스크에 보관, 백그라운드 업로더가 재시도·서킷 브레이커와 함께 업로드)
+
+-- 1. 테이블 생성
+CREATE TABLE IF NOT EXISTS storage_outbox (
+    id SERIAL PRIMARY KEY,
+    filename VARCHAR(255) NOT NULL,
+    folder VARCHAR(50) NOT NULL,
+    content_type VARCHAR(100) NOT NULL,
+    local_path VARCHAR(500) NOT NULL,
+    status VARCHAR(20) DEFAULT 'pending',
+    attempts INTEGER DEFAULT 0,
+    next_attempt_at TIMESTAMP DEFAULT NOW(),
+    last_error VARCHAR(500),
+    storage_path VARCHAR(500),
+    storage_url VARCHAR(1000),
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP
+);
+
+-- 2. 인덱스 생성
+CREATE INDEX IF NOT EXISTS ix_storage_outbox_status ON storage_outbox (status);
+CREATE INDEX IF NOT EXISTS ix_storage_outbox_next_attempt_at ON storage_outbox (next_attempt_at);
+
+-- 3. 테이블 설명 추가 (문서화)
+COMMENT ON TABLE storage_outbox IS 'Storage 업로드 대기열 (pending → uploading → done / failed)';
+COMMENT ON COLUMN storage_outbox.local_path IS '업로드할 파일 내용이 보관된 서버 로컬 경로 (완료 후 삭제)';
+
+-- 4. 검증 쿼리
+SELECT status, COUNT(*) FROM storage_outbox GROUP BY status;
+
+-- 롤백 스크립트 (문제 발생 시)
+-- DROP TABLE IF EXISTS storage_outbox;
@@ -0,0 +1,21 @@
+-- Storage 업로드 outbox 선점 lease: storage_outbox 에 claimed_at 컬럼 추가
+-- 실행 일시: 2026-10-17
+-- 목적: 워커가 여러 개일 때(uvicorn --workers, 롤링 재시작) 새 워커가 시작하면서
+--       다른 살아 있는 워커가 업로드 중인 항목까지 pending으로 되돌려 다시 올리지 않도록,
+--       선점 시각이 STORAGE_UPLOAD_LEASE_SECONDS(기본 600초)를 지난 항목만 회수
+
+-- 1. 컬럼 추가
+ALTER TABLE storage_outbox
+ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP;
+
+-- 2. 컬럼 설명 추가 (문서화)
+COMMENT ON COLUMN storage_outbox.claimed_at IS 'uploading으로 선점한 시각 (lease 만료 판단용, 완료/실패 시 NULL)';
+
+-- 3. 검증 쿼리 (lease가 만료된 업로드 중 항목)
+SELECT id, filename, status, claimed_at, updated_at
+FROM storage_outbox
+WHERE status = 'uploading'
+  AND COALESCE(claimed_at, updated_at) < NOW() - INTERVAL '600 seconds';
+
+-- 롤백 스크립트 (문제 발생 시)
+-- ALTER TABLE storage_outbox DROP COLUMN IF EXISTS claimed_at;
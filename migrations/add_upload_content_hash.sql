@@ -0,0 +1,20 @@
+-- 업로드 파일 해시: upload_sessions 에 content_hash 컬럼 추가
+-- 실행 일시: 2026-10-17
+-- 목적: 같은 청구명세서를 다시 올리면 파싱 없이 기존 세션 결과를 반환
+
+-- 1. 컬럼 추가
+ALTER TABLE upload_sessions
+ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+-- 2. 인덱스 생성
+CREATE INDEX IF NOT EXISTS ix_upload_sessions_content_hash ON upload_sessions (content_hash);
+
+-- 3. 컬럼 설명 추가 (문서화)
+COMMENT ON COLUMN upload_sessions.content_hash IS '업로드 파일 SHA-256 (hex). 기존 세션은 NULL';
+
+-- 4. 검증 쿼리
+SELECT COUNT(*) AS sessions_with_hash FROM upload_sessions WHERE content_hash IS NOT NULL;
+
+-- 롤백 스크립트 (문제 발생 시)
+-- DROP INDEX IF EXISTS ix_upload_sessions_content_hash;
+-- ALTER TABLE upload_sessions DROP COLUMN IF EXISTS content_hash;
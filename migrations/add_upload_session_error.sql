@@ -0,0 +1,16 @@
+-- 업로드 세션 실패 상태: upload_sessions 에 error_message 컬럼 추가
+-- 실행 일시: 2026-10-17
+-- 목적: 백그라운드 업로드 작업이 실패하면 세션을 failed 상태로 남기고 사유를 기록
+
+-- 1. 컬럼 추가
+ALTER TABLE upload_sessions
+ADD COLUMN IF NOT EXISTS error_message VARCHAR(500);
+
+-- 2. 컬럼 설명 추가 (문서화)
+COMMENT ON COLUMN upload_sessions.error_message IS '업로드 처리 실패 사유 (status = failed)';
+
+-- 3. 검증 쿼리
+SELECT status, COUNT(*) FROM upload_sessions GROUP BY status;
+
+-- 롤백 스크립트 (문제 발생 시)
+-- ALTER TABLE upload_sessions DROP COLUMN IF EXISTS error_message;
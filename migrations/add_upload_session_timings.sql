@@ -0,0 +1,26 @@
+-- 업로드 소요 시간: upload_sessions 에 duration_ms, timings 컬럼 추가
+-- 실행 일시: 2026-10-17
+-- 목적: 업로드 단계별(parse / dedup / match / insert / bookkeeping / storage) 소요 시간을
+--       세션에 남겨 명세서 크기별 처리 시간 추이와 성능 저하를 확인
+
+-- 1. 컬럼 추가
+ALTER TABLE upload_sessions
+ADD COLUMN IF NOT EXISTS duration_ms INTEGER;
+
+ALTER TABLE upload_sessions
+ADD COLUMN IF NOT EXISTS timings JSON;
+
+-- 2. 컬럼 설명 추가 (문서화)
+COMMENT ON COLUMN upload_sessions.duration_ms IS '업로드 처리 전체 소요 시간 (ms). 기존 세션은 NULL';
+COMMENT ON COLUMN upload_sessions.timings IS '단계별 소요 시간 {stages_ms, total_ms, rows, rows_per_sec}';
+
+-- 3. 검증 쿼리 (최근 세션의 건수 대비 처리 시간)
+SELECT id, filename, total_transactions, duration_ms, timings->>'rows_per_sec' AS rows_per_sec
+FROM upload_sessions
+WHERE duration_ms IS NOT NULL
+ORDER BY id DESC
+LIMIT 20;
+
+-- 롤백 스크립트 (문제 발생 시)
+-- ALTER TABLE upload_sessions DROP COLUMN IF EXISTS timings;
+-- ALTER TABLE upload_sessions DROP COLUMN IF EXISTS duration_ms;
@@ -1,8 +1,13 @@
 import pandas as pd
 import os
+import sys
 import glob
 from datetime import datetime
 
+# 명세서 리더는 backend 모듈을 그대로 사용 (app 패키지 초기화 없이 모듈 파일만 import)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "app", "services"))
+from statement_reader import read_statement
+
 MAIN_FILE = "/home/tlswkehd/77inc/칠칠기업_법인카드.xlsx"
 DATA_DIR = "/home/tlswkehd/77inc/data"
 
@@ -34,13 +39,8 @@ def process_file_content(file_path):
     Reads file, returns DataFrame with Normalized Columns:
     ['CardNum', 'Date', 'Store', 'Amount']
     """
-    try:
-        df = pd.read_excel(file_path)
-    except:
-        try:
-            df = pd.read_html(file_path)[0]
-        except:
-            df = pd.read_csv(file_path, sep='\t')
+    # xls / xlsx / HTML 표 / 탭 구분 텍스트를 파일 내용으로 판별해 한 번만 읽음
+    df = read_statement(file_path)
 
     # Normalize columns
     df.columns = [str(c).strip() for c in df.columns]
@@ -3,6 +3,7 @@
 Excel 파일 처리 모듈
 칠칠기업_법인카드.xlsx 읽기/쓰기
 """
+import sys
 from typing import List, Tuple, Optional
 from pathlib import Path
 from datetime import datetime
@@ -10,6 +11,10 @@ import pandas as pd
 from openpyxl import load_workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
 
+# 명세서 리더는 backend 모듈을 그대로 사용 (app 패키지 초기화 없이 모듈 파일만 import)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "backend" / "app" / "services"))
+from statement_reader import read_workbook
+
 
 class ExcelHandler:
     """메인 Excel 파일 핸들러"""
@@ -31,11 +36,8 @@ class ExcelHandler:
         self._cache_existing_data()
 
     def _cache_existing_data(self):
-        """기존 데이터 캐시 (중복 검사용)"""
-        for sheet_name in self.workbook.sheetnames:
-            if sheet_name.isdigit():  # 카드 시트만
-                df = pd.read_excel(self.file_path, sheet_name=sheet_name)
-                self._existing_data[sheet_name] = df
+        """기존 데이터 캐시 (중복 검사용, 카드 시트만 파일을 한 번 열어 읽기)"""
+        self._existing_data = read_workbook(self.file_path, sheets=str.isdigit)
 
     def is_duplicate(self, sheet_name: str, date: str, merchant: str, amount: int) -> bool:
         """
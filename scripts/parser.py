@@ -3,11 +3,16 @@
 카드사 청구명세서 파싱 모듈
 .xls 파일에서 필요한 정보만 추출
 """
+import sys
 from dataclasses import dataclass
 from typing import List, Optional
 from pathlib import Path
 import pandas as pd
 
+# 명세서 리더는 backend 모듈을 그대로 사용 (app 패키지 초기화 없이 모듈 파일만 import)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "backend" / "app" / "services"))
+from statement_reader import read_statement
+
 
 @dataclass
 class Transaction:
@@ -42,6 +47,15 @@ class CardStatementParser:
         "industry": "가맹점업종",
     }
 
+    # 헤더명 별칭 (backend ExcelParserService.COLUMN_ALIASES 와 동일, 앞쪽 별칭 우선)
+    COLUMN_ALIASES = {
+        "card_number": ("카드번호", "이용카드번호", "카드No"),
+        "date": ("승인일자", "승인일", "이용일자", "거래일자"),
+        "merchant": ("가맹점명", "가맹점명/국가명", "이용가맹점", "이용하신가맹점"),
+        "amount": ("거래금액(원화)", "이용금액", "승인금액", "거래금액"),
+        "industry": ("가맹점업종", "업종"),
+    }
+
     def parse(self, file_path: str) -> List[Transaction]:
         """
         카드사 xls 파일 파싱
@@ -58,13 +72,13 @@ class CardStatementParser:
         if not path.exists():
             raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
 
-        # xlrd로 .xls 파일 읽기
-        try:
-            df = pd.read_excel(file_path, engine="xlrd")
-        except Exception as e:
-            print(f"파일 읽기 오류: {e}")
-            # openpyxl로 재시도 (.xlsx 형식일 수 있음)
-            df = pd.read_excel(file_path, engine="openpyxl")
+        # 파일 앞부분 바이트로 형식 판별 후 한 번만 읽기 (xls / xlsx / HTML 표 / 탭 구분 텍스트)
+        # 헤더 행을 별칭으로 찾아 필요한 컬럼만 문자열로 읽음 (컬럼명은 COLUMN_MAP 값)
+        df = read_statement(
+            file_path,
+            columns={self.COLUMN_MAP[key]: aliases for key, aliases in self.COLUMN_ALIASES.items()},
+            required=[self.COLUMN_MAP[key] for key in ("card_number", "date", "merchant", "amount")],
+        )
 
         print(f"파일 로드: {path.name} ({len(df)}건)")
 
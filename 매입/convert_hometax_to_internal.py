@@ -12,6 +12,11 @@ from datetime import datetime
 import openpyxl
 from openpyxl.styles import Alignment, Font
 import sys
+from pathlib import Path
+
+# 명세서 리더 (backend/app/services/statement_reader.py) - 형식 판별 + Excel 리더 백엔드 선택
+sys.path.append(str(Path(__file__).resolve().parent.parent / "backend" / "app" / "services"))
+from statement_reader import read_sheet
 
 
 def read_hometax_data(filepath):
@@ -26,8 +31,8 @@ def read_hometax_data(filepath):
     """
     print(f"📂 파일 읽기: {filepath}")
 
-    # 헤더는 5번째 행(인덱스 5)에 있음
-    df = pd.read_excel(filepath, header=5)
+    # 헤더는 5번째 행(인덱스 5)에 있음 (리더 백엔드는 STATEMENT_READER 환경변수)
+    df = read_sheet(filepath, header=5)
 
     print(f"✅ 총 {len(df)}건의 데이터를 읽었습니다.")
     return df